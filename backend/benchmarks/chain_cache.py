@@ -0,0 +1,80 @@
+"""Benchmark /contract/read against a fake node: direct node calls vs the per-block cache.
+
+Simulates many browsers polling get-token-supply / get-token-price /
+get-curve-info for a handful of symbols while blocks are mined. The node
+serves ``--node-capacity`` calls at once; past that, direct reads queue on it
+while the cache keeps answering from memory.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.chain_cache --requests 5000 --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import httpx
+
+import main
+from services.chain_service import ReadOnlyCache
+from benchmarks.fake_node import FakeStacksNode
+
+FUNCTIONS = ("get-token-supply", "get-token-price", "get-curve-info")
+
+
+class Uncached:
+    # Every request goes to the node, as the frontend hook does today
+    def __init__(self, node):
+        self.node = node
+
+    async def call(self, contract, function, args):
+        return {"result": await self.node.call_read_only(contract, function, args),
+                "blockHeight": self.node.block_height, "cached": False}
+
+
+async def run(mode, requests, concurrency, latency, block_every, node_capacity):
+    node = FakeStacksNode(latency=latency, max_inflight=node_capacity)
+    main.chain_cache = Uncached(node) if mode == "direct" else ReadOnlyCache(node, tip_ttl=0.05)
+    symbols = list(node.curves)
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(http, i):
+        async with sem:
+            if i and i % block_every == 0:
+                node.mine()
+            body = {"contract": "bonding-curve", "function": FUNCTIONS[i % 3],
+                    "args": [{"type": "string-ascii", "value": symbols[i % len(symbols)]}]}
+            start = time.perf_counter()
+            resp = await http.post("/contract/read", json=body)
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(http, i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{mode:>7}: {requests / elapsed:7.0f} req/s  p50={latencies[len(latencies) // 2] * 1000:6.2f}ms  "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:6.2f}ms  node calls={node.calls}  "
+          f"blocks={node.block_height - 1000}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake node response time in seconds")
+    parser.add_argument("--node-capacity", type=int, default=16, help="node calls served at once (0: unlimited)")
+    parser.add_argument("--block-every", type=int, default=1000, help="mine a block every N requests")
+    args = parser.parse_args()
+    for mode in ("direct", "cached"):
+        asyncio.run(run(mode, args.requests, args.concurrency, args.latency, args.block_every, args.node_capacity))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,124 @@
+"""Per-turn prompt size, payload and latency over a long /chat session.
+
+Drives ``--turns`` turns of one conversation through the /chat endpoint
+(in-process ASGI) with a fake model whose latency grows with the prompt
+(``--base-ms`` plus ``--us-per-token`` per estimated input token) and a fake
+Mongo. For comparison, the same turns are replayed the way /chat used to
+work: the client sends the whole history, the whole history goes into the
+prompt and comes back in the response.
+
+Usage (from ``backend/``)::
+
+    GOOGLE_API_KEY=x python -m benchmarks.chat_sessions --turns 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "x")
+
+import httpx
+
+import main
+from benchmarks.fake_mongo import FakeMongoClient
+from services.chat_sessions import ChatSessions, estimate_tokens
+from services.mongo_service import MongoService
+
+WORDS = ("moon doge pepe curve supply reserve graduate stake vote pool liquidity slippage fee launch "
+         "price chart whale diamond hands rocket vibe token block holder").split()
+
+
+class FakeModels:
+    def __init__(self, rng, base_ms, us_per_token):
+        self.rng = rng
+        self.base = base_ms / 1000
+        self.per_token = us_per_token / 1e6
+        self.prompt_tokens = []
+
+    def generate_content(self, model, contents):
+        tokens = estimate_tokens(contents)
+        time.sleep(self.base + tokens * self.per_token)
+        if contents.startswith("You are an intent extraction agent"):
+            text = '{"intent": "chat", "entities": {}}'
+        elif contents.startswith("Update the summary"):
+            text = " ".join(self.rng.choice(WORDS) for _ in range(150))
+        else:
+            self.prompt_tokens.append(tokens)
+            text = " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(40, 120)))
+        return type("Response", (), {"text": text})()
+
+
+def user_message(rng, turn):
+    return f"turn {turn}: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))) + "?"
+
+
+def percentiles(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2], ordered[int(len(ordered) * 0.95)]
+
+
+async def run(turns, base_ms, us_per_token, budget):
+    rng = random.Random(19)
+    fake = FakeModels(rng, base_ms, us_per_token)
+    main.gemini_service.client = type("Client", (), {"models": fake})()
+    mongo = MongoService(client=FakeMongoClient(latency=0.001))
+    main.chat_sessions = ChatSessions(mongo, summarize=main.gemini_service.summarize, token_budget=budget)
+    await main.chat_sessions.start()
+    messages = [user_message(rng, t) for t in range(turns)]
+
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+        conversation = None
+        for turn, message in enumerate(messages):
+            body = {"message": message} if conversation is None else {"message": message, "conversationId": conversation}
+            request_bytes = len(json.dumps(body))
+            start = time.perf_counter()
+            resp = await client.post("/chat", json=body)
+            elapsed = time.perf_counter() - start
+            resp.raise_for_status()
+            data = resp.json()
+            conversation = data["conversationId"]
+            rows.append((elapsed, request_bytes + len(resp.content), fake.prompt_tokens[-1]))
+    await main.chat_sessions.close()
+    stored = await mongo.find_doc("chat_sessions", {"_id": conversation})
+    assert stored["turns"] == turns and stored["messages"][-2]["content"] == messages[-1]
+
+    # The previous /chat: full history in, full history in the prompt, full history out
+    legacy = []
+    history = []
+    fake.rng = random.Random(19)
+    for message in messages:
+        request_bytes = len(json.dumps({"history": history, "message": message}))
+        start = time.perf_counter()
+        reply = fake.generate_content(main.gemini_service.model, main.gemini_service._chat_prompt(history, message))
+        elapsed = time.perf_counter() - start
+        history = history + [{"role": "user", "content": message}, {"role": "assistant", "content": reply.text}]
+        legacy.append((elapsed, request_bytes + len(json.dumps({"response": reply.text, "history": history})),
+                       fake.prompt_tokens[-1]))
+
+    print(f"{turns}-turn conversation, token budget {budget}, fake model {base_ms}ms + {us_per_token}us/token")
+    print(f"{'turns':>10} | {'sessions: ms p50/p95':>21} {'bytes':>7} {'prompt tok':>10} | "
+          f"{'full history: ms p50':>20} {'bytes':>8} {'prompt tok':>10}")
+    step = max(turns // 5, 1)
+    for lo in range(0, turns, step):
+        new, old = rows[lo:lo + step], legacy[lo:lo + step]
+        p50, p95 = percentiles([r[0] * 1000 for r in new])
+        print(f"{lo + 1:>4}-{lo + len(new):<5} | {p50:>10.1f} / {p95:<8.1f} {max(r[1] for r in new):>7,} "
+              f"{max(r[2] for r in new):>10,} | {percentiles([r[0] * 1000 for r in old])[0]:>20.1f} "
+              f"{max(r[1] for r in old):>8,} {max(r[2] for r in old):>10,}")
+    stats = main.chat_sessions.stats()
+    print(f"{stats['compactions']} summaries folded {stored['summarized']} messages; "
+          f"{len(stored['messages'])} messages kept; stored doc {len(json.dumps(stored)):,} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--base-ms", type=float, default=20)
+    parser.add_argument("--us-per-token", type=float, default=20)
+    parser.add_argument("--budget", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.base_ms, args.us_per_token, args.budget))
@@ -0,0 +1,267 @@
+"""In-process stand-in for the async Mongo driver used by the benchmarks.
+
+Each operation sleeps for ``latency`` seconds to model a network round-trip.
+With ``blocking=True`` the sleep is a ``time.sleep`` so the event loop stalls,
+which is what calling the synchronous ``pymongo`` client from a handler did.
+"""
+import asyncio
+import itertools
+import re
+import time
+
+_ids = itertools.count(1)
+
+
+class _InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class _BulkWriteResult:
+    def __init__(self, upserted_ids, matched_count, deleted_count):
+        self.upserted_ids = upserted_ids
+        self.upserted_count = len(upserted_ids)
+        self.matched_count = matched_count
+        self.deleted_count = deleted_count
+
+
+class _DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+
+class _UpdateResult:
+    def __init__(self, matched_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+        self.upserted_id = upserted_id
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            for op, arg in cond.items():
+                if op == "$gte" and not (value is not None and value >= arg):
+                    return False
+                if op == "$gt" and not (value is not None and value > arg):
+                    return False
+                if op == "$lte" and not (value is not None and value <= arg):
+                    return False
+                if op == "$lt" and not (value is not None and value < arg):
+                    return False
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$regex" and not (isinstance(value, str) and re.search(arg, value)):
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, collection, docs):
+        self._collection = collection
+        self._docs = docs
+
+    def sort(self, key, direction=1):
+        if isinstance(key, list):
+            for k, d in reversed(key):
+                self._docs.sort(key=lambda doc: doc.get(k), reverse=d < 0)
+        else:
+            self._docs.sort(key=lambda doc: doc.get(key), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        await self._collection._io()
+        return [dict(d) for d in self._docs[:length]]
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        await self._collection._io()
+        for d in self._docs:
+            yield dict(d)
+
+
+class FakeCollection:
+    def __init__(self, latency: float, blocking: bool):
+        self.latency = latency
+        self.blocking = blocking
+        self.docs = []
+        self._by_id = {}
+        self.ops = 0
+
+    async def _io(self):
+        self.ops += 1
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+
+    def _insert(self, doc):
+        doc.setdefault("_id", next(_ids))
+        self.docs.append(doc)
+        self._by_id[doc["_id"]] = doc
+        return doc
+
+    def _first(self, query):
+        # _id lookups are O(1), like the real _id index
+        if "_id" in query and not isinstance(query["_id"], dict):
+            d = self._by_id.get(query["_id"])
+            return d if d is not None and _matches(d, query) else None
+        for d in self.docs:
+            if _matches(d, query):
+                return d
+        return None
+
+    async def find_one(self, query=None, *args, **kwargs):
+        await self._io()
+        d = self._first(query or {})
+        return dict(d) if d is not None else None
+
+    def find(self, query=None, *args, **kwargs):
+        query = query or {}
+        ids = query.get("_id")
+        if isinstance(ids, dict) and set(ids) == {"$in"}:
+            candidates = [self._by_id[i] for i in ids["$in"] if i in self._by_id]
+            return FakeCursor(self, [d for d in candidates if _matches(d, query)])
+        return FakeCursor(self, [d for d in self.docs if _matches(d, query)])
+
+    async def insert_one(self, doc):
+        await self._io()
+        self._insert(dict(doc))
+        doc.setdefault("_id", self.docs[-1]["_id"])
+        return _InsertOneResult(doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        await self._io()
+        for doc in docs:
+            doc.setdefault("_id", next(_ids))
+            self._insert(dict(doc))
+
+    async def update_one(self, query, update, upsert=False):
+        await self._io()
+        return self._update(query, update, upsert)
+
+    async def replace_one(self, query, doc, upsert=False):
+        await self._io()
+        return self._replace(query, doc, upsert)
+
+    def _replace(self, query, doc, upsert):
+        d = self._first(query)
+        if d is not None:
+            _id = d["_id"]
+            d.clear()
+            d.update(doc, _id=_id)
+            return _UpdateResult(1)
+        if upsert:
+            doc = dict(doc)
+            doc.setdefault("_id", query.get("_id", next(_ids)))
+            self._insert(doc)
+            return _UpdateResult(0, doc["_id"])
+        return _UpdateResult(0)
+
+    def _update(self, query, update, upsert):
+        d = self._first(query)
+        if d is not None:
+            _apply(d, update)
+            return _UpdateResult(1)
+        if upsert:
+            doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            _apply(doc, update)
+            self._insert(doc)
+            return _UpdateResult(0, doc["_id"])
+        return _UpdateResult(0)
+
+    def _delete(self, query):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+        self._by_id = {d["_id"]: d for d in self.docs}
+        return before - len(self.docs)
+
+    async def delete_many(self, query):
+        await self._io()
+        return _DeleteResult(self._delete(query))
+
+    async def bulk_write(self, requests, ordered=True):
+        # One round-trip for the whole batch, like the real driver
+        await self._io()
+        upserted, matched, deleted = {}, 0, 0
+        for i, op in enumerate(requests):
+            kind = type(op).__name__
+            if kind == "ReplaceOne":
+                result = self._replace(op._filter, op._doc, op._upsert)
+            elif kind == "UpdateOne":
+                result = self._update(op._filter, op._doc, op._upsert)
+            elif kind == "DeleteMany":
+                deleted += self._delete(op._filter)
+                continue
+            else:
+                raise TypeError(f"unsupported bulk op {kind}")
+            matched += result.matched_count
+            if result.upserted_id is not None:
+                upserted[i] = result.upserted_id
+        return _BulkWriteResult(upserted, matched, deleted)
+
+    async def create_index(self, keys, **kwargs):
+        await self._io()
+        return "_".join(k if isinstance(k, str) else k[0] for k in (keys if isinstance(keys, list) else [keys]))
+
+
+def _apply(doc: dict, update: dict):
+    for key, value in update.get("$set", {}).items():
+        doc[key] = value
+    for key, value in update.get("$setOnInsert", {}).items():
+        doc.setdefault(key, value)
+    for key, value in update.get("$inc", {}).items():
+        doc[key] = doc.get(key, 0) + value
+    for key, value in update.get("$max", {}).items():
+        doc[key] = max(doc.get(key, value), value)
+    for key, value in update.get("$min", {}).items():
+        doc[key] = min(doc.get(key, value), value)
+
+
+class FakeDatabase:
+    def __init__(self, latency: float = 0.002, blocking: bool = False):
+        self._latency = latency
+        self._blocking = blocking
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self._latency, self._blocking)
+        return self._collections[name]
+
+    @property
+    def ops(self):
+        return sum(c.ops for c in self._collections.values())
+
+    async def command(self, name, *args, **kwargs):
+        await self["$cmd"]._io()
+        return {"ok": 1}
+
+
+class FakeMongoClient:
+    def __init__(self, latency: float = 0.002, blocking: bool = False):
+        self._db = FakeDatabase(latency, blocking)
+
+    def __getitem__(self, name):
+        return self._db
+
+    def get_database(self, name=None):
+        return self._db
+
+    async def close(self):
+        pass
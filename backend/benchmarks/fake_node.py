@@ -0,0 +1,54 @@
+"""Local fake Stacks node for the read-only cache.
+
+Implements ``get_block_height`` and ``call_read_only`` like
+``StacksNodeClient`` but answers from in-memory bonding-curve state after a
+configurable delay, and counts calls. With ``max_inflight`` it serves only
+that many read-only calls at once and queues the rest, like a node (or a
+rate-limited public API) at capacity.
+"""
+import asyncio
+
+from services.clarity import decode_hex, encode_value, uint_cv
+
+
+class FakeStacksNode:
+    def __init__(self, symbols=("MOON", "DOGE", "PEPE", "ROCKET"), latency: float = 0.02, block_height: int = 1000,
+                 max_inflight: int = None):
+        self.latency = latency
+        self._slots = asyncio.Semaphore(max_inflight) if max_inflight else None
+        self.block_height = block_height
+        self.calls = 0
+        self.curves = {
+            s: {"supply": 1000 * (i + 1), "base-price": 1000, "reserve-balance": 500_000 * (i + 1),
+                "curve-type": i % 4, "slope": 10, "graduated": False, "fee-percentage": 30,
+                "accumulated-fees": 0, "created-at": 1, "creator": "SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7"}
+            for i, s in enumerate(symbols)
+        }
+
+    def mine(self, blocks: int = 1):
+        self.block_height += blocks
+
+    async def get_block_height(self) -> int:
+        await asyncio.sleep(self.latency / 4)
+        return self.block_height
+
+    async def call_read_only(self, contract, function, args) -> str:
+        self.calls += 1
+        if self._slots:
+            async with self._slots:
+                await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+        values = [decode_hex(a) for a in args]
+        curve = self.curves.get(values[0]) if values else None
+        if function == "get-curve-info":
+            return "0x" + encode_value(curve).hex()
+        if function == "is-graduated":
+            return "0x" + encode_value({"ok": curve["graduated"]} if curve else {"err": 2002}).hex()
+        field = {"get-token-supply": "supply", "get-token-price": "base-price",
+                 "get-reserve-balance": "reserve-balance"}.get(function)
+        if field is None:
+            raise RuntimeError(f"fake node has no {contract}.{function}")
+        if curve is None:
+            return "0x08" + uint_cv(2002).hex()
+        return "0x07" + uint_cv(curve[field]).hex()
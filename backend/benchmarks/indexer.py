@@ -0,0 +1,182 @@
+"""Replay a synthetic block feed through ContractIndexer into the fake Mongo.
+
+Generates ``--blocks`` blocks of bonding-curve and liquidity-pool events,
+with a reorg every ``--reorg-every`` blocks, writes them as a JSON-lines
+file and indexes it. Then checks:
+
+- positions, candles and user stats equal a from-scratch fold over the
+  canonical chain (orphaned blocks excluded)
+- resuming from the checkpoint and replaying the whole file again, or
+  replaying after a crash that lost the checkpoint, changes nothing
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.indexer --blocks 2000 --events 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.fake_mongo import FakeMongoClient
+from services.candles import CandleEngine
+from services.indexer import (
+    ContractIndexer, FileReplaySource, parse_events, apply_position, apply_candle, apply_user_stats,
+    position_key, candle_key, TRADE_TYPES,
+)
+from services.mongo_service import MongoService
+
+SYMBOLS = ["MOON", "DOGE", "PEPE", "ROCKET", "CYBER"]
+CONTRACT = "SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7"
+
+
+def make_block(rng, height, parent, fork, traders, events):
+    block_hash = f"0x{height:08x}{fork:04x}"
+    evs = []
+    for i in range(events):
+        trader = rng.choice(traders)
+        symbol = rng.choice(SYMBOLS)
+        roll = rng.random()
+        tx_id = f"0x{height:08x}{fork:04x}{i:04x}"
+        if roll < 0.02:
+            value = {"event": "token-launched", "symbol": symbol, "creator": trader, "max-supply": 1_000_000}
+            contract = "bonding-curve"
+        elif roll < 0.15:
+            if rng.random() < 0.5:
+                value = {"event": "swap", "trader": trader, "stx-in": rng.randint(1, 10**7),
+                         "token-out": rng.randint(1, 10**4), "fee": 30}
+            else:
+                value = {"event": "swap", "trader": trader, "token-in": rng.randint(1, 10**4),
+                         "stx-out": rng.randint(1, 10**7), "fee": 30}
+            contract = "liquidity-pool"
+        elif roll < 0.65:
+            value = {"event": "token-bought", "symbol": symbol, "buyer": trader, "amount": rng.randint(1, 10**4),
+                     "cost": rng.randint(1, 10**7), "fee": 100, "new-supply": 0, "block": height}
+            contract = "bonding-curve"
+        else:
+            value = {"event": "token-sold", "symbol": symbol, "seller": trader, "amount": rng.randint(1, 10**4),
+                     "received": rng.randint(1, 10**7), "fee": 100, "new-supply": 0, "block": height}
+            contract = "bonding-curve"
+        evs.append({"tx_id": tx_id, "event_index": 0, "contract": f"{CONTRACT}.{contract}",
+                    "sender": trader, "value": value})
+    return {"height": height, "hash": block_hash, "parent_hash": parent,
+            "timestamp": 1_700_000_000 + height * 10, "events": evs}
+
+
+def make_feed(path, blocks, events, reorg_every, reorg_depth, seed=7):
+    """Writes the feed and returns the canonical chain (list of blocks)."""
+    rng = random.Random(seed)
+    traders = [f"SP{i:038d}" for i in range(200)]
+    chain, fork, lines = [], 0, []
+    parent = "0x0"
+    height = 1
+    while height <= blocks:
+        block = make_block(rng, height, parent, fork, traders, events)
+        chain.append(block)
+        lines.append(block)
+        parent = block["hash"]
+        height += 1
+        if reorg_every and len(lines) % reorg_every == 0 and len(chain) > reorg_depth:
+            # Orphan the last reorg_depth blocks and mine a competing branch
+            fork += 1
+            del chain[-reorg_depth:]
+            height = chain[-1]["height"] + 1
+            parent = chain[-1]["hash"]
+    with open(path, "w") as f:
+        for block in lines:
+            f.write(json.dumps(block) + "\n")
+    return chain
+
+
+def expected(chain, interval):
+    trades = [t for block in chain for t in parse_events(block)]
+    out = {"user_positions": {}, "candles": {}, "user_stats": {}}
+    for t in trades:
+        if t["type"] in TRADE_TYPES:
+            k = position_key(t)
+            out["user_positions"][k] = apply_position(out["user_positions"].get(k), t)
+            k = candle_key(t, interval)
+            out["candles"][k] = apply_candle(out["candles"].get(k), t, interval)
+        out["user_stats"][t["trader"]] = apply_user_stats(out["user_stats"].get(t["trader"]), t)
+    return len(trades), out
+
+
+def check(mongo, chain, interval):
+    count, want = expected(chain, interval)
+    db = mongo.db
+    trades = [d for d in db.trades.docs if d.get("source") == "chain"]
+    assert len(trades) == count, f"trades: {len(trades)} != {count}"
+    for collection, docs in want.items():
+        got = {d["_id"]: {k: v for k, v in d.items() if k not in ("_id", "lastSeq")} for d in db[collection].docs}
+        assert got == docs, f"{collection} differs from a fold over the canonical chain"
+    return count
+
+
+def check_candle_engine(engine, mongo, interval):
+    # The in-memory engine, fed through on_trades/on_candles, must agree with
+    # the stored candles at the base resolution and with their rollups above it
+    docs = sorted(mongo.db.candles.docs, key=lambda d: d["bucket"])
+    for res, size in engine.resolutions.items():
+        want = {}
+        for d in docs:
+            key = (d["symbol"], d["bucket"] // size * size)
+            c = want.get(key)
+            want[key] = (d["open"] if c is None else c[0], max(d["high"], c[1]) if c else d["high"],
+                         min(d["low"], c[2]) if c else d["low"], d["close"],
+                         d["volume"] + (c[4] if c else 0), d["trades"] + (c[5] if c else 0))
+        got = {(symbol, c["time"]): (c["open"], c["high"], c["low"], c["close"], c["volume"], c["trades"])
+               for symbol in engine.series for c in engine.candles(symbol, res)}
+        assert got == want, f"candle engine {res} differs from stored candles"
+
+
+async def index(mongo, path, batch, engine=None):
+    indexer = ContractIndexer(mongo, FileReplaySource(path), batch_blocks=batch, pool_symbols={},
+                              on_trades=engine and engine.add_trades, on_candles=engine and engine.replace_candles)
+    await indexer.load_checkpoint()
+    start = time.perf_counter()
+    await indexer.run()
+    return indexer, time.perf_counter() - start
+
+
+async def main(blocks, events, batch, reorg_every, reorg_depth, latency):
+    interval = int(os.getenv("INDEXER_CANDLE_INTERVAL", "60"))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blocks.jsonl")
+        chain = make_feed(path, blocks, events, reorg_every, reorg_depth)
+
+        mongo = MongoService(client=FakeMongoClient(latency=latency))
+        engine = CandleEngine()
+        indexer, elapsed = await index(mongo, path, batch, engine)
+        count = check(mongo, chain, interval)
+        check_candle_engine(engine, mongo, interval)
+        print(f"indexed {indexer.blocks} blocks / {indexer.events} events in {elapsed:.2f}s "
+              f"({indexer.events / elapsed:,.0f} events/s), {mongo.db.ops} mongo round-trips, "
+              f"{indexer.reorgs} reorgs, {indexer.rolled_back} events rolled back")
+
+        # Resume from the checkpoint: nothing left to do
+        ops = mongo.db.ops
+        indexer, _ = await index(mongo, path, batch)
+        check(mongo, chain, interval)
+        print(f"resume: {indexer.blocks} blocks re-indexed, {mongo.db.ops - ops} round-trips")
+
+        # Crash that lost the checkpoint: full replay over existing data
+        await mongo.delete_many("indexer_state", {})
+        indexer, _ = await index(mongo, path, batch)
+        check(mongo, chain, interval)
+        print(f"replay without checkpoint: {indexer.blocks} blocks, results unchanged ({count} trades); "
+              f"in-memory candles match the stored ones at every resolution")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20, help="events per block")
+    parser.add_argument("--batch", type=int, default=50, help="blocks per flush")
+    parser.add_argument("--reorg-every", type=int, default=250)
+    parser.add_argument("--reorg-depth", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.001, help="fake Mongo round-trip in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.blocks, args.events, args.batch, args.reorg_every, args.reorg_depth, args.latency))
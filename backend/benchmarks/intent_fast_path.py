@@ -0,0 +1,99 @@
+"""Precision/latency benchmark for the rule-based intent fast path.
+
+Each corpus line holds a prompt and a hand-written label
+(``benchmarks/intent_corpus.jsonl``), in the parser's own entity vocabulary
+(``stxAmount``, ``"unknown"`` for chat), so without ``--live`` the precision
+only says the parser agrees with what we meant, not with the LLM. With
+``--live`` the labels come from ``GeminiService`` instead (requires
+``GOOGLE_API_KEY``), which also reports the model's per-call latency.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.intent_fast_path [--live] [--iterations 20000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from services.intent_parser import RuleIntentParser
+
+CORPUS = os.path.join(os.path.dirname(__file__), "intent_corpus.jsonl")
+
+# Entities the fast path must agree on for a parse to count as correct
+_COMPARED = ("token", "amount", "stxAmount")
+
+
+def load_corpus(path=CORPUS):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def agrees(result: dict, expected: dict) -> bool:
+    if result["intent"] != expected["intent"]:
+        return False
+    return all(
+        str(result["entities"].get(k)).upper() == str(expected["entities"].get(k)).upper()
+        for k in _COMPARED
+        if k in result["entities"] or k in expected["entities"]
+    )
+
+
+async def label_live(corpus):
+    from services.gemini_service import GeminiService
+    service = GeminiService()
+    timings = []
+    for row in corpus:
+        start = time.perf_counter()
+        result = await service.extract_intent_llm(row["prompt"])
+        timings.append(time.perf_counter() - start)
+        row["expected"] = {"intent": result.get("intent", "unknown"), "entities": result.get("entities", {})}
+    return timings
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", action="store_true", help="label the corpus with Gemini instead of stored labels")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    llm_timings = asyncio.run(label_live(corpus)) if args.live else None
+    fast = RuleIntentParser()
+
+    accepted = correct = 0
+    for row in corpus:
+        result = fast.extract(row["prompt"])
+        if result is None:
+            continue
+        accepted += 1
+        if agrees(result, row["expected"]):
+            correct += 1
+        else:
+            print(f"  mismatch: {row['prompt']!r}: {result['intent']} {result['entities']} != {row['expected']}")
+    trade_rows = [r for r in corpus if r["expected"]["intent"] in {"buy", "sell", "launch"}]
+
+    prompts = [row["prompt"] for row in corpus]
+    samples = []
+    for _ in range(max(1, args.iterations // len(prompts))):
+        for p in prompts:
+            start = time.perf_counter_ns()
+            fast.extract(p)
+            samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+
+    print(f"corpus: {len(corpus)} prompts ({len(trade_rows)} buy/sell/launch)")
+    print(f"fast path accepted: {accepted}/{len(corpus)} "
+          f"({accepted / len(trade_rows):.0%} of trade commands would skip the LLM)")
+    print(f"precision vs {'LLM' if args.live else 'hand-written'} labels: "
+          f"{correct}/{accepted} = {correct / accepted if accepted else 0:.1%}")
+    print(f"fast path latency: p50={samples[len(samples) // 2] / 1000:.1f}us "
+          f"p99={samples[int(len(samples) * 0.99)] / 1000:.1f}us")
+    if llm_timings:
+        print(f"LLM latency: p50={statistics.median(llm_timings) * 1000:.0f}ms max={max(llm_timings) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main_cli()
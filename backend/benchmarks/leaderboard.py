@@ -0,0 +1,51 @@
+"""Leaderboard benchmark at 1M users.
+
+Measures the startup rebuild, incremental XP updates, rank lookups and
+top-k pages, and compares rank lookup with the full sort it replaces.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.leaderboard [--users 1000000]
+"""
+import argparse
+import random
+import time
+
+from services.leaderboard import Leaderboard
+
+
+def timed(label, n, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>28}: {elapsed / n * 1e6:9.2f}us/op  ({n} ops, {elapsed:.2f}s)")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    addresses = [f"SP{i:038d}" for i in range(args.users)]
+    pairs = [(a, int(rng.paretovariate(1.2) * 100)) for a in addresses]
+    lb = Leaderboard()
+    start = time.perf_counter()
+    lb.load(pairs)
+    print(f"{'rebuild from scan':>28}: {time.perf_counter() - start:.2f}s for {len(lb)} users")
+
+    sample = [rng.choice(addresses) for _ in range(args.ops)]
+    timed("xp update", args.ops, lambda: [lb.update(a, lb.xp(a) + rng.randrange(1, 500)) for a in sample])
+    timed("rank lookup", args.ops, lambda: [lb.rank(a) for a in sample])
+    timed("top-100 page (offset 0)", 1000, lambda: [lb.top(100) for _ in range(1000)])
+    timed("top-100 page (offset 500k)", 1000, lambda: [lb.top(100, args.users // 2) for _ in range(1000)])
+
+    # What computing a rank per request would cost without the index
+    xp = dict(pairs)
+    timed("full sort per rank (before)", 3, lambda: [sorted(xp.values(), reverse=True) for _ in range(3)])
+
+
+if __name__ == "__main__":
+    main_cli()
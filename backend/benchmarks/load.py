@@ -0,0 +1,298 @@
+"""Load and latency benchmark for the whole backend, with saved baselines.
+
+Boots ``main.app`` through its ASGI lifespan, with local stand-ins: the
+fake Mongo driver, a fake Gemini client (``--gemini-ms`` per call, in the
+limiter's threads like the real one), the stub RAG server in a child
+process and the fake Stacks node. Once /ready answers, drives each workload
+at each concurrency level in-process (httpx ASGI transport):
+
+- ``chat``      /chat turns in server-side conversations (small talk,
+  questions that go to RAG, trade commands the fast path parses)
+- ``dashboard`` /user/dashboard for a few hundred addresses
+- ``trading``   /buy-token and /sell-token logging
+- ``mixed``     all of the above, 20/40/20/20
+
+and reports throughput, p50/p95/p99 latency, errors, and event-loop lag
+(how late a 5ms timer fires while the load runs; the in-process client's
+own work counts too). Each level runs ``--rounds`` times and the median of
+each figure is reported. Workloads are seeded, so each round issues the
+same requests.
+
+``--save-baseline`` writes the results to ``--baseline``; otherwise a run is
+compared with that file and exits 1 when a p95, loop-lag p99 or throughput
+is more than ``--tolerance`` worse than the baseline. Baselines are machine
+specific: record one on the machine the comparison runs on.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.load --save-baseline
+    python -m benchmarks.load --workloads chat,mixed --concurrency 1,16,64
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import httpx
+
+import main
+from benchmarks.fake_mongo import FakeMongoClient
+from benchmarks.fake_node import FakeStacksNode
+from benchmarks.stub_rag import StubRagServer
+from services.chain_service import ReadOnlyCache
+from services.mongo_service import MongoService
+from services.rag_service import RagService
+
+WORKLOADS = {
+    "chat": {"chat": 1.0},
+    "dashboard": {"dashboard": 1.0},
+    "trading": {"buy": 0.5, "sell": 0.5},
+    "mixed": {"chat": 0.2, "dashboard": 0.4, "buy": 0.2, "sell": 0.2},
+}
+SYMBOLS = ("MOON", "DOGE", "PEPE", "ROCKET")
+SMALL_TALK = ("gm", "what's the vibe today", "tell me something about the market", "any tips for a new trader",
+              "which of my tokens did best this week", "explain my last trade")
+QUESTIONS = ("what is a bonding curve?", "how does graduation work?", "how are trading fees split?",
+             "what happens when I unstake?")
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "load.json")
+
+
+class FakeModels:
+    """``client.models`` for GeminiService: sleeps like a model call, in the caller's thread."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, model, contents):
+        time.sleep(self.latency)
+        if contents.startswith("You are an intent extraction agent"):
+            prompt = contents.rsplit("\n\n", 1)[-1]
+            text = json.dumps({"intent": "ask" if "?" in prompt else "chat", "entities": {}})
+        elif contents.startswith("Update the summary"):
+            text = "The user asked about tokens, curves and their trades."
+        else:
+            text = "Here is what I found: curves price by supply, and your MOON position is up."
+        return type("Response", (), {"text": text})()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Run the app's startup and shutdown the way an ASGI server does."""
+    inbox, outbox = asyncio.Queue(), asyncio.Queue()
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}},
+                                   inbox.get, outbox.put))
+    await inbox.put({"type": "lifespan.startup"})
+    message = await outbox.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Startup failed: {message.get('message')}")
+    try:
+        yield
+    finally:
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+
+
+class LagSampler:
+    """How late an ``interval`` timer fires; a loop that never yields shows up as one long sample."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = []
+        self._since = None
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self._since = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - self._since - self.interval)
+
+    def stop(self) -> list:
+        self._task.cancel()
+        # The timer still pending when the load finished may never have had a chance to fire
+        if self._since is not None:
+            self.samples.append(max(time.perf_counter() - self._since - self.interval, 0.0))
+        return sorted(self.samples)
+
+
+async def user(client, rng, mix, take, latencies, errors):
+    """One simulated client: issues requests until ``take()`` says the level is done."""
+    kinds, weights = list(mix), list(mix.values())
+    conversation = None
+    while take():
+        kind = rng.choices(kinds, weights)[0]
+        trader = f"SP{rng.randrange(500):038d}"
+        if kind == "chat":
+            roll = rng.random()
+            if roll < 0.25:
+                message = rng.choice(QUESTIONS)
+            elif roll < 0.45:
+                message = f"{rng.choice(('buy', 'sell'))} {rng.randint(1, 500)} {rng.choice(SYMBOLS)}"
+            else:
+                message = rng.choice(SMALL_TALK)
+            body = {"message": message}
+            if conversation is not None:
+                body["conversationId"] = conversation
+            request = client.post("/chat", json=body)
+        elif kind == "dashboard":
+            request = client.get("/user/dashboard", params={"address": trader, "xp": rng.randrange(5000)})
+        else:
+            request = client.post(f"/{kind}-token", json={"symbol": rng.choice(SYMBOLS), "trader": trader,
+                                                          "amount": rng.randint(1, 1000), "stx": rng.randint(1, 10 ** 6)})
+        start = time.perf_counter()
+        try:
+            resp = await request
+        except Exception:
+            errors.append(kind)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if resp.status_code >= 400:
+            errors.append(kind)
+        elif kind == "chat":
+            data = resp.json()
+            conversation = data["conversationId"] if data["turn"] < 10 else None
+        # A client on a socket gives the loop a turn between requests; the in-process transport does not
+        await asyncio.sleep(0)
+
+
+async def run_level(client, workload, concurrency, requests, seed):
+    remaining = [requests]
+
+    def take():
+        remaining[0] -= 1
+        return remaining[0] >= 0
+
+    latencies, errors = [], []
+    sampler = LagSampler()
+    sampler.start()
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(user(client, random.Random(f"{seed}:{workload}:{concurrency}:{i}"), WORKLOADS[workload],
+                                take, latencies, errors) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lag = sampler.stop()
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "rps": round(requests / elapsed, 1),
+        "p50Ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95Ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99Ms": round(percentile(latencies, 99) * 1000, 2),
+        "lagP99Ms": round(percentile(lag, 99) * 1000, 2),
+        "lagMaxMs": round(lag[-1] * 1000, 2) if lag else 0.0,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """(key, message) for every result worse than its baseline by more than ``tolerance``."""
+    found = []
+    for key, r in results.items():
+        b = baseline.get(key)
+        if b is None:
+            continue
+        # 1ms of slack so sub-millisecond timings do not flag on jitter
+        for field in ("p95Ms", "lagP99Ms"):
+            if r[field] > b[field] * (1 + tolerance) + 1:
+                found.append((key, f"{field} {b[field]} -> {r[field]}"))
+        if r["rps"] < b["rps"] * (1 - tolerance):
+            found.append((key, f"rps {b['rps']} -> {r['rps']}"))
+        if r["errors"] > b["errors"]:
+            found.append((key, f"errors {b['errors']} -> {r['errors']}"))
+    return found
+
+
+async def run(args, rag):
+    main.MongoService = lambda: MongoService(client=FakeMongoClient(latency=args.mongo_ms / 1000))
+    main.rag_service = RagService(rag.url)
+    main.chain_cache = ReadOnlyCache(FakeStacksNode(symbols=SYMBOLS, latency=args.node_ms / 1000))
+    main.gemini_service.client = type("Client", (), {"models": FakeModels(args.gemini_ms / 1000)})()
+
+    results = {}
+    async with lifespan(main.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench",
+                                     timeout=60) as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.01)
+            print(f"{'workload':>10} {'conc':>5} | {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                  f"{'errors':>6} | {'lag p99':>8} {'lag max':>8}")
+            for workload in args.workloads:
+                for concurrency in args.concurrency:
+                    rounds = [await run_level(client, workload, concurrency, args.requests, args.seed)
+                              for _ in range(args.rounds)]
+                    # Median of each figure over the rounds, so one stall does not decide the result
+                    r = {k: statistics.median(x[k] for x in rounds) for k in rounds[0]}
+                    results[f"{workload}@{concurrency}"] = r
+                    print(f"{workload:>10} {concurrency:>5} | {r['rps']:>8.1f} {r['p50Ms']:>8.1f} {r['p95Ms']:>8.1f} "
+                          f"{r['p99Ms']:>8.1f} {r['errors']:>6} | {r['lagP99Ms']:>8.2f} {r['lagMaxMs']:>8.2f}")
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workloads", type=lambda s: s.split(","), default=list(WORKLOADS))
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=300, help="requests per workload and concurrency level")
+    parser.add_argument("--gemini-ms", type=float, default=30)
+    parser.add_argument("--rag-ms", type=float, default=10)
+    parser.add_argument("--mongo-ms", type=float, default=2)
+    parser.add_argument("--node-ms", type=float, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="runs per level; the median is reported")
+    parser.add_argument("--seed", type=int, default=21)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a result is flagged")
+    args = parser.parse_args()
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    rag = StubRagServer(latency=args.rag_ms / 1000).start()
+    try:
+        results = asyncio.run(run(args, rag))
+    finally:
+        rag.stop()
+
+    settings = {k: getattr(args, k) for k in ("requests", "rounds", "gemini_ms", "rag_ms", "mongo_ms", "node_ms", "seed")}
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"settings": settings, "python": platform.python_version(),
+                       "results": results}, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["settings"] != settings:
+        print(f"warning: baseline was recorded with {baseline['settings']}")
+    found = regressions(results, baseline["results"], args.tolerance)
+    for key, message in found:
+        print(f"REGRESSION {key}: {message}")
+    compared = len(set(results) & set(baseline["results"]))
+    print(f"{compared} results compared with {args.baseline}: "
+          f"{len(found)} regression{'s' if len(found) != 1 else ''} (tolerance {args.tolerance:.0%})")
+    if found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
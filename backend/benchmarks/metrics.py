@@ -0,0 +1,104 @@
+"""Per-request cost of MetricsMiddleware and ``metrics.track``.
+
+Sends ``--requests`` raw ASGI requests (no HTTP client or server in the
+way) to a small FastAPI app with one parameterized route, with and without
+the middleware, and with every request traced. Each endpoint call makes
+one tracked dependency call so the span path is included. Then checks that
+the /metrics output is well-formed exposition text.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.metrics --requests 20000
+"""
+import argparse
+import asyncio
+import re
+import time
+
+from fastapi import FastAPI
+
+from services.metrics import Metrics, MetricsMiddleware
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? -?[0-9.e+-]+$')
+
+
+def make_app(registry, middleware):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        with registry.track("store", "get"):
+            return {"id": item_id}
+
+    if middleware:
+        app.add_middleware(MetricsMiddleware, registry=registry)
+    return app
+
+
+async def drive(app, requests):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i):
+        return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                "scheme": "http", "path": f"/items/{i}", "raw_path": f"/items/{i}".encode(), "root_path": "",
+                "query_string": b"", "headers": [(b"host", b"bench")], "server": ("bench", 80),
+                "client": ("127.0.0.1", 1234)}
+
+    for i in range(200):  # warm-up
+        await app(scope(i), receive, send)
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def check_exposition(text):
+    for line in text.splitlines():
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            continue
+        assert SAMPLE.match(line), line
+
+
+async def run(requests, rounds):
+    rows = {"no middleware": [], "middleware": [], "middleware, every request traced": []}
+    for _ in range(rounds):
+        for label, middleware, sample in (("no middleware", False, 0.0), ("middleware", True, 0.0),
+                                          ("middleware, every request traced", True, 1.0)):
+            registry = Metrics(trace_sample=sample)
+            rows[label].append(await drive(make_app(registry, middleware), requests))
+    base = min(rows["no middleware"])
+    print(f"{requests:,} requests x {rounds} rounds, best round per request:")
+    for label, times in rows.items():
+        best = min(times)
+        extra = "" if label == "no middleware" else f"  (+{best - base:.1f}us)"
+        print(f"  {label:<34} {best:7.1f}us{extra}")
+
+    registry = Metrics()
+    start = time.perf_counter()
+    for _ in range(requests):
+        with registry.track("store", "get"):
+            pass
+    print(f"  metrics.track alone: {(time.perf_counter() - start) / requests * 1e6:.2f}us per call")
+
+    traced = Metrics(trace_sample=1.0)
+    await drive(make_app(traced, True), 1000)
+    start = time.perf_counter()
+    text = traced.render()
+    render_ms = (time.perf_counter() - start) * 1000
+    check_exposition(text)
+    assert 'http_requests_total{route="/items/{item_id}",method="GET",status="200"} 1200' in text
+    assert len(traced.recent_traces(5)) == 5 and traced.recent_traces(1)[0]["spans"][0]["dependency"] == "store"
+    print(f"/metrics output is valid exposition text ({len(text.splitlines())} lines); "
+          f"rendered in {render_ms:.2f}ms; traces carry their dependency spans")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
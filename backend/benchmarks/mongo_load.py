@@ -0,0 +1,97 @@
+"""Load benchmark for the Mongo-backed endpoints.
+
+Boots the FastAPI app through its lifespan and drives it in-process with N
+concurrent requests against the fake driver in two modes:
+
+* ``blocking`` -- every DB call stalls the event loop (old sync ``MongoClient``)
+* ``async``    -- every DB call yields to the loop (``MongoService``)
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.mongo_load --requests 500 --latency 0.002
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import httpx
+
+import main
+from services.mongo_service import MongoService
+from benchmarks.fake_mongo import FakeMongoClient
+from benchmarks.load import lifespan
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _one(client, i, issued_at, latencies):
+    if i % 2:
+        resp = await client.get("/user/profile", params={"address": f"SP{i % 50:040d}", "xp": 300})
+    else:
+        resp = await client.post("/buy-token", json={"symbol": "MOON", "amount": 100, "trader": f"SP{i:040d}"})
+    resp.raise_for_status()
+    # All requests arrive together, so latency includes time spent queued
+    # behind a stalled event loop.
+    latencies.append(time.perf_counter() - issued_at)
+
+
+def set_blocking(client: FakeMongoClient, blocking: bool):
+    db = client.get_database()
+    db._blocking = blocking
+    for collection in db._collections.values():
+        collection.blocking = blocking
+
+
+async def run_mode(mode: str, client, fake, requests: int):
+    set_blocking(fake, mode == "blocking")
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_one(client, i, start, latencies) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "requests": requests,
+        "wall_s": elapsed,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+async def run(requests: int, latency: float):
+    fake = FakeMongoClient(latency)
+    main.MongoService = lambda: MongoService(client=fake)
+    results = []
+    # The lifespan starts the write-behind queue and progress engine the handlers use;
+    # it runs once, and the fake driver switches between blocking and async per mode.
+    async with lifespan(main.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.01)
+            for mode in ("blocking", "async"):
+                results.append(await run_mode(mode, client, fake, requests))
+            set_blocking(fake, False)
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated DB round-trip in seconds")
+    args = parser.parse_args()
+    for r in asyncio.run(run(args.requests, args.latency)):
+        print(f"{r['mode']:>8}: {r['requests']} reqs in {r['wall_s']:.2f}s "
+              f"({r['rps']:.0f} req/s)  p50={r['p50_ms']:.1f}ms  p99={r['p99_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main_cli()
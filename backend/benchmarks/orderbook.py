@@ -0,0 +1,298 @@
+"""Order book mirror: replay parity against marketplace.clar semantics, then a 1M-order benchmark.
+
+Replay: ``ContractModel`` re-implements the ``orders`` map transitions of
+place-limit-order, place-market-order, cancel-order and fill-order with the
+same asserts. Random transactions are applied to it, and the ``print`` tuples
+of the successful ones are fed to ``OrderBooks.apply_event``. Periodically it
+checks that:
+
+- the book holds exactly the model's fillable orders (status OPEN), at the
+  same price, remaining amount and FIFO (order-id) position
+- best bid/ask match a scan of the model's orders
+- every fill in a match preview succeeds when executed against the model
+  with the previewed amount and resulting status
+- the same events sent through ContractIndexer (with on_orders and
+  on_market_settings) give the same book, taker fee and pause state
+
+Benchmark: ``--orders`` resting orders on one symbol, then cancels,
+top-of-book, depth and match-preview timings next to a scan of a flat dict
+(what answering "best ask" from the contract's map amounts to).
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.orderbook --orders 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.fake_mongo import FakeMongoClient
+from services.indexer import ContractIndexer, FileReplaySource
+from services.mongo_service import MongoService
+from services.orderbook import OrderBooks
+
+OPEN, FILLED, CANCELLED, PARTIAL = 0, 1, 2, 3
+BUY, SELL = 0, 1
+
+
+class ContractError(Exception):
+    pass
+
+
+class ContractModel:
+    """marketplace.clar order state; methods raise ContractError where the contract returns err."""
+
+    def __init__(self):
+        self.listings = {}
+        self.orders = {}
+        self.next_order_id = 0
+        self.paused = False
+        self.taker_fee_bps = 30
+        self.min_size, self.max_size = 1, 1_000_000_000_000
+
+    def list_token(self, sender, symbol):
+        if self.paused or symbol in self.listings:
+            raise ContractError("list-token")
+        self.listings[symbol] = {"active": True, "last-price": 0}
+        return {"event": "token-listed", "symbol": symbol, "creator": sender}
+
+    def delist_token(self, sender, symbol):
+        if symbol not in self.listings:
+            raise ContractError("delist-token")
+        self.listings[symbol]["active"] = False
+        return {"event": "token-delisted", "symbol": symbol, "delisted-by": sender}
+
+    def _place(self, sender, symbol, side, price, amount, order_type):
+        order_id = self.next_order_id
+        self.orders[order_id] = {"trader": sender, "symbol": symbol, "side": side, "price": price,
+                                 "amount": amount, "filled": 0, "status": OPEN}
+        self.next_order_id += 1
+        return {"event": "order-placed", "order-id": order_id, "trader": sender, "symbol": symbol,
+                "side": side, "order-type": order_type, "price": price, "amount": amount}
+
+    def place_limit_order(self, sender, symbol, side, price, amount):
+        listing = self.listings.get(symbol)
+        if (listing is None or self.paused or not listing["active"] or price <= 0
+                or not self.min_size <= amount <= self.max_size or side > SELL):
+            raise ContractError("place-limit-order")
+        return self._place(sender, symbol, side, price, amount, 1)
+
+    def place_market_order(self, sender, symbol, side, amount):
+        listing = self.listings.get(symbol)
+        if (listing is None or self.paused or not listing["active"] or listing["last-price"] <= 0
+                or not self.min_size <= amount <= self.max_size):
+            raise ContractError("place-market-order")
+        return self._place(sender, symbol, side, listing["last-price"], amount, 0)
+
+    def cancel_order(self, sender, order_id):
+        order = self.orders.get(order_id)
+        if order is None or order["trader"] != sender or order["status"] != OPEN:
+            raise ContractError("cancel-order")
+        order["status"] = CANCELLED
+        return {"event": "order-cancelled", "order-id": order_id, "trader": sender}
+
+    def fill_order(self, sender, order_id, fill_amount):
+        order = self.orders.get(order_id)
+        if order is None:
+            raise ContractError("fill-order")
+        remaining = order["amount"] - order["filled"]
+        actual = min(fill_amount, remaining)
+        if self.paused or sender == order["trader"] or order["status"] != OPEN or actual <= 0:
+            raise ContractError("fill-order")
+        order["filled"] += actual
+        order["status"] = FILLED if order["filled"] >= order["amount"] else PARTIAL
+        self.listings[order["symbol"]]["last-price"] = order["price"]
+        fee = actual * order["price"] * self.taker_fee_bps // 10000
+        return {"event": "order-filled", "order-id": order_id, "fill-amount": actual,
+                "fill-price": order["price"], "filler": sender, "fee": fee, "new-status": order["status"]}
+
+    def set_trading_fees(self, maker, taker):
+        self.taker_fee_bps = taker
+        return {"event": "trading-fees-updated", "maker-fee": maker, "taker-fee": taker}
+
+    def set_paused(self, paused):
+        self.paused = paused
+        return {"event": "pause-state-changed", "paused": paused}
+
+
+def random_tx(rng, model, traders, symbols):
+    sender = rng.choice(traders)
+    symbol = rng.choice(list(model.listings))
+    roll = rng.random()
+    if model.paused and roll < 0.2:
+        return lambda: model.set_paused(False)
+    if roll < 0.01:
+        return lambda: model.list_token(sender, rng.choice(symbols) + str(rng.randint(0, 3)))
+    if roll < 0.011 and symbol not in symbols:
+        # Delisting stops new orders, but resting ones stay fillable
+        return lambda: model.delist_token(sender, symbol)
+    if roll < 0.015:
+        return lambda: model.set_paused(True)
+    if roll < 0.017:
+        return lambda: model.set_trading_fees(10, rng.choice([0, 30, 100]))
+    if roll < 0.6:
+        side = rng.choice([BUY, SELL])
+        price = rng.randint(90, 110) if side == SELL else rng.randint(80, 100)
+        return lambda: model.place_limit_order(sender, symbol, side, price, rng.randint(1, 500))
+    if roll < 0.65:
+        return lambda: model.place_market_order(sender, symbol, rng.choice([BUY, SELL]), rng.randint(1, 500))
+    open_ids = []
+    for i in reversed(model.orders):
+        if model.orders[i]["status"] == OPEN:
+            open_ids.append(i)
+            if len(open_ids) == 200:
+                break
+    if not open_ids:
+        return lambda: model.place_limit_order(sender, symbol, BUY, 100, 10)
+    order_id = rng.choice(open_ids)
+    if roll < 0.8:
+        owner = model.orders[order_id]["trader"] if rng.random() < 0.9 else sender
+        return lambda: model.cancel_order(owner, order_id)
+    return lambda: model.fill_order(sender, order_id, rng.randint(1, 600))
+
+
+def check_parity(model, books):
+    fillable = {i: o for i, o in model.orders.items() if o["status"] == OPEN}
+    assert set(books.orders) == set(fillable), "book and contract disagree on fillable orders"
+    for order_id, o in fillable.items():
+        symbol, side, price, remaining, trader = books.orders[order_id]
+        assert (symbol, side, price, remaining, trader) == (
+            o["symbol"], "buy" if o["side"] == BUY else "sell", o["price"], o["amount"] - o["filled"], o["trader"])
+    for symbol, book in books.books.items():
+        bids = [o["price"] for o in fillable.values() if o["symbol"] == symbol and o["side"] == BUY]
+        asks = [o["price"] for o in fillable.values() if o["symbol"] == symbol and o["side"] != BUY]
+        assert book.bids.best() == (max(bids) if bids else None)
+        assert book.asks.best() == (min(asks) if asks else None)
+        for side in (book.bids, book.asks):
+            for _, level in side.walk():
+                assert list(level) == sorted(level), "level is not in time priority"
+
+
+def check_preview(rng, model, books, traders):
+    symbol = rng.choice(list(books.books) or ["MOON"])
+    side = rng.choice(["buy", "sell"])
+    taker = rng.choice(traders)
+    preview = books.match_preview(symbol, side, rng.randint(1, 3000), taker=taker)
+    prices = [f["price"] for f in preview["fills"]]
+    assert prices == sorted(prices, reverse=side == "sell"), "fills are not best price first"
+    trial = ContractModel()
+    trial.__dict__.update(json.loads(json.dumps(model.__dict__)))
+    trial.orders = {int(k): v for k, v in trial.orders.items()}
+    for fill in preview["fills"]:
+        event = trial.fill_order(taker, fill["orderId"], fill["amount"])
+        assert event["fill-amount"] == fill["amount"] and event["fee"] == fill["fee"]
+        assert event["new-status"] == (FILLED if fill["status"] == "filled" else PARTIAL)
+    return len(preview["fills"])
+
+
+async def check_indexer_feed(blocks, books):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blocks.jsonl")
+        with open(path, "w") as f:
+            for block in blocks:
+                f.write(json.dumps(block) + "\n")
+        mirrored = OrderBooks()
+        indexer = ContractIndexer(MongoService(client=FakeMongoClient(latency=0)), FileReplaySource(path),
+                                  batch_blocks=20, on_orders=mirrored.sync, on_market_settings=mirrored.sync_settings)
+        await indexer.run()
+    assert mirrored.orders == books.orders, "indexer-fed book differs from the event-fed book"
+    assert (mirrored.taker_fee_bps, mirrored.paused) == (books.taker_fee_bps, books.paused), "indexer-fed settings differ"
+
+
+def replay(txs, seed=11):
+    rng = random.Random(seed)
+    model, books = ContractModel(), OrderBooks()
+    traders = [f"SP{i:038d}" for i in range(30)]
+    symbols = ["MOON", "DOGE", "PEPE", "ROCKET"]
+    for symbol in symbols:
+        books.apply_event(model.list_token(traders[0], symbol))
+    blocks, events, ok, previews, fills = [], [], 0, 0, 0
+    for i in range(txs):
+        try:
+            value = random_tx(rng, model, traders, symbols)()
+        except ContractError:
+            continue  # failed transactions print nothing
+        ok += 1
+        books.apply_event(value)
+        events.append({"tx_id": f"0x{i:08x}", "event_index": 0, "contract": "SP000.marketplace", "value": value})
+        if len(events) == 25:
+            height = len(blocks) + 1
+            blocks.append({"height": height, "hash": f"0x{height:x}", "parent_hash": f"0x{height - 1:x}",
+                           "timestamp": height, "events": events})
+            events = []
+        if i % 200 == 0:
+            check_parity(model, books)
+            if not model.paused:
+                fills += check_preview(rng, model, books, traders)
+                previews += 1
+    check_parity(model, books)
+    if events:
+        height = len(blocks) + 1
+        blocks.append({"height": height, "hash": f"0x{height:x}", "parent_hash": f"0x{height - 1:x}",
+                       "timestamp": height, "events": events})
+    asyncio.run(check_indexer_feed(blocks, books))
+    print(f"replay: {ok}/{txs} txs succeeded, {len(books)} open orders, parity holds; "
+          f"{previews} match previews ({fills} fills) executed cleanly against the contract model; "
+          f"indexer-fed book matches")
+
+
+def bench(n, seed=3):
+    rng = random.Random(seed)
+    books = OrderBooks()
+    flat = {}
+    orders = []
+    for order_id in range(n):
+        side = "sell" if rng.random() < 0.5 else "buy"
+        price = rng.randint(10_001, 15_000) if side == "sell" else rng.randint(5_000, 10_000)
+        orders.append((order_id, f"SP{order_id % 5000:038d}", "MOON", side, price, rng.randint(1, 1000)))
+
+    start = time.perf_counter()
+    for order in orders:
+        books.add_order(*order)
+    insert_s = time.perf_counter() - start
+    for order_id, trader, symbol, side, price, amount in orders:
+        flat[order_id] = (side, price)
+    print(f"{n:,} resting orders, {books.stats()['levels']:,} levels: insert {insert_s / n * 1e6:.2f}us/order "
+          f"({n / insert_s:,.0f}/s)")
+
+    calls = 1_000_000
+    start = time.perf_counter()
+    book = books.books["MOON"]
+    for _ in range(calls):
+        book.asks.best()
+    top_s = time.perf_counter() - start
+    start = time.perf_counter()
+    min(price for side, price in flat.values() if side == "sell")
+    scan_s = time.perf_counter() - start
+    print(f"best ask: {top_s / calls * 1e9:.0f}ns per call; flat-map scan: {scan_s * 1000:.1f}ms per call")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        books.snapshot("MOON", 10)
+    print(f"depth(10) snapshot: {(time.perf_counter() - start) / 10_000 * 1e6:.1f}us")
+
+    start = time.perf_counter()
+    for amount in (100, 10_000, 100_000):
+        preview = books.match_preview("MOON", "buy", amount, max_fills=1000)
+    print(f"match preview (3 sizes, up to 1000 fills): {(time.perf_counter() - start) / 3 * 1000:.2f}ms avg, "
+          f"last: {len(preview['fills'])} fills up to {preview['worstPrice']}")
+
+    cancels = rng.sample(range(n), min(n, 200_000))
+    start = time.perf_counter()
+    for order_id in cancels:
+        books.remove_order(order_id)
+    cancel_s = time.perf_counter() - start
+    print(f"cancel: {cancel_s / len(cancels) * 1e6:.2f}us/order over {len(cancels):,} cancels")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--txs", type=int, default=20_000, help="random contract calls to replay")
+    parser.add_argument("--orders", type=int, default=1_000_000, help="resting orders for the benchmark")
+    args = parser.parse_args()
+    replay(args.txs)
+    bench(args.orders)
@@ -0,0 +1,134 @@
+"""Feed synthetic trade/launch events through ProgressEngine and check its counters.
+
+``--events`` events for ``--users`` traders over ``--days`` days arrive in
+indexer-sized batches (a few arrive late), with a flush to a fake Mongo
+after every ``--flush-every`` batches. Afterwards quest progress, streaks
+and unlocks of sampled users are recomputed from their raw events, and the
+stored documents are compared with the in-memory state.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.progress --events 1000000
+"""
+import argparse
+import asyncio
+import datetime
+import gc
+import random
+import time
+
+from services.mongo_service import MongoService
+from services.progress import ProgressEngine, QUEST_RULES, DAY, STX
+from benchmarks.fake_mongo import FakeMongoClient
+
+T0 = 1_700_000_000
+
+
+def generate(rng, n, users, days):
+    span = days * DAY
+    events = []
+    for i in range(n):
+        ts = T0 + span * i // n
+        if rng.random() < 0.01:
+            ts -= rng.randint(0, 3600)
+        r = rng.random()
+        kind = "launch" if r < 0.02 else "share" if r < 0.05 else "sell" if r < 0.4 else "buy"
+        events.append({"trader": f"SP{rng.randrange(users):06d}", "type": kind, "symbol": f"T{rng.randrange(50)}",
+                       "amount": rng.randint(1, 1000), "stx": rng.randint(1, 5_000) * STX, "timestamp": ts})
+    return events
+
+
+def expected(events, now):
+    # Recompute one user's quest progress and streak from scratch
+    day = now // DAY
+    d = datetime.datetime.utcfromtimestamp(now)
+    month = int(datetime.datetime(d.year, d.month, 1, tzinfo=datetime.timezone.utc).timestamp())
+    week = (now - 4 * DAY) // (7 * DAY) * 7 * DAY + 4 * DAY
+    starts = {"day": day * DAY, "week": week, "month": month}
+    counters = {"trades": 0, "volume": 0, "launches": 0, "shares": 0}
+    quests = {}
+    for title, (counter, window, total, unit, _) in QUEST_RULES.items():
+        value = 0
+        for e in events:
+            if e["timestamp"] >= starts[window] and e["timestamp"] < now + 1:
+                if counter == "trades" and e["type"] in ("buy", "sell"):
+                    value += 1
+                elif counter == "volume" and e["type"] in ("buy", "sell"):
+                    value += e["stx"]
+                elif counter == "launches" and e["type"] == "launch":
+                    value += 1
+                elif counter == "shares" and e["type"] == "share":
+                    value += 1
+        quests[title] = min(value // unit, total)
+    active = sorted({e["timestamp"] // DAY for e in events})
+    streak = 0
+    if active and day - active[-1] <= 1:
+        streak = 1
+        for a, b in zip(active[::-1], active[-2::-1]):
+            if a - b != 1:
+                break
+            streak += 1
+    return quests, streak, sum(1 for e in events if e["type"] == "launch")
+
+
+async def run(n, users, days, batch, flush_every):
+    rng = random.Random(17)
+    events = generate(rng, n, users, days)
+    gc.freeze()  # keep the generated fixture out of the collector's way, as it would be in production
+    mongo = MongoService(client=FakeMongoClient(latency=0.002))
+    engine = ProgressEngine(mongo)
+    start = time.perf_counter()
+    flush_s = 0.0
+    for i, lo in enumerate(range(0, n, batch)):
+        engine.observe(events[lo:lo + batch])
+        if i % flush_every == flush_every - 1:
+            t = time.perf_counter()
+            await engine.flush()
+            flush_s += time.perf_counter() - t
+    t = time.perf_counter()
+    await engine.flush()
+    flush_s += time.perf_counter() - t
+    elapsed = time.perf_counter() - start
+    # Flush time is mostly the fake Mongo applying the upserts in-process; a real server does that work
+    print(f"{n:,} events for {users:,} users: {n / (elapsed - flush_s):,.0f} events/s through the engine, "
+          f"{n / elapsed:,.0f} events/s including {engine.flushes} flushes ({engine.writes:,} user upserts, "
+          f"{flush_s:.2f}s)")
+
+    now = events[-1]["timestamp"]
+    by_user = {}
+    for e in events:
+        by_user.setdefault(e["trader"], []).append(e)
+    # Late events can't be counted into windows that had already rolled over; only check on-time users
+    on_time = [u for u, evs in by_user.items() if all(a["timestamp"] <= b["timestamp"] for a, b in zip(evs, evs[1:]))]
+    sample = rng.sample(on_time, min(200, len(on_time)))
+    for user in sample:
+        quests, streak, launches = expected(by_user[user], now)
+        got = engine.quests(user, now)
+        assert {t: q["progress"] for t, q in got.items()} == quests, user
+        assert engine.streak(user, now) == streak, (user, engine.streak(user, now), streak)
+        assert engine.get(user)["tokensCreated"] == launches
+        unlocked = engine.achievements(user, now)
+        assert unlocked["First Launch"] == (launches >= 1)
+        stored = dict(ProgressEngine._new(user), **await mongo.find_doc("user_progress", {"_id": user}))
+        for field in ("trades", "volume", "streak", "tokensCreated", "holdings", "quests", "achievements",
+                      "day", "week", "month", "xpEarned"):
+            assert stored[field] == engine.get(user)[field], (user, field)
+    print(f"quest progress, streaks and unlocks of {len(sample)} users match a recompute from raw events; "
+          f"stored docs match memory")
+
+    t = time.perf_counter()
+    for user in sample * 50:
+        engine.quests(user, now)
+        engine.achievements(user, now)
+    print(f"read quests + achievements: {(time.perf_counter() - t) / (len(sample) * 50) * 1e6:.1f}us per user")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--flush-every", type=int, default=50, help="flush after this many batches")
+    args = parser.parse_args()
+    asyncio.run(run(args.events, args.users, args.days, args.batch, args.flush_every))
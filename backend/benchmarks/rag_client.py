@@ -0,0 +1,84 @@
+"""Benchmark RagService against a local stub RAG server.
+
+Compares the old client-per-call behaviour with the pooled keep-alive client,
+and shows request coalescing when many callers ask the same question.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.rag_client --requests 1000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from services.rag_service import RagService
+from benchmarks.stub_rag import StubRagServer
+
+
+async def ask_unpooled(base_url, question):
+    # What RagService.ask did before: a fresh AsyncClient (and TCP connection) per call
+    async with httpx.AsyncClient() as client:
+        resp = await client.post(base_url + "/query", json={"question": question, "top_k": 1}, timeout=20)
+        resp.raise_for_status()
+        return resp.json()
+
+
+async def drive(call, requests, concurrency, questions):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            await call(questions[i % len(questions)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def report(name, stub, requests, result):
+    elapsed, p50, p99 = result
+    stats = stub.stats()
+    print(f"{name:>22}: {requests / elapsed:7.0f} req/s  p50={p50 * 1000:6.1f}ms  p99={p99 * 1000:6.1f}ms  "
+          f"upstream requests={stats['requests']:5d}  connections={stats['connections']}")
+    stub.reset()
+
+
+async def run(args, stub):
+    unique = [f"question {i}" for i in range(args.requests)]
+    repeated = ["what is a bonding curve?"] * 4 + ["how does graduation work?"] * 4
+
+    report("unpooled", stub, args.requests,
+           await drive(lambda q: ask_unpooled(stub.url, q), args.requests, args.concurrency, unique))
+
+    service = RagService(stub.url)
+    await service.start()
+    report("pooled", stub, args.requests,
+           await drive(service.ask, args.requests, args.concurrency, unique))
+    report("pooled + coalescing", stub, args.requests,
+           await drive(service.ask, args.requests, args.concurrency, repeated))
+    print(f"{'':>22}  coalesced callers={service.coalesced}")
+    await service.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="stub server response delay in seconds")
+    args = parser.parse_args()
+    stub = StubRagServer(args.latency).start()
+    try:
+        asyncio.run(run(args, stub))
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main_cli()
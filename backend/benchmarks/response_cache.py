@@ -0,0 +1,237 @@
+"""Check the response cache on the profile endpoints, and measure it across workers.
+
+1. Parity: boots ``main.app`` (fake Mongo, shared L2 on the stub Redis
+   server) and checks /user/profile, /user/activity and /user/dashboard return
+   exactly what the uncached loaders build, on the miss and on the hit, and
+   that XP writes, logged trades and indexed trades are visible right after.
+2. Workers: ``--workers`` caches with their own L1 share one L2 and serve a
+   skewed read mix with ``--write-ratio`` writes; compares Mongo loads and
+   latency with no cache, L1 only and L1 + shared L2.
+3. Stampede: every worker asks for one cold key at once.
+4. Codec: stored size and hit cost against JSON and Pydantic validation.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.response_cache --workers 4 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import httpx
+
+import main
+from benchmarks.fake_mongo import FakeMongoClient
+from benchmarks.load import lifespan
+from benchmarks.stub_resp import StubRespServer
+from models.prompt_models import UserDashboard, UserProfile
+from services.mongo_service import MongoService
+from services.response_cache import RespStore, ResponseCache, decode, encode
+
+USERS = 300
+
+
+async def seed(mongo, rng):
+    addresses = [f"SP{i:038d}" for i in range(USERS)]
+    for i, address in enumerate(addresses):
+        xp = rng.randrange(10_000)
+        await mongo.insert_user({
+            "address": address, "shortAddress": address[:6] + "..." + address[-4:], "xp": xp, "level": 1,
+            "rank": 0, "badge": rng.choice(("Newbie", "Degen", "Whale")), "joinDate": "March 2026",
+            "nextLevelXP": 250, "tokensCreated": rng.randrange(5), "tokensTraded": 0, "winRate": "40%",
+            "streak": 0, "achievements": 0, "totalTrades": 0, "totalVolume": "0 STX",
+        })
+        main.leaderboard.update(address, xp)
+        if i % 3 == 0:
+            await mongo.replace_doc("user_stats", {"_id": address}, {
+                "_id": address, "trades": rng.randrange(1, 50), "symbols": ["MOON", "DOGE"][: rng.randint(1, 2)],
+                "tokensCreated": rng.randrange(3), "volume": rng.randrange(10 ** 9)})
+            await mongo.insert_many("trades", [chain_trade(rng, address, seq) for seq in range(rng.randint(1, 5))])
+    return addresses
+
+
+def chain_trade(rng, address, seq):
+    return {"source": "chain", "trader": address, "seq": seq, "type": rng.choice(("buy", "sell")),
+            "symbol": rng.choice(("MOON", "DOGE")), "amount": rng.randrange(1, 10 ** 6), "stx": rng.randrange(10 ** 7), "price": rng.randrange(1, 10 ** 4),
+            "timestamp": int(time.time()) - rng.randrange(86400)}
+
+
+async def uncached(address, xp):
+    profile = main.UserProfile(**await main.load_user(address, xp)).model_dump()
+    activity = [main.Activity(**main._public(a)).model_dump() for a in await main.load_activity(address)]
+    return profile, activity
+
+
+async def parity(stub, rng):
+    main.MongoService = lambda: MongoService(client=FakeMongoClient(latency=0.001))
+    main.response_cache = ResponseCache(RespStore(stub.url))
+    async with lifespan(main.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.01)
+            addresses = await seed(main.mongo_service, rng)
+            for address in addresses[:60]:
+                xp = rng.randrange(10_000)
+                params = {"address": address, "xp": xp}
+                for _ in range(2):  # miss, then hit
+                    profile, activity = await uncached(address, xp)
+                    assert (await client.get("/user/profile", params=params)).json() == profile, address
+                    assert (await client.get("/user/activity", params=params)).json() == activity, address
+                    dashboard = (await client.get("/user/dashboard", params=params)).json()
+                    assert dashboard["profile"] == profile and dashboard["activity"] == activity, address
+                    UserDashboard(**dashboard)
+
+            # Writes are visible on the next read
+            address = addresses[0]
+            resp = await client.post("/user/profile", json={"address": address, "xp": 99_999})
+            assert (await client.get("/user/profile", params={"address": address, "xp": 99_999})).json() == resp.json()
+            await client.post("/buy-token", json={"symbol": "MOON", "amount": 5, "trader": address})
+            assert await main.response_cache.l2.get(main.response_cache.prefix + f"activity:{address}") is None
+            trade = chain_trade(rng, address, 100)
+            await main.mongo_service.insert_many("trades", [trade])
+            main.on_indexed_trades([trade])
+            main.on_indexed_activity([trade])
+            await asyncio.sleep(0.05)
+            _, activity = await uncached(address, 0)
+            assert (await client.get("/user/activity", params={"address": address})).json() == activity
+            stats = main.response_cache.stats()
+    print(f"parity: profile/activity/dashboard for 60 users match the uncached loaders on miss and hit; "
+          f"XP writes, logged and indexed trades show up on the next read "
+          f"(L1 hits {stats['l1Hits']}, L2 hits {stats['l2Hits']}, misses {stats['misses']})")
+
+
+class Loader:
+    """A profile miss: two Mongo reads in parallel, then validation."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.loads = 0
+
+    def __call__(self, address):
+        async def load():
+            self.loads += 1
+            await asyncio.sleep(self.latency)
+            return UserProfile(address=address, shortAddress=address[:9], level=3, rank=12, badge="Degen",
+                               joinDate="March 2026", nextLevelXP=750, tokensCreated=2, tokensTraded=5,
+                               winRate="40%", streak=1, achievements=2, totalTrades=9, totalVolume="12K STX").model_dump()
+        return load
+
+
+async def workers(stub, n_workers, requests, concurrency, write_ratio, mongo_ms, l1_ttl):
+    rng = random.Random(23)
+    addresses = [f"SP{i:038d}" for i in range(5000)]
+    # Skewed: a few profiles are viewed far more often than the rest
+    ops = [(rng.randrange(n_workers), addresses[min(int(rng.paretovariate(1.2)) - 1, len(addresses) - 1)],
+            rng.random() < write_ratio) for _ in range(requests)]
+    print(f"\n{n_workers} workers, {requests:,} requests ({write_ratio:.0%} writes) over {len(addresses):,} users, "
+          f"concurrency {concurrency}, Mongo {mongo_ms}ms, L1 TTL {l1_ttl}s")
+    print(f"{'':>16} | {'Mongo loads':>11} {'hit ratio':>9} {'L2 trips':>8} {'p50 ms':>7} {'p99 ms':>7} {'req/s':>8}")
+    for label in ("no cache", "L1 only", "L1 + shared L2"):
+        loader = Loader(mongo_ms / 1000)
+        caches = []
+        prefix = f"bench{time.time()}:"  # one namespace, or the workers would not share anything
+        for _ in range(n_workers):
+            l2 = RespStore(stub.url) if label == "L1 + shared L2" else None
+            caches.append(ResponseCache(l2, ttl=60, l1_ttl=l1_ttl, prefix=prefix))
+        latencies = []
+        queue = iter(ops)
+
+        async def client():
+            for worker, address, write in queue:
+                start = time.perf_counter()
+                if label == "no cache":
+                    await loader(address)()
+                elif write:
+                    await caches[worker].invalidate(f"profile:{address}")
+                else:
+                    await caches[worker].get(f"profile:{address}", loader(address))
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        reads = sum(1 for _, _, write in ops if not write) if label != "no cache" else requests
+        trips = sum(cache.stats()["l2RoundTrips"] for cache in caches)
+        print(f"{label:>16} | {loader.loads:>11,} {1 - loader.loads / reads:>9.1%} {trips:>8,} "
+              f"{latencies[len(latencies) // 2] * 1000:>7.2f} {latencies[int(len(latencies) * 0.99)] * 1000:>7.2f} "
+              f"{requests / elapsed:>8.0f}")
+        for cache in caches:
+            await cache.close()
+
+
+async def stampede(stub, n_workers, callers):
+    for label, shared in (("L1 only", False), ("L1 + shared L2", True)):
+        loader = Loader(0.02)
+        prefix = f"stampede{time.time()}:"
+        caches = [ResponseCache(RespStore(stub.url) if shared else None, prefix=prefix) for _ in range(n_workers)]
+        await asyncio.gather(*(c.get("profile:SPHOT", loader("SPHOT")) for c in caches for _ in range(callers)))
+        print(f"stampede, {label}: {n_workers * callers} concurrent requests for one cold key -> {loader.loads} Mongo load(s)")
+        for cache in caches:
+            await cache.close()
+
+
+def codec():
+    rng = random.Random(5)
+    dashboard = {
+        "profile": UserProfile(
+            address="SP" + "1" * 38, shortAddress="SP1111...1111", level=9, rank=42, badge="Whale", joinDate="March 2026",
+            nextLevelXP=2500, tokensCreated=3, tokensTraded=11, winRate="55%", streak=4, achievements=3,
+            totalTrades=120, totalVolume="1.2M STX").model_dump(),
+        "achievements": [{"title": f"Achievement {i}", "description": "Did a thing " * 3, "icon": "🚀",
+                          "unlocked": bool(i % 2), "rarity": "Rare"} for i in range(4)],
+        "quests": [{"title": f"Quest {i}", "description": "Do a thing " * 3, "progress": i, "total": 5,
+                    "reward": "50 XP", "timeLeft": "3h", "completed": False} for i in range(4)],
+        "activity": [{"action": "Bought", "token": "$MOON", "amount": f"{rng.randrange(10 ** 6)} STX",
+                      "time": f"{i} hours ago", "type": "buy"} for i in range(20)],
+    }
+    blob = encode(dashboard)
+    as_json = json.dumps(dashboard).encode()
+    rounds = 5000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode(blob)
+    decode_us = (time.perf_counter() - start) / rounds * 1e6
+    start = time.perf_counter()
+    for _ in range(rounds):
+        json.loads(as_json)
+    json_us = (time.perf_counter() - start) / rounds * 1e6
+    start = time.perf_counter()
+    for _ in range(rounds):
+        UserDashboard(**dashboard).model_dump()
+    pydantic_us = (time.perf_counter() - start) / rounds * 1e6
+    assert decode(blob) == dashboard
+    print(f"\ncodec: dashboard payload {len(blob):,} bytes stored vs {len(as_json):,} as JSON; "
+          f"decode {decode_us:.1f}us vs json.loads {json_us:.1f}us vs Pydantic validation {pydantic_us:.1f}us")
+
+
+async def run(args, stub):
+    await parity(stub, random.Random(11))
+    await workers(stub, args.workers, args.requests, args.concurrency, args.write_ratio, args.mongo_ms, args.l1_ttl)
+    print()
+    await stampede(stub, args.workers, 50)
+    codec()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--write-ratio", type=float, default=0.02)
+    parser.add_argument("--mongo-ms", type=float, default=2)
+    parser.add_argument("--l1-ttl", type=float, default=2)
+    # asyncio sleeps in whole epoll ticks, so anything under 1 ms costs about 1.5 ms a command;
+    # the default is the loopback hop alone (~0.1 ms)
+    parser.add_argument("--l2-ms", type=float, default=0, help="stub Redis latency per command")
+    args = parser.parse_args()
+    stub = StubRespServer(latency=args.l2_ms / 1000).start()
+    try:
+        asyncio.run(run(args, stub))
+    finally:
+        stub.stop()
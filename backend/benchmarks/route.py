@@ -0,0 +1,119 @@
+"""Check the swap simulator and route optimizer, and time them.
+
+* ``amounts_out`` (vectorized) matches ``quote_swap`` for random sizes,
+  including sizes that need the exact Python-int path.
+* Splits across the curve and two pools are compared with an exhaustive
+  search over every split on small trades.
+* Route and price-impact curve timings.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.route --cases 100
+"""
+import argparse
+import random
+import time
+
+from services.bonding_curve import CurveState, ClarityArithmeticError
+from services.liquidity_pool import PoolState, amounts_out, apply_swap, quote_swap
+from services.router import CurveVenue, PoolVenue, RouteOptimizer
+
+
+def random_pool(rng, name):
+    stx = rng.randint(10 ** 6, 10 ** 13)
+    return PoolState(name, stx, stx * rng.randint(1, 10 ** 4) // rng.randint(1, 10 ** 4) + 1, rng.choice([0, 30, 100]))
+
+
+def random_curve(rng):
+    return CurveState("MOON", supply=rng.randint(0, 10 ** 5), base_price=rng.randint(1, 10 ** 4),
+                      curve_type=rng.randint(0, 3), slope=rng.randint(0, 50), fee_percentage=30,
+                      reserve_balance=rng.randint(0, 10 ** 12), max_supply=10 ** 9)
+
+
+def scalar_out(pool, side, size):
+    try:
+        return quote_swap(pool, side, size)["amountOut"]
+    except ClarityArithmeticError:
+        return 0  # the contract aborts
+
+
+def check_vectorized(rng, cases):
+    for _ in range(cases):
+        pool = random_pool(rng, "p")
+        side = rng.choice(["buy", "sell"])
+        sizes = [rng.randint(0, 10 ** rng.randint(1, 25)) for _ in range(50)]
+        got = amounts_out(pool, side, sizes)
+        want = [scalar_out(pool, side, s) for s in sizes]
+        assert [int(x) for x in got] == want, (pool, side)
+        # Reserves only move the way the contract moves them, and k never shrinks
+        s = next((s for s, w in zip(sizes, want) if w), None)
+        if s is not None:
+            after = apply_swap(pool, side, s)
+            assert after.reserve_stx * after.reserve_token >= pool.reserve_stx * pool.reserve_token * 0.999999
+    print(f"vectorized pool quotes match quote_swap on {cases} pools x 50 sizes")
+
+
+def brute_force(venues, amount):
+    best = 0
+    a, b, c = venues
+    for x in range(amount + 1):
+        out_a = a.out(x)
+        for y in range(amount - x + 1):
+            best = max(best, out_a + b.out(y) + c.out(amount - x - y))
+    return best
+
+
+def check_optimal(rng, cases):
+    worst = 0.0
+    for _ in range(cases):
+        side = rng.choice(["buy", "sell"])
+        curve = random_curve(rng)
+        curve.supply = max(curve.supply, 200)
+        pools = [PoolState("a", rng.randint(10 ** 3, 10 ** 5), rng.randint(10 ** 3, 10 ** 5)),
+                 PoolState("b", rng.randint(10 ** 3, 10 ** 5), rng.randint(10 ** 3, 10 ** 5), 100)]
+        venues = [CurveVenue(curve, side)] + [PoolVenue(p, side) for p in pools]
+        amount = rng.randint(1, 120)
+        if side == "buy":
+            amount *= curve.base_price
+            amount = min(amount, 400)
+        route = RouteOptimizer(venues).route(amount, "MOON")
+        best = brute_force(venues, amount)
+        assert route["amountOut"] <= best
+        assert route["amountOut"] >= route["bestSingleVenueOut"]
+        if best:
+            worst = max(worst, 1 - route["amountOut"] / best)
+    print(f"optimizer vs exhaustive split on {cases} small trades: worst shortfall {worst * 100:.3f}%")
+
+
+def timings(rng):
+    curve = random_curve(rng)
+    pools = [PoolState(f"pool-{i}", stx, stx // 500, 30) for i, stx in enumerate((4 * 10 ** 11, 2 * 10 ** 11, 10 ** 11))]
+    venues = [CurveVenue(curve, "buy")] + [PoolVenue(p, "buy") for p in pools]
+    optimizer = RouteOptimizer(venues)
+    n = 200
+    t = time.perf_counter()
+    for _ in range(n):
+        route = optimizer.route(10 ** 10, "MOON")
+    route_ms = (time.perf_counter() - t) * 1000 / n
+    print(f"route across curve + 3 pools: {route_ms:.2f}ms, {route['amountOut']:,} out vs "
+          f"{route['bestSingleVenueOut']:,} from the best single venue ({len(route['legs'])} legs)")
+
+    sizes = [int(10 ** (6 + 7 * i / 999)) for i in range(1000)]
+    t = time.perf_counter()
+    optimizer.impact_curve(sizes)
+    vec_ms = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    for s in sizes:
+        max(v.out(s) for v in optimizer.venues)
+    loop_ms = (time.perf_counter() - t) * 1000
+    print(f"impact curve, 1000 sizes x 4 venues: {vec_ms:.1f}ms vectorized vs {loop_ms:.1f}ms one quote at a time")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=100)
+    args = parser.parse_args()
+    rng = random.Random(16)
+    check_vectorized(rng, args.cases)
+    check_optimal(rng, args.cases)
+    timings(rng)
@@ -0,0 +1,251 @@
+"""Check StakingModel against a direct simulation of the contracts, and time it.
+
+Simulates stake / request-unstake / complete-unstake / claim-rewards and
+delegate / undelegate / propose / cast-vote calls the way staking-pool.clar
+and governance.clar execute them, emitting their print events as blocks.
+The blocks go through ``ContractIndexer`` (with a reorg) into the fake Mongo
+and a ``StakingModel`` fed by its hooks. Then checks:
+
+- pending rewards for every staker at several heights equal
+  ``calculate-rewards`` evaluated on the simulated maps
+- delegated voting power as of past blocks equals a replay up to that block
+- recorded tallies equal the simulated proposals' vote counts
+- the model built from the hooks (with the reorg) equals one built from the
+  canonical chain's events stored in Mongo
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.staking --holders 100000 --blocks 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fake_mongo import FakeMongoClient
+from services.indexer import ContractIndexer, FileReplaySource
+from services.mongo_service import MongoService
+from services.staking import StakingModel
+
+CONTRACT = "SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7"
+RATE, COOLDOWN = 100, 144
+
+
+class Contracts:
+    """The staking-pool and governance maps, updated the way the contracts update them."""
+
+    def __init__(self):
+        self.stakes = {}  # staker -> [amount, staked-at, last-claim, unstake-requested-at]
+        self.delegations = {}
+        self.proposals = {}
+        self.next_proposal = 1
+
+    def rewards(self, staker, height):
+        s = self.stakes.get(staker)
+        return s[0] * (height - s[2]) * RATE // 10000 if s else 0
+
+    def call(self, rng, who, height, holders):
+        s = self.stakes.get(who)
+        roll = rng.random()
+        if roll < 0.45 or s is None:
+            amount = rng.randint(1000, 10 ** rng.randint(4, 12))
+            total = (s[0] if s else 0) + amount
+            self.stakes[who] = [total, s[1] if s else height, height, None]
+            return [{"event": "stake", "staker": who, "amount": amount, "total": total, "block": height}]
+        if roll < 0.6:
+            r = self.rewards(who, height)
+            if r == 0:
+                return []
+            s[2] = height
+            return [{"event": "rewards-claimed", "staker": who, "amount": r, "block": height}]
+        if roll < 0.68 and s[3] is None:
+            out = []
+            r = self.rewards(who, height)
+            if r:
+                s[2] = height
+                out.append({"event": "rewards-claimed", "staker": who, "amount": r, "block": height})
+            s[3] = height
+            return out + [{"event": "unstake-requested", "staker": who, "block": height}]
+        if roll < 0.75 and s[3] is not None and height >= s[3] + COOLDOWN:
+            del self.stakes[who]
+            return [{"event": "unstake-completed", "staker": who, "amount": s[0], "block": height}]
+        if roll < 0.85:
+            delegate = rng.choice(holders)
+            if delegate == who:
+                return []
+            self.delegations[who] = delegate
+            return [{"event": "votes-delegated", "delegator": who, "delegate": delegate, "block": height}]
+        if roll < 0.9:
+            self.delegations.pop(who, None)
+            return [{"event": "votes-undelegated", "delegator": who, "block": height}]
+        if roll < 0.901:
+            pid = self.next_proposal
+            self.next_proposal += 1
+            self.proposals[pid] = {"start": height + 10, "end": height + 60, "votes": {}, "tally": [0, 0, 0]}
+            return [{"event": "proposal-created", "proposal-id": pid, "proposer": who, "title": f"Proposal {pid}",
+                     "start-block": height + 10, "end-block": height + 60, "block": height}]
+        live = [pid for pid, p in self.proposals.items() if p["start"] <= height <= p["end"] and who not in p["votes"]]
+        if not live:
+            return []
+        pid = rng.choice(live)
+        support = rng.randint(0, 2)
+        self.proposals[pid]["votes"][who] = support
+        self.proposals[pid]["tally"][support] += 100  # get-voting-power's placeholder
+        return [{"event": "vote-cast", "proposal-id": pid, "voter": who, "support": support,
+                 "voting-power": 100, "block": height}]
+
+
+def make_blocks(rng, holders, blocks, calls):
+    contracts = Contracts()
+    chain, parent = [], "0x0"
+    for height in range(1, blocks + 1):
+        events = []
+        for i in range(calls):
+            who = rng.choice(holders)
+            contract = "governance" if rng.random() < 0.2 else "staking-pool"
+            for value in contracts.call(rng, who, height, holders):
+                events.append({"tx_id": f"0x{height:08x}{i:06x}", "event_index": len(events),
+                               "contract": f"{CONTRACT}.{contract}", "sender": who, "value": value})
+        block = {"height": height, "hash": f"0x{height:08x}", "parent_hash": parent,
+                 "timestamp": 1_700_000_000 + height * 600, "events": events}
+        chain.append(block)
+        parent = block["hash"]
+    return contracts, chain
+
+
+def reference_power(chain, block):
+    stakes, delegations = {}, {}
+    for b in chain:
+        if b["height"] > block:
+            break
+        for e in b["events"]:
+            v = e["value"]
+            if v["event"] == "stake":
+                stakes[v["staker"]] = v["total"]
+            elif v["event"] == "unstake-completed":
+                stakes.pop(v["staker"], None)
+            elif v["event"] == "votes-delegated":
+                delegations[v["delegator"]] = v["delegate"]
+            elif v["event"] == "votes-undelegated":
+                delegations.pop(v["delegator"], None)
+    power = {}
+    for holder, amount in stakes.items():
+        target = delegations.get(holder, holder)
+        power[target] = power.get(target, 0) + amount
+    return power
+
+
+async def index(chain, reorg_at):
+    # The feed first carries a fork from reorg_at on, then the canonical blocks replace it
+    fork = []
+    for block in chain[reorg_at - 1:reorg_at + 4]:
+        fork.append(dict(block, hash=block["hash"] + "ff", parent_hash=block["parent_hash"] + ("ff" if fork else ""),
+                         events=block["events"][: len(block["events"]) // 2]))
+    feed = chain[:reorg_at - 1] + fork + chain[reorg_at - 1:]
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+        for block in feed:
+            f.write(json.dumps(block) + "\n")
+    mongo = MongoService(client=FakeMongoClient())
+    model = StakingModel(reward_rate=RATE, cooldown=COOLDOWN)
+    indexer = ContractIndexer(mongo, FileReplaySource(f.name), batch_blocks=3,
+                              on_governance=model.apply, on_governance_rollback=model.rollback)
+    try:
+        await indexer.run()
+    finally:
+        os.unlink(f.name)
+    stored = StakingModel(reward_rate=RATE, cooldown=COOLDOWN)
+    stored.load(await mongo.find_many("governance_events", {}, sort=[("seq", 1)]))
+    return model, stored, indexer
+
+
+def columns(model):
+    c = dict(model.columns, power=model.voting_power(model.height).tolist())
+    c["delegate"] = [model.addresses[d] if d >= 0 else None for d in c["delegate"]]
+    rows = zip(model.addresses, *(c[name] for name in ("amount", "staked_at", "last_claim", "unstake_at",
+                                                        "claimed", "delegate", "power")))
+    return {row[0]: row[1:] for row in rows if any(x not in (0, -1, None) for x in row[1:])}
+
+
+def same_state(a, b):
+    assert columns(a) == columns(b)
+    assert {k: {f: v for f, v in p.items()} for k, p in a.proposals.items()} == b.proposals
+
+
+async def run(holders, blocks, calls, rounds):
+    rng = random.Random(18)
+    addresses = [f"SP{i:038d}" for i in range(holders)]
+    t = time.perf_counter()
+    contracts, chain = make_blocks(rng, addresses, blocks, calls)
+    events = sum(len(b["events"]) for b in chain)
+    print(f"simulated {blocks} blocks, {events:,} events, {len(contracts.stakes):,} open stakes "
+          f"({time.perf_counter() - t:.1f}s)")
+
+    t = time.perf_counter()
+    model, stored, indexer = await index(chain, reorg_at=blocks // 2)
+    print(f"indexed with {indexer.reorgs} reorg ({indexer.rolled_back} events rolled back) in "
+          f"{time.perf_counter() - t:.1f}s; {model.stats()['events']:,} events in the model")
+    same_state(model, stored)
+    print("model fed by the indexer hooks (through the reorg) equals one rebuilt from stored events")
+
+    tip = model.height
+    heights = [tip, tip + 1, tip + 144, tip + 10_000]
+    pending = model.pending_rewards(heights)
+    for staker in contracts.stakes:
+        r = model.rows[staker]
+        assert [int(x) for x in pending[:, r]] == [contracts.rewards(staker, h) for h in heights], staker
+    assert model.stats()["totalStaked"] == sum(s[0] for s in contracts.stakes.values())
+    print(f"pending rewards of {len(contracts.stakes):,} stakers at {len(heights)} heights match calculate-rewards")
+
+    for block in (blocks // 4, blocks // 2, blocks - 1, tip):
+        want = reference_power(chain, block)
+        got = model.voting_power(block)
+        assert {a: int(got[r]) for a, r in model.rows.items() if got[r]} == want, block
+    print("delegated voting power as of 4 past blocks matches a replay up to each block")
+
+    for pid, p in contracts.proposals.items():
+        tally = model.tally(pid, tip)
+        assert [tally["recorded"]["againstVotes"], tally["recorded"]["forVotes"],
+                tally["recorded"]["abstainVotes"]] == p["tally"], pid
+    print(f"recorded tallies of {len(contracts.proposals)} proposals match cast-vote")
+
+    # Timings: every holder at once vs one calculate-rewards per holder
+    many = [tip + i * 10 for i in range(100)]
+    t = time.perf_counter()
+    for _ in range(rounds):
+        model.pending_rewards([tip])
+    vec_ms = (time.perf_counter() - t) * 1000 / rounds
+    t = time.perf_counter()
+    model.pending_rewards(many)
+    proj_ms = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    for staker in contracts.stakes:
+        contracts.rewards(staker, tip)
+    loop_ms = (time.perf_counter() - t) * 1000
+    print(f"pending rewards for {len(model):,} addresses: {vec_ms:.2f}ms vectorized, {proj_ms:.1f}ms for 100 "
+          f"heights, {loop_ms:.1f}ms one staker at a time (in-process; a node call each would be far slower)")
+    t = time.perf_counter()
+    for i in range(rounds):
+        model._power_cache = {}
+        model.voting_power(blocks // 2)
+    power_ms = (time.perf_counter() - t) * 1000 / rounds
+    t = time.perf_counter()
+    for pid in contracts.proposals:
+        model.tally(pid, tip)
+    tally_ms = (time.perf_counter() - t) * 1000 / max(len(contracts.proposals), 1)
+    print(f"voting power of every address as of a past block: {power_ms:.2f}ms; tally: {tally_ms:.2f}ms")
+    assert np.all(model.voting_power(tip) >= 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--holders", type=int, default=100_000)
+    parser.add_argument("--blocks", type=int, default=300)
+    parser.add_argument("--calls", type=int, default=1000, help="contract calls per block")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.holders, args.blocks, args.calls, args.rounds))
@@ -0,0 +1,85 @@
+"""Import-to-ready time of the backend.
+
+Each run is a fresh interpreter that imports ``main`` and boots the app
+through its lifespan against the fake Mongo driver (``--mongo-ms`` per
+operation) and an in-process RAG stand-in, then polls /ready. Reports the
+median over ``--runs`` of:
+
+- import:  ``import main``
+- serving: until the lifespan startup returns (the server accepts requests)
+- ready:   until /ready answers 200 (the ``importToReadyMs`` it reports)
+- gemini:  until the Gemini client is built, when it is warmed at all
+
+with the Gemini warm-up on (the default) and off (``GEMINI_WARM_UP=0``).
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+async def child(mongo_ms):
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    start = time.perf_counter()
+    import main  # timed: this is what a worker pays before it can serve
+    imported = time.perf_counter()
+
+    import httpx
+    from benchmarks.fake_mongo import FakeMongoClient
+    from benchmarks.load import lifespan
+    from services.mongo_service import MongoService
+
+    main.MongoService = lambda: MongoService(client=FakeMongoClient(latency=mongo_ms / 1000))
+    main.rag_service.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+    async with lifespan(main.app):
+        serving = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.001)
+            while main.readiness.components.get("gemini", {}).get("status") == "warming":
+                await asyncio.sleep(0.001)
+            stats = (await client.get("/ready")).json()
+    gemini = stats["components"].get("gemini")
+    return {
+        "import": (imported - start) * 1000,
+        "serving": (serving - start) * 1000,
+        "ready": stats["importToReadyMs"],
+        "gemini": gemini["ms"] if gemini else None,
+        "genaiLoaded": "google.genai" in sys.modules,
+    }
+
+
+def run(runs, mongo_ms):
+    print(f"{'':>18} | {'import ms':>9} {'serving ms':>10} {'ready ms':>8} {'gemini ms':>9} | genai loaded")
+    for label, warm in (("gemini warm-up", "1"), ("GEMINI_WARM_UP=0", "0")):
+        env = dict(os.environ, GEMINI_WARM_UP=warm)
+        results = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--child", "--mongo-ms", str(mongo_ms)],
+                                 env=env, capture_output=True, text=True, check=True)
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        med = {k: statistics.median(r[k] for r in results) if results[0][k] is not None else None
+               for k in ("import", "serving", "ready", "gemini")}
+        gemini = f"{med['gemini']:>9.0f}" if med["gemini"] is not None else f"{'-':>9}"
+        print(f"{label:>18} | {med['import']:>9.0f} {med['serving']:>10.0f} {med['ready']:>8.0f} {gemini} | "
+              f"{'yes' if results[0]['genaiLoaded'] else 'no'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mongo-ms", type=float, default=2)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(child(args.mongo_ms))))
+    else:
+        run(args.runs, args.mongo_ms)
@@ -0,0 +1,88 @@
+"""Local stand-in for the RAG server's ``/query`` endpoint.
+
+Runs uvicorn in a child process on a free port so it does not compete with
+the client for the GIL. ``/query`` answers after a fixed delay; ``GET
+/stats`` reports request and distinct-connection counts and ``POST /reset``
+clears them.
+"""
+import asyncio
+import json
+import multiprocessing
+import socket
+import time
+
+import httpx
+import uvicorn
+
+
+class _StubApp:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+        self.connections = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        while True:
+            message = await receive()
+            if not message.get("more_body"):
+                break
+        if scope["path"] == "/stats":
+            body = json.dumps({"requests": self.requests, "connections": len(self.connections)}).encode()
+        elif scope["path"] == "/reset":
+            self.requests = 0
+            self.connections = set()
+            body = b"{}"
+        else:
+            self.requests += 1
+            self.connections.add(tuple(scope.get("client") or ()))
+            await asyncio.sleep(self.latency)
+            body = b'{"results": [{"text": "Bonding curves price tokens by supply."}]}'
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _serve(port: int, latency: float):
+    uvicorn.run(_StubApp(latency), host="127.0.0.1", port=port, interface="asgi3",
+                log_level="warning", access_log=False, backlog=4096)
+
+
+class StubRagServer:
+    def __init__(self, latency: float = 0.005):
+        self.latency = latency
+        self.port = None
+        self._process = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def stats(self) -> dict:
+        return httpx.get(self.url + "/stats").json()
+
+    def reset(self):
+        httpx.post(self.url + "/reset")
+
+    def start(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self._process = multiprocessing.Process(target=_serve, args=(self.port, self.latency), daemon=True)
+        self._process.start()
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                self.stats()
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        self.reset()
+        return self
+
+    def stop(self):
+        self._process.terminate()
+        self._process.join(timeout=5)
@@ -0,0 +1,134 @@
+"""Local stand-in for a Redis server, for the shared response cache.
+
+Runs an asyncio server in a child process speaking enough of the Redis
+protocol for ``RespStore``: PING, GET, MGET, SET with PX / NX, INCR, PEXPIRE,
+DEL and DBSIZE, plus FLUSHALL to reset between runs. Every command answers
+after ``latency`` seconds, to model a network hop; the event loop wakes in
+whole milliseconds, so anything under 1 ms comes out at 1-2 ms a command.
+"""
+import asyncio
+import multiprocessing
+import socket
+import time
+
+
+async def _read_command(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    count = int(line[1:-2])
+    args = []
+    for _ in range(count):
+        size = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+def _bulk(value):
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class _Store:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.data = {}  # key -> (value, expires_at or None)
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def run(self, args):
+        name = args[0].upper()
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"GET":
+            entry = self._live(args[1])
+            return _bulk(entry[0] if entry else None)
+        if name == b"MGET":
+            entries = [self._live(k) for k in args[1:]]
+            return b"*%d\r\n" % len(entries) + b"".join(_bulk(e[0] if e else None) for e in entries)
+        if name == b"SET":
+            key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+            expires = None
+            if b"PX" in options:
+                expires = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            if b"NX" in options and self._live(key) is not None:
+                return b"$-1\r\n"
+            self.data[key] = (value, expires)
+            return b"+OK\r\n"
+        if name == b"INCR":
+            entry = self._live(args[1])
+            count = int(entry[0]) + 1 if entry else 1
+            self.data[args[1]] = (b"%d" % count, entry[1] if entry else None)
+            return b":%d\r\n" % count
+        if name == b"PEXPIRE":
+            entry = self._live(args[1])
+            if entry is None:
+                return b":0\r\n"
+            self.data[args[1]] = (entry[0], time.monotonic() + int(args[2]) / 1000)
+            return b":1\r\n"
+        if name == b"DEL":
+            return b":%d\r\n" % sum(self.data.pop(k, None) is not None for k in args[1:])
+        if name == b"DBSIZE":
+            return b":%d\r\n" % len(self.data)
+        if name == b"FLUSHALL":
+            self.data = {}
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    break
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(self.run(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _serve(port: int, latency: float):
+    async def main():
+        server = await asyncio.start_server(_Store(latency).handle, "127.0.0.1", port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+    asyncio.run(main())
+
+
+class StubRespServer:
+    def __init__(self, latency: float = 0.0005):
+        self.latency = latency
+        self.port = None
+        self._process = None
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.port}/0"
+
+    def start(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self._process = multiprocessing.Process(target=_serve, args=(self.port, self.latency), daemon=True)
+        self._process.start()
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def stop(self):
+        self._process.terminate()
+        self._process.join(timeout=5)
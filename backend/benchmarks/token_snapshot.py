@@ -0,0 +1,132 @@
+"""Token page load: per-token read-only calls vs one /tokens/snapshot request.
+
+``--tokens`` tokens are stored in a fake Mongo and launched on a fake node.
+The old page load makes get-token-price / get-token-supply /
+get-reserve-balance / is-graduated calls per token; the new one is a single
+GET. The snapshot is checked against those direct reads, then pollers send
+If-None-Match while blocks are mined and one token trades. Last, with an
+indexer reporting trades, a refresh after one token trades re-reads only that
+token.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.token_snapshot --tokens 200
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import httpx
+
+import main
+from services.chain_service import ReadOnlyCache
+from services.mongo_service import MongoService
+from services.token_snapshot import TokenSnapshot
+from services.clarity import decode_hex, encode_arg
+from benchmarks.fake_mongo import FakeMongoClient
+from benchmarks.fake_node import FakeStacksNode
+
+FIELDS = {"get-token-price": "basePrice", "get-token-supply": "supply",
+          "get-reserve-balance": "reserveBalance", "is-graduated": "graduated"}
+
+
+async def per_token_load(node, symbols, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def read(symbol, function):
+        async with sem:
+            raw = await node.call_read_only("bonding-curve", function, (encode_arg({"type": "string-ascii", "value": symbol}),))
+            return symbol, function, decode_hex(raw)["ok"]
+
+    values = {}
+    for symbol, function, value in await asyncio.gather(*(read(s, f) for s in symbols for f in FIELDS)):
+        values.setdefault(symbol, {})[FIELDS[function]] = value
+    return values
+
+
+async def run(tokens, latency, polls):
+    symbols = [f"TK{i:04d}" for i in range(tokens)]
+    node = FakeStacksNode(symbols=symbols, latency=latency)
+    mongo = MongoService(client=FakeMongoClient(latency=0.002))
+    created = datetime.datetime(2024, 1, 1)
+    await mongo.insert_many("tokens", [{"symbol": s, "creator": "SP000", "createdAt": created, "status": "pending_launch"}
+                                       for s in symbols])
+    main.chain_cache = ReadOnlyCache(node, tip_ttl=0.05)
+    main.token_snapshot = snapshot = TokenSnapshot(mongo, main.chain_cache, interval=0.05)
+
+    node.calls = 0
+    start = time.perf_counter()
+    direct = await per_token_load(node, symbols, 20)
+    direct_s = time.perf_counter() - start
+    print(f"per-token calls: {node.calls} node calls, {direct_s * 1000:.0f}ms per page load")
+
+    node.calls = 0
+    start = time.perf_counter()
+    await snapshot.refresh()
+    print(f"snapshot rebuild: {node.calls} node calls, {(time.perf_counter() - start) * 1000:.0f}ms "
+          f"(once per interval, shared by every client)")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        start = time.perf_counter()
+        resp = await http.get("/tokens/snapshot", params={"limit": 500, "sort": "symbol", "order": "asc"})
+        resp.raise_for_status()
+        print(f"GET /tokens/snapshot ({len(resp.content):,} bytes): {(time.perf_counter() - start) * 1000:.1f}ms")
+        for row in resp.json()["tokens"]:
+            for field, value in direct[row["symbol"]].items():
+                assert row[field] == value, f"{row['symbol']} {field}: {row[field]} != {value}"
+        print(f"snapshot matches the direct reads for all {tokens} tokens")
+
+        await snapshot.start()
+        etag = resp.headers["ETag"]
+        not_modified, changed = 0, 0
+        start = time.perf_counter()
+        i = 0
+        # Keep polling past ``polls`` until the supply change shows up (a rebuild takes a while)
+        while i < polls or (not changed and time.perf_counter() - start < 10):
+            if i % (polls // 10) == 0:
+                node.mine()
+            if i == polls // 2:
+                node.curves[symbols[0]]["supply"] += 1
+            i += 1
+            r = await http.get("/tokens/snapshot", params={"limit": 500, "sort": "symbol", "order": "asc"},
+                               headers={"If-None-Match": etag})
+            if r.status_code == 304:
+                not_modified += 1
+            else:
+                changed += 1
+                etag = r.headers["ETag"]
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+        await snapshot.close()
+    print(f"{i} conditional polls: {i / elapsed:,.0f} req/s, {not_modified} x 304, {changed} x 200 "
+          f"({snapshot.refreshes} rebuilds, {snapshot.changes} content changes)")
+    assert changed >= 1, "the supply change never reached the snapshot"
+
+    indexed = TokenSnapshot(mongo, main.chain_cache, indexed=True)
+    await indexed.refresh()
+    node.mine()
+    node.curves[symbols[1]]["supply"] += 1
+    # As the indexer's on_block hook would; the cached tip may not be due for a poll yet
+    main.chain_cache.observe_block(node.block_height)
+    indexed.mark_changed([symbols[1]])
+    node.calls = 0
+    start = time.perf_counter()
+    assert await indexed.refresh()
+    row = next(r for r in indexed.rows if r["symbol"] == symbols[1])
+    assert row["supply"] == node.curves[symbols[1]]["supply"]
+    print(f"indexed refresh after one trade: {indexed.last_updated} token(s) updated, {node.calls} node calls, "
+          f"{(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake node response time in seconds")
+    parser.add_argument("--polls", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.tokens, args.latency, args.polls))
@@ -0,0 +1,87 @@
+"""Benchmark trade logging: inline insert_one vs the write-behind queue.
+
+Drives ``/buy-token`` in-process against the fake Mongo driver and reports
+request latency, DB round-trips and flush statistics.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.write_behind --requests 5000 --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+import httpx
+
+import main
+from services.mongo_service import MongoService
+from services.progress import ProgressEngine
+from services.write_behind import WriteBehindQueue
+from benchmarks.fake_mongo import FakeMongoClient
+
+
+class InlineWriter:
+    # The previous behaviour: one awaited insert per request
+    def __init__(self, mongo_service):
+        self.mongo_service = mongo_service
+
+    async def enqueue(self, collection, doc):
+        await self.mongo_service.db[collection].insert_one(doc)
+
+
+async def run(mode, requests, concurrency, latency):
+    client = FakeMongoClient(latency)
+    main.mongo_service = MongoService(client=client)
+    # Every logged trade also feeds quest progress, as it does after startup
+    main.progress_engine = ProgressEngine(main.mongo_service)
+    await main.progress_engine.start()
+    if mode == "inline":
+        main.write_behind = InlineWriter(main.mongo_service)
+    else:
+        main.write_behind = WriteBehindQueue(main.mongo_service)
+        await main.write_behind.start()
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(http, i):
+        async with sem:
+            start = time.perf_counter()
+            resp = await http.post("/buy-token", json={"symbol": "MOON", "amount": i, "trader": f"SP{i}"})
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(http, i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    await main.progress_engine.close()
+    if mode != "inline":
+        await main.write_behind.close()
+    latencies.sort()
+    stored = len(client.get_database().trades.docs)
+    print(f"{mode:>12}: {requests / elapsed:7.0f} req/s  p50={latencies[len(latencies) // 2] * 1000:6.2f}ms  "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:6.2f}ms  db round-trips={client.get_database().ops:5d}  "
+          f"stored={stored}")
+    if mode != "inline":
+        stats = main.write_behind.stats()
+        print(f"{'':>12}  batches={stats['batches']} avg flush={stats['avgFlushMs']:.2f}ms "
+              f"max flush={stats['maxFlushMs']:.2f}ms backpressure waits={stats['backpressureWaits']}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated DB round-trip in seconds")
+    args = parser.parse_args()
+    for mode in ("inline", "write-behind"):
+        asyncio.run(run(mode, args.requests, args.concurrency, args.latency))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,23 +1,68 @@
-from fastapi import FastAPI, HTTPException, Query, Body
+import time
+IMPORT_STARTED = time.perf_counter()  # for the import-to-ready time on /ready
+
+from fastapi import FastAPI, HTTPException, Query, Body, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from dotenv import load_dotenv
 import os
 from models.prompt_models import (
     PromptRequest, PromptResponse, RagQuestionRequest, RagAnswerResponse,
     ChatRequest, ChatResponse, ChatMessage, ActionResponse,
-    UserProfile, Achievement, Quest, Activity, UserXPRequest
+    UserProfile, Achievement, Quest, Activity, UserXPRequest, UserDashboard,
+    QuoteBatchRequest, RouteQuoteRequest, LeaderboardEntry, LeaderboardPage, ContractReadRequest,
+    OrderBookSnapshot, MatchPreview, CandleResponse, TokenSnapshotPage,
+    StakingPosition, RewardProjection, GovernanceTally
 )
 from services.gemini_service import GeminiService
 from services.rag_service import RagService
-from pymongo import MongoClient
+from services.mongo_service import MongoService
+from services.call_limiter import CallRejected
+from services.write_behind import WriteBehindQueue
+from services.leaderboard import Leaderboard
+from services.chain_service import StacksNodeClient, ReadOnlyCache, public_read
+from services.clarity import encode_arg, decode_hex
+from services.indexer import ContractIndexer, FileReplaySource
+from services.orderbook import OrderBooks
+from services.candles import CandleEngine
+from services.token_snapshot import TokenSnapshot, SORT_FIELDS
+from services.progress import ProgressEngine
+from services.staking import StakingModel
+from services.chat_sessions import ChatSessions, ConversationNotFound
+from services.metrics import metrics, MetricsMiddleware
+from services.readiness import Readiness, ReadinessGate
+from services.response_cache import ResponseCache, RespStore
+from services.bonding_curve import CurveState, QuoteEngine, CURVE_NAMES
+from services.liquidity_pool import PoolState, pool_contracts
+from services.router import CurveVenue, PoolVenue, RouteOptimizer
+import asyncio
+import contextlib
 import datetime
+import json
 from typing import List, Optional
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+# Mongo plus the state loaded from it must be up before requests are served
+readiness = Readiness(required=("mongo", "state"), started_at=IMPORT_STARTED)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Serve /ready right away and warm up behind the gate
+    readiness.warming = True
+    warm_up = asyncio.create_task(start_services())
+    yield
+    readiness.stopping = True
+    if not warm_up.done():
+        warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+    await stop_services()
+
+app = FastAPI(lifespan=lifespan)
 
+# Innermost, so its 503s still get CORS headers and are counted in /metrics
+app.add_middleware(ReadinessGate, readiness=readiness)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -25,34 +70,246 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so the latency includes CORS handling
+app.add_middleware(MetricsMiddleware)
 
-# MongoDB client
-mongodb_client = None
-mongo_db = None
+# MongoDB service (async driver, pooled)
+mongo_service = None
+# Trade/token logging is buffered and written in batches off the request path
+write_behind = None
+# XP ranking, rebuilt from users at startup and updated on XP writes
+leaderboard = Leaderboard()
+# Contract read-only state, cached per block; the node client is swappable
+# Profile payloads (and chain reads) cached in-process, and across workers when CACHE_URL is set
+response_cache = ResponseCache(RespStore(os.getenv("CACHE_URL")) if os.getenv("CACHE_URL") else None)
+chain_node = StacksNodeClient()
+chain_cache = ReadOnlyCache(chain_node, shared=response_cache if response_cache.l2 else None)
+# Contract event indexer; only runs when INDEXER_SOURCE points at a block feed
+indexer = None
+# Open marketplace orders, loaded from market_orders and kept current by the indexer
+order_books = OrderBooks()
+# 1m/5m/1h/1d candles in memory, seeded from stored 1m candles and fed by the indexer
+candle_engine = CandleEngine()
+# Quest/achievement counters fed by trade and launch events; created at startup
+progress_engine = None
+# Stakes, delegations and proposals replayed from indexed staking/governance events
+staking_model = StakingModel()
+# Chat conversations (rolling summary + recent messages); created at startup
+chat_sessions = None
+# All listed tokens with chain state, rebuilt in the background for /tokens/snapshot
+token_snapshot = None
 
 gemini_service = GeminiService()
 rag_service = RagService()
 
-@app.on_event("startup")
-async def startup_event():
-    global mongodb_client, mongo_db
-    mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-    mongodb_client = MongoClient(mongo_uri)
-    mongo_db = mongodb_client[os.getenv("MONGO_DB", "stackable")]  # default db name
+async def start_services():
+    """Warm Mongo (then load state from it), the RAG connection and the Gemini client in parallel."""
+    global mongo_service
+    mongo_service = MongoService()
+    warm_ups = [warm_core(), readiness.warm("rag", rag_service.warm_up())]
+    if response_cache.l2:
+        warm_ups.append(readiness.warm("cache", response_cache.warm_up()))
+    # GEMINI_WARM_UP=0 leaves the SDK unloaded until a request needs it (e.g. profile-only workers)
+    if os.getenv("GEMINI_WARM_UP", "1") == "1":
+        warm_ups.append(readiness.warm("gemini", gemini_service.warm_up()))
+    await asyncio.gather(*warm_ups)
+
+async def warm_core():
+    retry = float(os.getenv("MONGO_WARM_UP_RETRY", "2"))
+    # Mongo may still be coming up next to us; stay unready and keep trying
+    while not await readiness.warm("mongo", mongo_service.warm_up()):
+        await asyncio.sleep(retry)
     print("Connected to MongoDB")
+    # A failed load (e.g. Mongo dropping out mid-boot) would otherwise leave the worker unready for good
+    delay = retry
+    while not await readiness.warm("state", load_state()):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, float(os.getenv("STATE_LOAD_MAX_RETRY", "60")))
+
+async def load_state():
+    """Load in-memory state from Mongo and start the background services; safe to retry after a failure."""
+    global write_behind, indexer, token_snapshot, progress_engine, chat_sessions
+    if write_behind is None:
+        write_behind = WriteBehindQueue(mongo_service)
+        await write_behind.start()
+    since = int(datetime.datetime.utcnow().timestamp()) - candle_engine.max_rows * candle_engine.base_interval
+    # The loads are independent reads, so they run concurrently
+    users, orders, settings, candles, progress, governance = await asyncio.gather(
+        collect_user_xp(),
+        mongo_service.find_many("market_orders", {"status": "open"}),
+        mongo_service.find_many("market_settings", {}),
+        mongo_service.find_many(
+            "candles", {"interval": candle_engine.base_interval, "bucket": {"$gte": since}}, sort=[("bucket", 1)]),
+        mongo_service.find_many("user_progress", {}),
+        mongo_service.find_many("governance_events", {}, sort=[("seq", 1)]),
+    )
+    leaderboard.load(users)
+    print(f"Leaderboard loaded ({len(leaderboard)} users)")
+    order_books.load(orders)
+    order_books.sync_settings(settings, [])
+    print(f"Order books loaded ({len(order_books)} open orders)")
+    candle_engine.load(candles)
+    print(f"Candles loaded ({len(candle_engine.series)} symbols)")
+    if progress_engine is None:
+        progress_engine = ProgressEngine(mongo_service)
+        await progress_engine.start()
+    progress_engine.load(progress)
+    print(f"Quest progress loaded ({len(progress_engine.users)} users)")
+    staking_model.load(governance)
+    print(f"Staking model loaded ({staking_model.events} events)")
+    if chat_sessions is None:
+        chat_sessions = ChatSessions(mongo_service, summarize=gemini_service.summarize)
+        await chat_sessions.start()
+    if os.getenv("INDEXER_SOURCE") and indexer is None:
+        # Only published once started, so a failed start is retried from scratch
+        started = ContractIndexer(
+            mongo_service,
+            FileReplaySource(os.getenv("INDEXER_SOURCE"), follow=True),
+            on_block=chain_cache.observe_block,
+            on_orders=order_books.sync,
+            on_market_settings=order_books.sync_settings,
+            on_trades=on_indexed_trades,
+            on_activity=on_indexed_activity,
+            on_candles=candle_engine.replace_candles,
+            on_governance=staking_model.apply,
+            on_governance_rollback=staking_model.rollback,
+        )
+        await started.start()
+        indexer = started
+        print(f"Indexer started at block {indexer.tip}")
+    if token_snapshot is None:
+        token_snapshot = TokenSnapshot(mongo_service, chain_cache, candle_engine, indexed=indexer is not None)
+        await token_snapshot.start()
+
+async def collect_user_xp() -> list:
+    return [pair async for pair in mongo_service.iter_user_xp()]
+
+def on_indexed_trades(trades: list):
+    candle_engine.add_trades(trades)
+    if token_snapshot:
+        token_snapshot.mark_changed({t["symbol"] for t in trades})
+
+def on_indexed_activity(trades: list):
+    # Every confirmed trades doc, launches included, drives quest progress
+    progress_engine.observe(trades)
+    # Their stats and activity changed; the indexer hook is sync, so drop the entries in the background
+    traders = {t["trader"] for t in trades if t.get("trader")}
+    if traders:
+        asyncio.ensure_future(response_cache.invalidate(*(k for t in traders for k in user_cache_keys(t))))
+
+def service_metrics():
+    """The services' own counters as (name, type, help, labels, value) samples for /metrics."""
+    lookups = ("cache_lookups_total", "counter", "Cache lookups by result.")
+    ratio = ("cache_hit_ratio", "gauge", "Share of lookups served without a dependency call.")
+    intent = gemini_service.intent_cache
+    for result, value in (("fast_path", gemini_service.fast_path_hits), ("hit", intent.hits),
+                          ("near_hit", intent.near_hits), ("miss", intent.misses)):
+        yield (*lookups, {"cache": "intent", "result": result}, value)
+    for result, value in (("hit", chain_cache.hits), ("coalesced", chain_cache.coalesced), ("miss", chain_cache.misses)):
+        yield (*lookups, {"cache": "chain", "result": result}, value)
+    yield (*lookups, {"cache": "rag", "result": "coalesced"}, rag_service.coalesced)
+    for result, value in (("l1_hit", response_cache.l1_hits), ("l2_hit", response_cache.l2_hits),
+                          ("lock_wait", response_cache.lock_waits), ("coalesced", response_cache.coalesced),
+                          ("miss", response_cache.misses)):
+        yield (*lookups, {"cache": "response", "result": result}, value)
+    yield (*ratio, {"cache": "intent"}, intent.stats()["hitRatio"])
+    yield (*ratio, {"cache": "chain"}, chain_cache.stats()["hitRatio"])
+    yield (*ratio, {"cache": "response"}, response_cache.stats()["hitRatio"])
+    limiter = gemini_service.limiter
+    yield "gemini_queued_calls", "gauge", "Gemini calls waiting for a slot.", {}, limiter.queued
+    for event, value in (("rejected", limiter.rejected), ("timeout", limiter.timeouts), ("retry", limiter.retries)):
+        yield "gemini_limiter_events_total", "counter", "Gemini calls rejected, timed out or retried.", {"event": event}, value
+    if write_behind:
+        yield "write_behind_queue_depth", "gauge", "Docs waiting to be written.", {}, write_behind.stats()["queueDepth"]
+        yield "write_behind_failed_total", "counter", "Docs the write-behind queue failed to write.", {}, write_behind.failed
+    if chat_sessions:
+        yield "chat_compactions_total", "counter", "Conversation summaries folded.", {}, chat_sessions.compactions
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    global mongodb_client
-    if mongodb_client:
-        mongodb_client.close()
+metrics.add_collector(service_metrics)
+
+async def stop_services():
+    await rag_service.close()
+    await response_cache.close()
+    if token_snapshot:
+        await token_snapshot.close()
+    await chain_node.close()
+    if chat_sessions:
+        # Finish pending summaries while the model client is still up
+        await chat_sessions.close()
+    gemini_service.limiter.shutdown()
+    if indexer:
+        await indexer.close()
+    if progress_engine:
+        await progress_engine.close()
+    if write_behind:
+        # Flush buffered trades/tokens before the Mongo client goes away
+        await write_behind.close()
+        print(f"Write-behind flushed ({write_behind.written} docs written)")
+    if mongo_service:
+        await mongo_service.close()
         print("MongoDB connection closed")
 
+@app.exception_handler(CallRejected)
+async def call_rejected_handler(request, exc: CallRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Service busy: {exc.reason}"},
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
+
+@app.get("/ready")
+async def ready():
+    return JSONResponse(readiness.stats(), status_code=200 if readiness.ready else 503)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/traces")
+async def metrics_traces(limit: int = Query(20, ge=1, le=1000)):
+    return metrics.recent_traces(limit)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats()
+
+@app.get("/gemini/stats")
+async def gemini_stats():
+    return {"limiter": gemini_service.limiter.stats(), "intentCache": gemini_service.intent_cache.stats()}
+
+@app.get("/chat/stats")
+async def chat_stats():
+    return chat_sessions.stats()
+
+@app.get("/write-behind/stats")
+async def write_behind_stats():
+    return write_behind.stats()
+
+@app.get("/tokens/snapshot/stats")
+async def token_snapshot_stats():
+    return token_snapshot.stats()
+
+@app.get("/progress/stats")
+async def progress_stats():
+    return progress_engine.stats()
+
+@app.get("/staking/stats")
+async def staking_stats():
+    return staking_model.stats()
+
+@app.get("/indexer/stats")
+async def indexer_stats():
+    if indexer is None:
+        raise HTTPException(status_code=404, detail="Indexer is not enabled")
+    return indexer.stats()
+
 @app.post("/parse", response_model=PromptResponse)
 async def parse_prompt(prompt: PromptRequest):
     try:
         result = await gemini_service.extract_intent(prompt.prompt)
         return PromptResponse(intent=result.get("intent", "unknown"), entities=result.get("entities", {}), raw=result)
+    except CallRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gemini error: {e}")
 
@@ -64,38 +321,157 @@ async def ask_copilot(question: RagQuestionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG error: {e}")
 
+async def open_conversation(req: ChatRequest):
+    try:
+        return await chat_sessions.open(req.conversationId, [msg.dict() for msg in req.history])
+    except ConversationNotFound:
+        raise HTTPException(status_code=404, detail=f"Conversation {req.conversationId} not found")
+
+def chat_turn(session, user_message: str, assistant_reply: str) -> list:
+    chat_sessions.record(session, user_message, assistant_reply)
+    return [{"role": "user", "content": user_message}, {"role": "assistant", "content": assistant_reply}]
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(req: ChatRequest):
+    """
+    One turn of a server-side conversation. Omit ``conversationId`` to start
+    one (optionally seeded with ``history``); only this turn's messages are
+    returned.
+    """
+    session = await open_conversation(req)
     intent_result = await gemini_service.extract_intent(req.message)
     intent = intent_result.get("intent", "unknown")
     entities = intent_result.get("entities", {})
-    history = [msg.dict() for msg in req.history]
     user_message = req.message
-    updated_history = history + [{"role": "user", "content": user_message}]
+    window = chat_sessions.window(session, user_message)
+    prompt_tokens = chat_sessions.prompt_tokens(session, window, user_message)
     action = None
     if intent == "ask":
         rag_result = await rag_service.ask(user_message)
         assistant_reply = rag_result.get("answer", "No answer found.")
-        updated_history.append({"role": "assistant", "content": assistant_reply})
-        return ChatResponse(response=assistant_reply, history=updated_history, action=None)
     elif intent in {"buy", "sell", "launch"}:
         assistant_reply = f"Okay, running {intent} for {entities.get('token', '')}..."
         action = ActionResponse(type=intent, params=entities)
-        updated_history.append({"role": "assistant", "content": assistant_reply})
-        return ChatResponse(response=assistant_reply, history=updated_history, action=action)
     else:
-        assistant_reply = await gemini_service.chat(history, user_message)
-        updated_history.append({"role": "assistant", "content": assistant_reply})
-        return ChatResponse(response=assistant_reply, history=updated_history, action=None)
+        assistant_reply = await gemini_service.chat(window, user_message, session.summary)
+    messages = chat_turn(session, user_message, assistant_reply)
+    return ChatResponse(conversationId=session.id, response=assistant_reply, messages=messages,
+                        turn=session.turns, promptTokens=prompt_tokens, action=action)
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest):
+    """
+    Streaming variant of /chat as Server-Sent Events.
+
+    Events, in order:
+      session {"conversationId": "..."}        first, so a new conversation can be continued
+      action  {"type": ..., "params": {...}}   buy/sell/launch only, right after intent extraction
+      token   {"text": "..."}                  one per generated chunk
+      done    {"response": "..."}              full assistant reply
+      error   {"detail": "..."}                intent extraction or generation failed; ends the stream
+
+    The conversation is stored server-side once the reply is complete.
+    """
+    session = await open_conversation(req)
+    user_message = req.message
+
+    async def events():
+        yield sse_event("session", {"conversationId": session.id})
+        try:
+            intent_result = await gemini_service.extract_intent(user_message)
+            intent = intent_result.get("intent", "unknown")
+            entities = intent_result.get("entities", {})
+            if intent == "ask":
+                rag_result = await rag_service.ask(user_message)
+                assistant_reply = rag_result.get("answer", "No answer found.")
+                yield sse_event("token", {"text": assistant_reply})
+            elif intent in {"buy", "sell", "launch"}:
+                yield sse_event("action", ActionResponse(type=intent, params=entities).dict())
+                assistant_reply = f"Okay, running {intent} for {entities.get('token', '')}..."
+                yield sse_event("token", {"text": assistant_reply})
+            else:
+                chunks = []
+                window = chat_sessions.window(session, user_message)
+                async for text in gemini_service.chat_stream(window, user_message, session.summary):
+                    chunks.append(text)
+                    yield sse_event("token", {"text": text})
+                assistant_reply = "".join(chunks)
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+        chat_turn(session, user_message, assistant_reply)
+        yield sse_event("done", {"response": assistant_reply, "turn": session.turns})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # --- User Profile (web2) ---
-@app.get("/user/profile", response_model=UserProfile)
-async def get_user_profile(address: str = Query(...), xp: Optional[int] = Query(0)):
-    user = mongo_db.users.find_one({"address": address})
+DEFAULT_ACHIEVEMENTS = [
+    {"title": "First Launch", "description": "Created your first token", "icon": "🚀", "unlocked": False, "rarity": "Common"},
+    {"title": "Volume Milestone", "description": "Traded over 10M STX", "icon": "💰", "unlocked": False, "rarity": "Rare"},
+    {"title": "Hot Streak", "description": "5 winning trades in a row", "icon": "🔥", "unlocked": False, "rarity": "Epic"},
+    {"title": "Vibe Master", "description": "Launch 5 successful vibe tokens", "icon": "🎭", "unlocked": False, "rarity": "Legendary"},
+    {"title": "Diamond Hands", "description": "Hold position for 30 days", "icon": "💎", "unlocked": False, "rarity": "Mythic"},
+    {"title": "Whale Hunter", "description": "Single trade over 1M STX", "icon": "🐋", "unlocked": False, "rarity": "Legendary"}
+]
+
+DEFAULT_QUESTS = [
+    {"title": "Daily Trader", "description": "Make 5 trades today", "progress": 0, "total": 5, "reward": "50 XP", "timeLeft": "24h"},
+    {"title": "Token Creator", "description": "Launch 3 tokens this week", "progress": 0, "total": 3, "reward": "200 XP", "timeLeft": "7d"},
+    {"title": "Volume King", "description": "Trade 100 STX this month", "progress": 0, "total": 100, "reward": "500 XP", "timeLeft": "30d"},
+    {"title": "Social Butterfly", "description": "Share 3 tokens on social", "progress": 0, "total": 3, "reward": "100 XP", "timeLeft": "7d"}
+]
+
+DEFAULT_ACTIVITY = [
+    {"action": "Launched", "token": "$ROCKET", "amount": "1000 tokens", "time": "2 hours ago", "type": "launch"},
+    {"action": "Bought", "token": "$DOGE", "amount": "500 STX", "time": "5 hours ago", "type": "buy"},
+    {"action": "Sold", "token": "$PEPE", "amount": "1.2K tokens", "time": "1 day ago", "type": "sell"},
+    {"action": "Launched", "token": "$MOON", "amount": "2000 tokens", "time": "3 days ago", "type": "launch"},
+    {"action": "Bought", "token": "$CYBER", "amount": "250 STX", "time": "1 week ago", "type": "buy"}
+]
+
+def _public(doc):
+    return {k: v for k, v in doc.items() if k != "_id" and k != "address"}
+
+def _compact(n) -> str:
+    for div, suffix in ((1_000_000_000, "B"), (1_000_000, "M"), (1_000, "K")):
+        if n >= div:
+            return f"{n / div:.1f}".rstrip("0").rstrip(".") + suffix
+    return f"{n:.2f}".rstrip("0").rstrip(".")
+
+def _ago(timestamp: int) -> str:
+    seconds = max(0, int(datetime.datetime.utcnow().timestamp()) - timestamp)
+    for size, unit in ((604800, "week"), (86400, "day"), (3600, "hour"), (60, "minute")):
+        if seconds >= size:
+            n = seconds // size
+            return f"{n} {unit}{'s' if n > 1 else ''} ago"
+    return "just now"
+
+def apply_indexed_stats(user: dict, stats: Optional[dict]):
+    # Overlay trade counts from the chain indexer (user_stats) when present
+    if stats:
+        user["totalTrades"] = stats["trades"]
+        user["tokensTraded"] = len(stats["symbols"])
+        user["tokensCreated"] = stats["tokensCreated"]
+        user["totalVolume"] = f"{_compact(stats['volume'] / 1_000_000)} STX"
+    return user
+
+async def load_user(address: str, xp: int, save_xp: bool = False) -> dict:
+    user, stats = await asyncio.gather(
+        mongo_service.get_user(address),
+        mongo_service.find_doc("user_stats", {"_id": address}),
+    )
     if not user:
         user = {
             "address": address,
             "shortAddress": address[:6] + "..." + address[-4:],
+            "xp": xp,
             "level": calc_level(xp),
             "rank": 0,
             "badge": "Newbie",
@@ -109,39 +485,121 @@ async def get_user_profile(address: str = Query(...), xp: Optional[int] = Query(
             "totalTrades": 0,
             "totalVolume": "0 STX"
         }
-        mongo_db.users.insert_one(user)
+        await mongo_service.insert_user(user)
+        leaderboard.update(address, xp)
+    elif save_xp and user.get("xp") != xp:
+        await mongo_service.update_xp(address, xp)
+        leaderboard.update(address, xp)
+    user.update(live_profile_fields(address, xp))
+    return apply_indexed_stats(user, stats)
+
+def live_profile_fields(address: str, xp: int) -> dict:
+    # Derived from the query's xp and in-memory state; recomputed even on cache hits
+    return {
+        "level": calc_level(xp),
+        "nextLevelXP": calc_next_level_xp(xp),
+        "rank": leaderboard.rank(address) or 0,
+        "streak": progress_engine.streak(address),
+        "achievements": sum(progress_engine.achievements(address).values()),
+    }
+
+# --- Cached profile payloads ---
+# Validated once when loaded from Mongo, then served from the response cache as plain dicts
+def user_cache_keys(address: str) -> tuple:
+    return f"profile:{address}", f"activity:{address}"
+
+async def cached_profile(address: str, xp: int) -> dict:
+    async def load():
+        return UserProfile(**await load_user(address, xp)).model_dump()
+    return dict(await response_cache.get(f"profile:{address}", load), **live_profile_fields(address, xp))
+
+async def cached_activity(address: str) -> list:
+    async def load():
+        return [Activity(**_public(a)).model_dump() for a in await load_activity(address)]
+    return await response_cache.get(f"activity:{address}", load)
+
+def _left(seconds: int) -> str:
+    if seconds >= 2 * 86400:
+        return f"{seconds // 86400}d"
+    if seconds >= 3600:
+        return f"{seconds // 3600}h"
+    return f"{max(seconds, 0) // 60}m"
+
+def load_achievements(address: str) -> list:
+    # Unlocks are kept current by the progress engine; nothing to query
+    unlocked = progress_engine.achievements(address)
+    return [dict(a, unlocked=unlocked.get(a["title"], False)) for a in DEFAULT_ACHIEVEMENTS]
+
+def load_quests(address: str) -> list:
+    now = int(datetime.datetime.utcnow().timestamp())
+    progress = progress_engine.quests(address, now)
+    quests = []
+    for q in DEFAULT_QUESTS:
+        p = progress.get(q["title"])
+        if p:
+            q = dict(q, progress=p["progress"], total=p["total"], completed=p["completed"],
+                     timeLeft=_left(p["endsAt"] - now))
+        quests.append(q)
+    return quests
+
+INDEXED_ACTIONS = {"buy": "Bought", "sell": "Sold", "launch": "Launched", "graduate": "Graduated"}
+
+def indexed_activity(trade: dict) -> dict:
+    if trade["type"] == "buy":
+        amount = f"{_compact(trade['stx'] / 1_000_000)} STX"
     else:
-        user["level"] = calc_level(xp)
-        user["nextLevelXP"] = calc_next_level_xp(xp)
-    return UserProfile(**user)
+        amount = f"{_compact(trade['amount'])} tokens"
+    return {
+        "action": INDEXED_ACTIONS[trade["type"]],
+        "token": "$" + trade["symbol"],
+        "amount": amount,
+        "time": _ago(trade["timestamp"]),
+        "type": trade["type"],
+    }
+
+async def load_activity(address: str) -> list:
+    trades = await mongo_service.find_many(
+        "trades", {"source": "chain", "trader": address}, sort=[("seq", -1)], limit=20)
+    if trades:
+        return [indexed_activity(t) for t in trades]
+    acts = await mongo_service.get_activity(address)
+    if not acts:
+        acts = [dict(a, address=address) for a in DEFAULT_ACTIVITY]
+        await mongo_service.insert_activity(acts)
+    return acts
+
+@app.get("/user/profile", response_model=UserProfile)
+async def get_user_profile(address: str = Query(...), xp: Optional[int] = Query(0)):
+    return JSONResponse(await cached_profile(address, xp))
 
 @app.post("/user/profile", response_model=UserProfile)
 async def post_user_profile(req: UserXPRequest = Body(...)):
-    address = req.address
-    xp = req.xp
-    user = mongo_db.users.find_one({"address": address})
-    if not user:
-        user = {
-            "address": address,
-            "shortAddress": address[:6] + "..." + address[-4:],
-            "level": calc_level(xp),
-            "rank": 0,
-            "badge": "Newbie",
-            "joinDate": datetime.datetime.utcnow().strftime("%B %Y"),
-            "nextLevelXP": calc_next_level_xp(xp),
-            "tokensCreated": 0,
-            "tokensTraded": 0,
-            "winRate": "0%",
-            "streak": 0,
-            "achievements": 0,
-            "totalTrades": 0,
-            "totalVolume": "0 STX"
-        }
-        mongo_db.users.insert_one(user)
-    else:
-        user["level"] = calc_level(xp)
-        user["nextLevelXP"] = calc_next_level_xp(xp)
-    return UserProfile(**user)
+    # POST is the XP write path; GET only uses xp for display
+    profile = UserProfile(**await load_user(req.address, req.xp, save_xp=True))
+    await response_cache.put(f"profile:{req.address}", profile.model_dump())
+    return profile
+
+# --- Leaderboard ---
+@app.get("/leaderboard", response_model=LeaderboardPage)
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    address: Optional[str] = Query(None),
+):
+    entries = [leaderboard_entry(rank, addr, xp) for rank, addr, xp in leaderboard.top(limit, offset)]
+    user = None
+    if address and leaderboard.xp(address) is not None:
+        user = leaderboard_entry(leaderboard.rank(address), address, leaderboard.xp(address))
+    return LeaderboardPage(total=len(leaderboard), entries=entries, user=user)
+
+def leaderboard_entry(rank: int, address: str, xp: int) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        rank=rank,
+        address=address,
+        shortAddress=address[:6] + "..." + address[-4:],
+        xp=xp,
+        level=calc_level(xp),
+    )
 
 def calc_level(xp):
     return max(1, xp // 250 + 1)
@@ -152,133 +610,51 @@ def calc_next_level_xp(xp):
 # --- Achievements (web2) ---
 @app.get("/user/achievements", response_model=List[Achievement])
 async def get_user_achievements(address: str = Query(...), xp: Optional[int] = Query(0)):
-    achs = list(mongo_db.achievements.find({"address": address}))
-    if not achs:
-        achs = [
-            {"title": "First Launch", "description": "Created your first token", "icon": "🚀", "unlocked": False, "rarity": "Common"},
-            {"title": "Volume Milestone", "description": "Traded over 10M STX", "icon": "💰", "unlocked": False, "rarity": "Rare"},
-            {"title": "Hot Streak", "description": "5 winning trades in a row", "icon": "🔥", "unlocked": False, "rarity": "Epic"},
-            {"title": "Vibe Master", "description": "Launch 5 successful vibe tokens", "icon": "🎭", "unlocked": False, "rarity": "Legendary"},
-            {"title": "Diamond Hands", "description": "Hold position for 30 days", "icon": "💎", "unlocked": False, "rarity": "Mythic"},
-            {"title": "Whale Hunter", "description": "Single trade over 1M STX", "icon": "🐋", "unlocked": False, "rarity": "Legendary"}
-        ]
-        for a in achs:
-            a["address"] = address
-        mongo_db.achievements.insert_many(achs)
-    for a in achs:
-        if a["title"] == "First Launch":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "tokensCreated": {"$gte": 1}}) is not None
-        if a["title"] == "Volume Milestone":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "totalVolume": {"$regex": r"[1-9][0-9]*M"}}) is not None
-        if a["title"] == "Hot Streak":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "streak": {"$gte": 5}}) is not None
-        if a["title"] == "Vibe Master":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "tokensCreated": {"$gte": 5}}) is not None
-        if a["title"] == "Diamond Hands":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "holdDays": {"$gte": 30}}) is not None
-        if a["title"] == "Whale Hunter":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "largestTrade": {"$regex": r"[1-9][0-9]*M"}}) is not None
-    return [Achievement(**{k: v for k, v in a.items() if k != "_id" and k != "address"}) for a in achs]
+    return [Achievement(**_public(a)) for a in load_achievements(address)]
 
 @app.post("/user/achievements", response_model=List[Achievement])
 async def post_user_achievements(req: UserXPRequest = Body(...)):
-    address = req.address
-    xp = req.xp
-    achs = list(mongo_db.achievements.find({"address": address}))
-    if not achs:
-        achs = [
-            {"title": "First Launch", "description": "Created your first token", "icon": "🚀", "unlocked": False, "rarity": "Common"},
-            {"title": "Volume Milestone", "description": "Traded over 10M STX", "icon": "💰", "unlocked": False, "rarity": "Rare"},
-            {"title": "Hot Streak", "description": "5 winning trades in a row", "icon": "🔥", "unlocked": False, "rarity": "Epic"},
-            {"title": "Vibe Master", "description": "Launch 5 successful vibe tokens", "icon": "🎭", "unlocked": False, "rarity": "Legendary"},
-            {"title": "Diamond Hands", "description": "Hold position for 30 days", "icon": "💎", "unlocked": False, "rarity": "Mythic"},
-            {"title": "Whale Hunter", "description": "Single trade over 1M STX", "icon": "🐋", "unlocked": False, "rarity": "Legendary"}
-        ]
-        for a in achs:
-            a["address"] = address
-        mongo_db.achievements.insert_many(achs)
-    for a in achs:
-        if a["title"] == "First Launch":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "tokensCreated": {"$gte": 1}}) is not None
-        if a["title"] == "Volume Milestone":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "totalVolume": {"$regex": r"[1-9][0-9]*M"}}) is not None
-        if a["title"] == "Hot Streak":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "streak": {"$gte": 5}}) is not None
-        if a["title"] == "Vibe Master":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "tokensCreated": {"$gte": 5}}) is not None
-        if a["title"] == "Diamond Hands":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "holdDays": {"$gte": 30}}) is not None
-        if a["title"] == "Whale Hunter":
-            a["unlocked"] = mongo_db.users.find_one({"address": address, "largestTrade": {"$regex": r"[1-9][0-9]*M"}}) is not None
-    return [Achievement(**{k: v for k, v in a.items() if k != "_id" and k != "address"}) for a in achs]
+    return [Achievement(**_public(a)) for a in load_achievements(req.address)]
 
 # --- Quests (web2) ---
 @app.get("/user/quests", response_model=List[Quest])
 async def get_user_quests(address: str = Query(...), xp: Optional[int] = Query(0)):
-    quests = list(mongo_db.quests.find({"address": address}))
-    if not quests:
-        quests = [
-            {"title": "Daily Trader", "description": "Make 5 trades today", "progress": 0, "total": 5, "reward": "50 XP", "timeLeft": "24h"},
-            {"title": "Token Creator", "description": "Launch 3 tokens this week", "progress": 0, "total": 3, "reward": "200 XP", "timeLeft": "7d"},
-            {"title": "Volume King", "description": "Trade 100 STX this month", "progress": 0, "total": 100, "reward": "500 XP", "timeLeft": "30d"},
-            {"title": "Social Butterfly", "description": "Share 3 tokens on social", "progress": 0, "total": 3, "reward": "100 XP", "timeLeft": "7d"}
-        ]
-        for q in quests:
-            q["address"] = address
-        mongo_db.quests.insert_many(quests)
-    return [Quest(**{k: v for k, v in q.items() if k != "_id" and k != "address"}) for q in quests]
+    return [Quest(**_public(q)) for q in load_quests(address)]
 
 @app.post("/user/quests", response_model=List[Quest])
 async def post_user_quests(req: UserXPRequest = Body(...)):
-    address = req.address
-    xp = req.xp
-    quests = list(mongo_db.quests.find({"address": address}))
-    if not quests:
-        quests = [
-            {"title": "Daily Trader", "description": "Make 5 trades today", "progress": 0, "total": 5, "reward": "50 XP", "timeLeft": "24h"},
-            {"title": "Token Creator", "description": "Launch 3 tokens this week", "progress": 0, "total": 3, "reward": "200 XP", "timeLeft": "7d"},
-            {"title": "Volume King", "description": "Trade 100 STX this month", "progress": 0, "total": 100, "reward": "500 XP", "timeLeft": "30d"},
-            {"title": "Social Butterfly", "description": "Share 3 tokens on social", "progress": 0, "total": 3, "reward": "100 XP", "timeLeft": "7d"}
-        ]
-        for q in quests:
-            q["address"] = address
-        mongo_db.quests.insert_many(quests)
-    return [Quest(**{k: v for k, v in q.items() if k != "_id" and k != "address"}) for q in quests]
+    return [Quest(**_public(q)) for q in load_quests(req.address)]
 
 # --- Activity (web2) ---
 @app.get("/user/activity", response_model=List[Activity])
 async def get_user_activity(address: str = Query(...), xp: Optional[int] = Query(0)):
-    acts = list(mongo_db.activity.find({"address": address}))
-    if not acts:
-        acts = [
-            {"action": "Launched", "token": "$ROCKET", "amount": "1000 tokens", "time": "2 hours ago", "type": "launch"},
-            {"action": "Bought", "token": "$DOGE", "amount": "500 STX", "time": "5 hours ago", "type": "buy"},
-            {"action": "Sold", "token": "$PEPE", "amount": "1.2K tokens", "time": "1 day ago", "type": "sell"},
-            {"action": "Launched", "token": "$MOON", "amount": "2000 tokens", "time": "3 days ago", "type": "launch"},
-            {"action": "Bought", "token": "$CYBER", "amount": "250 STX", "time": "1 week ago", "type": "buy"}
-        ]
-        for a in acts:
-            a["address"] = address
-        mongo_db.activity.insert_many(acts)
-    return [Activity(**{k: v for k, v in a.items() if k != "_id" and k != "address"}) for a in acts]
+    return JSONResponse(await cached_activity(address))
 
 @app.post("/user/activity", response_model=List[Activity])
 async def post_user_activity(req: UserXPRequest = Body(...)):
-    address = req.address
-    xp = req.xp
-    acts = list(mongo_db.activity.find({"address": address}))
-    if not acts:
-        acts = [
-            {"action": "Launched", "token": "$ROCKET", "amount": "1000 tokens", "time": "2 hours ago", "type": "launch"},
-            {"action": "Bought", "token": "$DOGE", "amount": "500 STX", "time": "5 hours ago", "type": "buy"},
-            {"action": "Sold", "token": "$PEPE", "amount": "1.2K tokens", "time": "1 day ago", "type": "sell"},
-            {"action": "Launched", "token": "$MOON", "amount": "2000 tokens", "time": "3 days ago", "type": "launch"},
-            {"action": "Bought", "token": "$CYBER", "amount": "250 STX", "time": "1 week ago", "type": "buy"}
-        ]
-        for a in acts:
-            a["address"] = address
-        mongo_db.activity.insert_many(acts)
-    return [Activity(**{k: v for k, v in a.items() if k != "_id" and k != "address"}) for a in acts]
+    return JSONResponse(await cached_activity(req.address))
+
+# --- Dashboard (profile page in one request) ---
+@app.get("/user/dashboard", response_model=UserDashboard)
+async def get_user_dashboard(address: str = Query(...), xp: Optional[int] = Query(0)):
+    # Profile and activity come from the response cache (in parallel on a miss);
+    # quests and achievements from the progress engine's memory.
+    profile, acts = await asyncio.gather(cached_profile(address, xp), cached_activity(address))
+    return JSONResponse({
+        "profile": profile,
+        "achievements": [Achievement(**_public(a)).model_dump() for a in load_achievements(address)],
+        "quests": [Quest(**_public(q)).model_dump() for q in load_quests(address)],
+        "activity": acts,
+    })
+
+async def track_logged_event(event: dict):
+    trader = event.get("trader")
+    if trader in (None, "unknown"):
+        return
+    # With the indexer running, confirmed chain events (launches included) drive progress instead
+    if indexer is None:
+        progress_engine.observe_event(event)
+    await response_cache.invalidate(*user_cache_keys(trader))
 
 @app.post("/launch-token")
 async def launch_token(data: dict):
@@ -304,7 +680,7 @@ async def launch_token(data: dict):
     graduation_threshold = data.get("graduationThreshold", 1000000)
     max_supply = data.get("maxSupply", 100000000)
 
-    # Store in MongoDB for tracking
+    # Store in MongoDB for tracking (buffered; flushed in insert_many batches)
     token_data = {
         "symbol": symbol,
         "basePrice": base_price,
@@ -316,7 +692,9 @@ async def launch_token(data: dict):
         "createdAt": datetime.datetime.utcnow(),
         "status": "pending_launch"
     }
-    mongo_db.tokens.insert_one(token_data)
+    await write_behind.enqueue("tokens", token_data)
+    await track_logged_event({"trader": token_data["creator"], "type": "launch", "symbol": symbol,
+                        "timestamp": token_data["createdAt"]})
 
     return {
         "status": "ready_to_launch",
@@ -334,7 +712,7 @@ async def launch_token(data: dict):
         },
         "details": {
             "symbol": symbol,
-            "curve": ["Linear", "Exponential", "Logarithmic", "Sigmoid"][curve_type],
+            "curve": CURVE_NAMES[curve_type],
             "initialPrice": f"{base_price / 1000000} STX",
             "graduation": f"{graduation_threshold / 1000000} STX reserve"
         }
@@ -356,7 +734,7 @@ async def buy_token(data: dict):
     amount = data.get("amount", 100)
     max_slippage = data.get("maxSlippage", 500)  # 5% default
 
-    # Log trade in MongoDB
+    # Log trade in MongoDB (buffered; flushed in insert_many batches)
     trade_data = {
         "symbol": symbol,
         "type": "buy",
@@ -364,7 +742,8 @@ async def buy_token(data: dict):
         "trader": data.get("trader", "unknown"),
         "timestamp": datetime.datetime.utcnow()
     }
-    mongo_db.trades.insert_one(trade_data)
+    await write_behind.enqueue("trades", trade_data)
+    await track_logged_event(dict(trade_data, stx=data.get("stx", 0)))
 
     return {
         "status": "ready_to_buy",
@@ -395,7 +774,7 @@ async def sell_token(data: dict):
     amount = data.get("amount", 100)
     min_received = data.get("minReceived", 0)
 
-    # Log trade in MongoDB
+    # Log trade in MongoDB (buffered; flushed in insert_many batches)
     trade_data = {
         "symbol": symbol,
         "type": "sell",
@@ -403,7 +782,8 @@ async def sell_token(data: dict):
         "trader": data.get("trader", "unknown"),
         "timestamp": datetime.datetime.utcnow()
     }
-    mongo_db.trades.insert_one(trade_data)
+    await write_behind.enqueue("trades", trade_data)
+    await track_logged_event(dict(trade_data, stx=data.get("stx", 0)))
 
     return {
         "status": "ready_to_sell",
@@ -418,4 +798,238 @@ async def sell_token(data: dict):
         }
     }
 
+# Largest batch /quote/batch prices in one request (pairs, and curves supplied)
+QUOTE_BATCH_MAX = int(os.getenv("QUOTE_BATCH_MAX", "10000"))
+
+@app.post("/quote/batch")
+async def quote_batch(req: QuoteBatchRequest):
+    """
+    Price many (symbol, amount) pairs against the bonding-curve formulas in one call.
+
+    Results match calculate-buy-price / calculate-sell-price exactly for the
+    curve state supplied; "valid" is false where the contract would abort.
+    """
+    if req.side not in ("buy", "sell"):
+        raise HTTPException(status_code=400, detail="side must be 'buy' or 'sell'")
+    if len(req.symbols) != len(req.amounts):
+        raise HTTPException(status_code=400, detail="symbols and amounts must have the same length")
+    if max(len(req.symbols), len(req.curves)) > QUOTE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {QUOTE_BATCH_MAX} quotes per request")
+    try:
+        engine = QuoteEngine({s: CurveState.from_clarity(s, info) for s, info in req.curves.items()})
+        result = engine.quote(req.symbols, req.amounts, req.side)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid quote request: {e}")
+    columns = {k: v.tolist() for k, v in result.items()}
+    quotes = []
+    for i, symbol in enumerate(req.symbols):
+        row = {k: col[i] for k, col in columns.items()}
+        if not row["valid"]:
+            # The contract would abort; don't report the meaningless intermediate values
+            row = {"amount": row["amount"], "valid": False}
+        quotes.append({"symbol": symbol, **row})
+    return {"side": req.side, "quotes": quotes}
+
+async def load_route_venues(req: RouteQuoteRequest) -> list:
+    """Venues for ``req``: supplied curve/pool state, or read through the per-block cache."""
+    symbol_arg = (encode_arg({"type": "string-ascii", "value": req.symbol}),)
+    curve = None
+    if req.curve is not None:
+        curve = CurveState.from_clarity(req.symbol, req.curve, req.curve if "max-supply" in req.curve else None)
+    else:
+        info = await chain_cache.read("bonding-curve", "get-curve-info", symbol_arg)
+        if info is not None:
+            params = await chain_cache.read("bonding-curve", "get-curve-parameters", symbol_arg)
+            curve = CurveState.from_clarity(req.symbol, info, params)
+    if req.pools is not None:
+        pools = [PoolState(p.name, p.reserveStx, p.reserveToken, p.tradingFee) for p in req.pools]
+    else:
+        pools = [PoolState.from_clarity(name, await chain_cache.read(name, "get-reserves"))
+                 for name in pool_contracts().get(req.symbol, [])]
+    venues = [PoolVenue(p, req.side) for p in pools]
+    if curve is not None:
+        venues.insert(0, CurveVenue(curve, req.side))
+    return venues
+
+@app.post("/quote/route")
+async def quote_route(req: RouteQuoteRequest):
+    """
+    Best split of a trade between the bonding curve and the token's liquidity
+    pools, with the contract call for each leg. A buy spends ``amount``
+    micro-STX, a sell spends ``amount`` tokens. ``sizes`` adds a price-impact
+    curve (best single venue per size) so the frontend can size a trade
+    without probing the chain.
+    """
+    if req.side not in ("buy", "sell"):
+        raise HTTPException(status_code=400, detail="side must be 'buy' or 'sell'")
+    if req.amount <= 0 or any(s <= 0 for s in req.sizes) or len(req.sizes) > 1000:
+        raise HTTPException(status_code=400, detail="amount and sizes must be positive (at most 1000 sizes)")
+    if not 0 <= req.maxSlippage <= 10000:
+        raise HTTPException(status_code=400, detail="maxSlippage must be between 0 and 10000")
+    try:
+        venues = await load_route_venues(req)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid venue state: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Stacks node error: {e}")
+    optimizer = RouteOptimizer(venues)
+    if not optimizer.venues:
+        raise HTTPException(status_code=404, detail=f"No open bonding curve or liquidity pool for {req.symbol}")
+    route = optimizer.route(req.amount, req.symbol, req.maxSlippage)
+    result = {"symbol": req.symbol, "side": req.side, **route}
+    if req.sizes:
+        result["impact"] = optimizer.impact_curve(req.sizes)
+    return result
+
+# --- Contract read-only state (per-block cache) ---
+@app.post("/contract/read")
+async def contract_read(req: ContractReadRequest):
+    """
+    Serve a contract read-only call from the per-block cache.
+
+    Example: {"contract": "bonding-curve", "function": "get-token-supply",
+              "args": [{"type": "string-ascii", "value": "MOON"}]}
+    """
+    pools = {c for names in pool_contracts().values() for c in names}
+    if not public_read(req.contract, req.function, pools):
+        raise HTTPException(status_code=403, detail=f"{req.contract}.{req.function} is not a public read")
+    try:
+        args = tuple(encode_arg(a) for a in req.args)
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid argument: {e}")
+    try:
+        result = await chain_cache.call(req.contract, req.function, args)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Stacks node error: {e}")
+    return {
+        "contract": req.contract,
+        "function": req.function,
+        "blockHeight": result["blockHeight"],
+        "cached": result["cached"],
+        "hex": result["result"],
+        "value": decode_hex(result["result"]),
+    }
+
+@app.get("/contract/stats")
+async def contract_cache_stats():
+    return chain_cache.stats()
+
+# --- Marketplace order book (mirror of marketplace.clar) ---
+@app.get("/orderbook/{symbol}", response_model=OrderBookSnapshot)
+async def get_order_book(symbol: str, depth: int = Query(10, ge=1, le=100)):
+    return OrderBookSnapshot(**order_books.snapshot(symbol, depth))
+
+@app.get("/orderbook/{symbol}/match-preview", response_model=MatchPreview)
+async def order_book_match_preview(
+    symbol: str,
+    side: str = Query(..., pattern="^(buy|sell)$"),
+    amount: int = Query(..., gt=0),
+    limitPrice: Optional[int] = Query(None, gt=0),
+    taker: Optional[str] = Query(None),
+    maxFills: int = Query(100, ge=1, le=1000),
+):
+    """
+    The fill-order calls a taker would make to buy or sell ``amount`` now,
+    best price first. ``taker`` skips the caller's own orders.
+    """
+    return MatchPreview(**order_books.match_preview(symbol, side, amount, limitPrice, taker, maxFills))
+
+# --- Candles ---
+@app.get("/candles/{symbol}", response_model=CandleResponse)
+async def get_candles(
+    symbol: str,
+    res: str = Query("1m"),
+    from_: Optional[int] = Query(None, alias="from"),
+    to: Optional[int] = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    """
+    OHLCV candles for ``symbol`` at resolution ``res`` (1m, 5m, 1h, 1d) with
+    bucket start in [from, to] (unix seconds), oldest first. Returns at most
+    ``limit`` candles, the most recent ones.
+    """
+    if res not in candle_engine.resolutions:
+        raise HTTPException(status_code=400, detail=f"Unsupported resolution: {res}")
+    return CandleResponse(symbol=symbol, res=res, candles=candle_engine.candles(symbol, res, from_, to, limit))
+
+# --- Token list (marketplace / token pages) ---
+@app.get("/tokens/snapshot", response_model=TokenSnapshotPage)
+async def get_token_snapshot(
+    response: Response,
+    sort: str = Query("volume"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Every listed token's base price, next-token cost, supply, reserve,
+    graduation status and 24h volume in one response, from a snapshot
+    updated every few seconds. ``sort`` is one of volume, price (by
+    nextTokenCost), supply, reserve, symbol. Send the
+    returned ETag as If-None-Match to get a 304 while nothing changed.
+    """
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort: {sort}")
+    if token_snapshot is None or not token_snapshot.ready:
+        raise HTTPException(status_code=503, detail="Token snapshot is not ready yet")
+    etag = token_snapshot.page_etag(sort, order, offset, limit)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return token_snapshot.page(sort, order, offset, limit)
+
+# --- Staking and governance ---
+async def staking_height(at: Optional[int]) -> int:
+    """``at``, or the chain tip; refreshes the reward rate, which has no event."""
+    try:
+        staking_model.reward_rate = int((await chain_cache.read("staking-pool", "get-reward-rate"))["ok"])
+        tip = chain_cache.block_height or 0
+    except Exception as e:
+        print(f"Reward rate read failed, using {staking_model.reward_rate}: {e}")
+        tip = 0
+    height = max(tip, staking_model.height)
+    if at is None:
+        return height
+    if at < staking_model.height:
+        raise HTTPException(status_code=400, detail=f"at must be >= the indexed height {staking_model.height}")
+    return at
+
+@app.get("/staking/rewards/projection", response_model=List[RewardProjection])
+async def staking_rewards_projection(heights: List[int] = Query(...)):
+    """Pending rewards owed to all stakers together at each block height."""
+    if min(heights) < staking_model.height:
+        raise HTTPException(status_code=400, detail=f"heights must be >= the indexed height {staking_model.height}")
+    await staking_height(None)
+    return staking_model.rewards_projection(heights[:1000])
+
+@app.get("/staking/{address}", response_model=StakingPosition)
+async def get_staking_position(
+    address: str,
+    at: Optional[int] = Query(None),
+    heights: List[int] = Query([]),
+):
+    """
+    Stake, pending rewards and delegated voting power of ``address`` at block
+    ``at`` (default: the chain tip), plus pending rewards at each of
+    ``heights`` if nothing changes before then.
+    """
+    at = await staking_height(at)
+    if heights and min(heights) < staking_model.height:
+        raise HTTPException(status_code=400, detail=f"heights must be >= the indexed height {staking_model.height}")
+    return staking_model.position(address, at, heights[:1000])
+
+@app.get("/governance/{proposal}/tally", response_model=GovernanceTally)
+async def get_governance_tally(proposal: int, at: Optional[int] = Query(None)):
+    """
+    Recorded and projected vote totals for ``proposal``, and its state as
+    get-proposal-state would report it at block ``at`` (default: the chain tip).
+    """
+    at = await staking_height(at)
+    tally = staking_model.tally(proposal, at)
+    if tally is None:
+        raise HTTPException(status_code=404, detail=f"Proposal {proposal} not found")
+    return tally
+
 # Add more endpoints and service integrations as needed 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Any
 
 class PromptRequest(BaseModel):
     prompt: str
@@ -25,12 +25,16 @@ class ActionResponse(BaseModel):
     params: Dict
 
 class ChatRequest(BaseModel):
-    history: List[ChatMessage]
     message: str
+    conversationId: Optional[str] = None  # omit to start a new conversation
+    history: List[ChatMessage] = []  # seeds a new conversation; ignored with conversationId
 
 class ChatResponse(BaseModel):
+    conversationId: str
     response: str
-    history: List[ChatMessage]
+    messages: List[ChatMessage]  # only this turn's messages; the server keeps the rest
+    turn: int
+    promptTokens: int  # estimated size of the prompt context for this turn
     action: Optional[ActionResponse] = None
 
 # User profile, achievements, quests, activity
@@ -64,6 +68,7 @@ class Quest(BaseModel):
     total: int
     reward: str
     timeLeft: str
+    completed: bool = False
 
 class Activity(BaseModel):
     action: str
@@ -72,7 +77,179 @@ class Activity(BaseModel):
     time: str
     type: str
 
+class LeaderboardEntry(BaseModel):
+    rank: int
+    address: str
+    shortAddress: str
+    xp: int
+    level: int
+
+class LeaderboardPage(BaseModel):
+    total: int
+    entries: List[LeaderboardEntry]
+    user: Optional[LeaderboardEntry] = None
+
 # For POST endpoints
 class UserXPRequest(BaseModel):
     address: str
-    xp: int = 0 
\ No newline at end of file
+    xp: int = 0 
+
+# Aggregated profile page payload
+class UserDashboard(BaseModel):
+    profile: UserProfile
+    achievements: List[Achievement]
+    quests: List[Quest]
+    activity: List[Activity]
+
+# Bonding-curve quotes
+class QuoteBatchRequest(BaseModel):
+    curves: Dict[str, dict]  # symbol -> get-curve-info tuple (hyphenated keys)
+    symbols: List[str]
+    amounts: List[int]
+    side: str = "buy"
+
+# Trade routing across the bonding curve and liquidity pools
+class PoolQuoteState(BaseModel):
+    name: str = "liquidity-pool"  # pool contract name
+    reserveStx: int
+    reserveToken: int
+    tradingFee: int = 30  # basis points
+
+class RouteQuoteRequest(BaseModel):
+    symbol: str
+    side: str = "buy"  # buy: amount is micro-STX in; sell: amount is tokens in
+    amount: int
+    curve: Optional[Dict[str, Any]] = None  # get-curve-info tuple (+ "max-supply"); read from chain if omitted
+    pools: Optional[List[PoolQuoteState]] = None  # read from LIQUIDITY_POOLS contracts if omitted
+    sizes: List[int] = []  # extra sizes for the price-impact curve
+    maxSlippage: int = 50  # basis points, for the min-out arguments
+
+# Contract read-only calls
+class ContractReadRequest(BaseModel):
+    contract: str
+    function: str
+    args: List[Any] = []  # "0x.." serialized values or {"type": "uint", "value": 1}
+
+# Marketplace order book
+class OrderBookLevel(BaseModel):
+    price: int
+    amount: int
+    orders: int
+
+class OrderBookSnapshot(BaseModel):
+    symbol: str
+    bestBid: Optional[int] = None
+    bestAsk: Optional[int] = None
+    spread: Optional[int] = None
+    bids: List[OrderBookLevel]
+    asks: List[OrderBookLevel]
+
+class MatchFill(BaseModel):
+    orderId: int
+    price: int
+    amount: int
+    fee: int
+    status: str  # "filled" or "partial"
+
+class MatchPreview(BaseModel):
+    symbol: str
+    side: str
+    requested: int
+    filled: int
+    unfilled: int
+    cost: int
+    fees: int
+    averagePrice: float
+    worstPrice: Optional[int] = None
+    paused: bool
+    fills: List[MatchFill]
+
+# OHLCV candles
+class Candle(BaseModel):
+    time: int  # bucket start, unix seconds
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    stxVolume: float
+    trades: int
+
+class CandleResponse(BaseModel):
+    symbol: str
+    res: str
+    candles: List[Candle]
+
+# Token list snapshot (marketplace / token pages)
+class TokenSnapshotRow(BaseModel):
+    symbol: str
+    creator: Optional[str] = None
+    createdAt: Optional[str] = None
+    status: str  # "trading", "graduated" or the stored launch status
+    curveType: Optional[str] = None
+    basePrice: Optional[int] = None  # what get-token-price returns
+    nextTokenCost: Optional[int] = None  # micro-STX to buy one token now, before fee (calculate-buy-price for 1)
+    supply: Optional[int] = None
+    reserveBalance: Optional[int] = None
+    graduated: Optional[bool] = None
+    graduationThreshold: Optional[int] = None
+    maxSupply: Optional[int] = None
+    volume24h: float
+    stxVolume24h: float
+    trades24h: int
+
+class TokenSnapshotPage(BaseModel):
+    blockHeight: Optional[int] = None
+    updatedAt: Optional[str] = None
+    total: int
+    offset: int
+    limit: int
+    sort: str
+    order: str
+    tokens: List[TokenSnapshotRow]
+
+# Staking and governance (model of staking-pool.clar / governance.clar)
+class RewardProjection(BaseModel):
+    blockHeight: int
+    pendingRewards: int  # micro-STX
+    stakers: Optional[int] = None
+
+class StakingPosition(BaseModel):
+    address: str
+    blockHeight: int
+    staked: int
+    stakedAt: Optional[int] = None
+    lastClaim: Optional[int] = None
+    unstakeRequestedAt: Optional[int] = None
+    unstakableAt: Optional[int] = None  # first block complete-unstake succeeds
+    pendingRewards: int
+    claimedRewards: int
+    rewardRate: int
+    totalStaked: int
+    shareOfPool: float
+    delegate: Optional[str] = None
+    delegators: int
+    votingPower: int  # own stake unless delegated, plus stake delegated to this address
+    projections: List[RewardProjection] = []
+
+class VoteCounts(BaseModel):
+    forVotes: int
+    againstVotes: int
+    abstainVotes: int
+    total: int
+    quorumMet: bool
+
+class GovernanceTally(BaseModel):
+    proposalId: int
+    title: str
+    proposer: str
+    startBlock: int
+    endBlock: int
+    blockHeight: int
+    state: str  # as get-proposal-state would return at blockHeight
+    storedState: str
+    voters: int
+    quorum: int
+    recorded: VoteCounts  # voting power as counted by cast-vote
+    projected: VoteCounts  # stake-weighted delegated power at startBlock
+    outstandingPower: int  # delegated power of addresses that have not voted
@@ -0,0 +1,212 @@
+"""Off-chain mirror of the pricing math in contracts/bonding-curve.clar.
+
+The scalar functions reproduce the contract's private helpers exactly, with
+Clarity ``uint`` semantics: 128-bit unsigned, truncating division, and a
+runtime abort (``ClarityArithmeticError``) on overflow or underflow.
+``QuoteEngine`` prices many (symbol, amount) pairs at once with NumPy.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+
+UINT_MAX = 2 ** 128 - 1
+
+CURVE_LINEAR = 0
+CURVE_EXPONENTIAL = 1
+CURVE_LOGARITHMIC = 2
+CURVE_SIGMOID = 3
+CURVE_NAMES = ["Linear", "Exponential", "Logarithmic", "Sigmoid"]
+
+# Upper bounds of the log2 ladder in the contract: log2(n) = index of first bound >= n, capped at 10
+_LOG2_BOUNDS = (1, 3, 7, 15, 31, 63, 127, 255, 511, 1023)
+_LOG2_BOUNDS_NP = np.array(_LOG2_BOUNDS, dtype=np.int64)
+_INT64_SAFE = 2 ** 63 - 1
+
+class ClarityArithmeticError(ArithmeticError):
+    """The contract call would abort with an arithmetic runtime error."""
+
+def _uint(value: int) -> int:
+    if value < 0:
+        raise ClarityArithmeticError("uint underflow")
+    if value > UINT_MAX:
+        raise ClarityArithmeticError("uint overflow")
+    return value
+
+def pow_uint(base: int, exponent: int) -> int:
+    if exponent == 0:
+        return 1
+    if exponent == 1:
+        return base
+    if exponent == 2:
+        return _uint(base * base)
+    return _uint(base * _uint(base * base))  # exponent = 3
+
+def log2(n: int) -> int:
+    for result, bound in enumerate(_LOG2_BOUNDS):
+        if n <= bound:
+            return result
+    return 10
+
+def calculate_fee(amount: int, fee_percentage: int) -> int:
+    return _uint(amount * fee_percentage) // 10000
+
+def _unit_price(supply: int, curve_type: int, base_price: int, slope: int) -> int:
+    if curve_type == CURVE_LINEAR:
+        # Linear: price = base + (supply * slope)
+        return _uint(base_price + _uint(supply * slope))
+    if curve_type == CURVE_EXPONENTIAL:
+        return _uint(base_price + _uint(pow_uint(supply, 2) * slope))
+    if curve_type == CURVE_LOGARITHMIC:
+        return _uint(base_price + _uint(log2(_uint(supply + 1)) * slope) // 100)
+    # Sigmoid (and any other type) uses the linear formula in the contract
+    return _uint(base_price + _uint(supply * slope))
+
+def calculate_buy_cost(current_supply: int, amount: int, curve_type: int, base_price: int, slope: int) -> int:
+    return _uint(amount * _unit_price(current_supply, curve_type, base_price, slope))
+
+def calculate_sell_return(current_supply: int, amount: int, curve_type: int, base_price: int, slope: int) -> int:
+    new_supply = _uint(current_supply - amount)
+    return _uint(amount * _unit_price(new_supply, curve_type, base_price, slope))
+
+@dataclass
+class CurveState:
+    symbol: str
+    supply: int
+    base_price: int
+    curve_type: int = CURVE_LINEAR
+    slope: int = 0
+    fee_percentage: int = 30
+    reserve_balance: int = 0
+    graduated: bool = False
+    max_supply: Optional[int] = None
+
+    @classmethod
+    def from_clarity(cls, symbol: str, info: dict, params: dict = None):
+        """Build from a ``get-curve-info`` tuple (hyphenated keys), optionally with ``get-curve-parameters``."""
+        return cls(
+            symbol=symbol,
+            supply=int(info["supply"]),
+            base_price=int(info["base-price"]),
+            curve_type=int(info["curve-type"]),
+            slope=int(info["slope"]),
+            fee_percentage=int(info.get("fee-percentage", 30)),
+            reserve_balance=int(info.get("reserve-balance", 0)),
+            graduated=bool(info.get("graduated", False)),
+            max_supply=int(params["max-supply"]) if params and "max-supply" in params else None,
+        )
+
+def quote_buy(curve: CurveState, amount: int) -> dict:
+    """Same result as the ``calculate-buy-price`` read-only function."""
+    cost = calculate_buy_cost(curve.supply, amount, curve.curve_type, curve.base_price, curve.slope)
+    fee = calculate_fee(cost, curve.fee_percentage)
+    return {"cost": cost, "fee": fee, "total": _uint(cost + fee)}
+
+def quote_sell(curve: CurveState, amount: int) -> dict:
+    """Same result as the ``calculate-sell-price`` read-only function."""
+    ret = calculate_sell_return(curve.supply, amount, curve.curve_type, curve.base_price, curve.slope)
+    fee = calculate_fee(ret, curve.fee_percentage)
+    return {"return": ret, "fee": fee, "net": _uint(ret - fee)}
+
+class QuoteEngine:
+    """Vectorized buy/sell quotes over arrays of (symbol, amount).
+
+    Rows whose worst-case intermediate values fit in int64 are priced on
+    native int64 arrays; the rest fall back to object arrays of Python ints
+    so results stay exact. Pairs that would abort on-chain (overflow, or
+    selling more than the supply) are reported through the ``valid`` mask.
+    """
+
+    _FIELDS = ("supply", "base_price", "curve_type", "slope", "fee_percentage")
+
+    def __init__(self, curves: Dict[str, CurveState] = None):
+        self.curves = dict(curves or {})
+        self._columns = None
+
+    def update(self, curve: CurveState):
+        self.curves[curve.symbol] = curve
+        self._columns = None
+
+    def _build_columns(self):
+        self._index = {symbol: i for i, symbol in enumerate(self.curves)}
+        exact = {f: np.array([getattr(c, f) for c in self.curves.values()], dtype=object) for f in self._FIELDS}
+        self._columns = {
+            "exact": exact,
+            # Clipped copies: only read for rows already proven to fit in int64
+            "int64": {f: np.minimum(col, _INT64_SAFE).astype(np.int64) for f, col in exact.items()},
+            "float": {f: col.astype(np.float64) for f, col in exact.items()},
+        }
+
+    def quote(self, symbols, amounts, side: str = "buy") -> dict:
+        if side not in ("buy", "sell"):
+            raise ValueError("side must be 'buy' or 'sell'")
+        if self._columns is None:
+            self._build_columns()
+        idx = symbols if isinstance(symbols, np.ndarray) and symbols.dtype.kind == "i" else self.encode(symbols)
+        try:
+            amounts = np.asarray(amounts, dtype=np.int64)
+        except OverflowError:
+            amounts = np.asarray(amounts, dtype=object)
+        if len(amounts) != len(idx):
+            raise ValueError("symbols and amounts must have the same length")
+        if len(amounts) and amounts.min() < 0:
+            raise ValueError("amounts must be non-negative")
+
+        # Float estimate of the largest intermediate (gross * fee-percentage) per row
+        f = {name: col[idx] for name, col in self._columns["float"].items()}
+        amount_f = np.maximum(amounts.astype(np.float64), 1.0)
+        term_f = np.maximum(f["supply"] ** 2 * np.maximum(f["slope"], 1.0), 10.0 * f["slope"])
+        bound = amount_f * (f["base_price"] + term_f) * (f["fee_percentage"] + 1.0)
+        fast = bound < 2.0 ** 62
+
+        if fast.all() and amounts.dtype == np.int64:
+            cols = {name: col[idx] for name, col in self._columns["int64"].items()}
+            return self._compute(amounts, cols, side, np.int64)
+
+        slow = ~fast
+        parts = [(self._compute(amounts[slow].astype(object), {n: c[idx[slow]] for n, c in self._columns["exact"].items()}, side, object), slow)]
+        if fast.any():
+            cols = {n: c[idx[fast]] for n, c in self._columns["int64"].items()}
+            parts.append((self._compute(amounts[fast].astype(np.int64), cols, side, np.int64), fast))
+        result = {}
+        for key in parts[0][0]:
+            out = np.empty(len(idx), dtype=bool if key == "valid" else object)
+            for part, mask in parts:
+                out[mask] = part[key]
+            result[key] = out
+        return result
+
+    def encode(self, symbols) -> np.ndarray:
+        """Map symbols to row indices; pass the result to ``quote`` to skip the lookup on repeated batches."""
+        if self._columns is None:
+            self._build_columns()
+        symbols = list(symbols)
+        try:
+            return np.fromiter(map(self._index.__getitem__, symbols), dtype=np.int64, count=len(symbols))
+        except KeyError as e:
+            raise KeyError(f"unknown symbol: {e.args[0]}") from None
+
+    def _compute(self, amount, cols, side: str, dtype) -> dict:
+        supply, base, ctype, slope, fee_pct = (cols[f] for f in self._FIELDS)
+        valid = np.ones(len(amount), dtype=bool)
+        if side == "sell":
+            valid &= (amount <= supply).astype(bool)
+            supply = np.where(valid, supply - amount, 0).astype(dtype)
+
+        log_term = np.searchsorted(_LOG2_BOUNDS_NP, (supply + 1).astype(np.float64), side="left").astype(dtype)
+        squared = supply * supply
+        term = np.where(
+            ctype == CURVE_EXPONENTIAL, squared * slope,
+            np.where(ctype == CURVE_LOGARITHMIC, (log_term * slope) // 100, supply * slope),
+        )
+        price = base + term
+        gross = amount * price
+        fee_product = gross * fee_pct
+        fee = fee_product // 10000
+        if dtype is object:
+            # Same abort points as the contract: every intermediate must stay a valid uint
+            exp = ctype == CURVE_EXPONENTIAL
+            for value in (np.where(exp, squared, 0), term, price, gross, fee_product):
+                valid &= (value <= UINT_MAX).astype(bool)
+        if side == "buy":
+            return {"amount": amount, "cost": gross, "fee": fee, "total": gross + fee, "valid": valid}
+        return {"amount": amount, "return": gross, "fee": fee, "net": gross - fee, "valid": valid}
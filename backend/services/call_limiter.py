@@ -0,0 +1,134 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import os
+import random
+import time
+
+class CallRejected(Exception):
+    """Raised when a call is refused because the queue is full or its deadline passed."""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+def is_rate_limited(exc: Exception) -> bool:
+    # google.genai.errors.APIError carries the HTTP status in .code
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code == 429 or "RESOURCE_EXHAUSTED" in str(exc)
+
+class CallLimiter:
+    """Bounded concurrency for calls to an external API.
+
+    Blocking calls run on a dedicated thread pool instead of the loop's default
+    executor. At most ``max_concurrency`` calls are in flight; up to
+    ``max_queue`` more may wait for a slot, beyond that calls are rejected.
+    Every call has a deadline covering queueing, retries and execution, and
+    429 responses are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, name: str, max_concurrency: int = None, max_queue: int = None,
+                 deadline: float = None, max_retries: int = None, backoff: float = None):
+        prefix = name.upper()
+        self.name = name
+        self.max_concurrency = max_concurrency or int(os.getenv(f"{prefix}_MAX_CONCURRENCY", "8"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv(f"{prefix}_MAX_QUEUE", "64"))
+        self.deadline = deadline or float(os.getenv(f"{prefix}_DEADLINE", "30"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv(f"{prefix}_MAX_RETRIES", "3"))
+        self.backoff = backoff or float(os.getenv(f"{prefix}_BACKOFF", "0.5"))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=name)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.retries = 0
+
+    @asynccontextmanager
+    async def slot(self, deadline: float = None):
+        """Hold one concurrency slot; for natively async calls (e.g. streaming)."""
+        expires_at = time.monotonic() + (deadline or self.deadline)
+        await self._acquire(expires_at)
+        self.in_flight += 1
+        try:
+            yield expires_at
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def run(self, fn, *args, deadline: float = None):
+        """Run blocking ``fn(*args)`` on the limiter's pool, retrying on 429."""
+        expires_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            try:
+                result = await self._run_once(fn, args, expires_at)
+                self.completed += 1
+                return result
+            except CallRejected:
+                raise
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    self.failed += 1
+                    raise
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                if time.monotonic() + delay >= expires_at:
+                    self.failed += 1
+                    raise
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def _run_once(self, fn, args, expires_at: float):
+        await self._acquire(expires_at)
+        self.in_flight += 1
+        future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+        def release(_):
+            self.in_flight -= 1
+            self._semaphore.release()
+
+        # The slot is freed when the worker thread actually finishes, even if
+        # the caller gave up earlier, so the pool can never be oversubscribed.
+        future.add_done_callback(release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), expires_at - time.monotonic())
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise CallRejected(f"{self.name} deadline exceeded")
+
+    async def _acquire(self, expires_at: float):
+        if not self._semaphore.locked():
+            # Free slot: acquire() returns without suspending
+            await self._semaphore.acquire()
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise CallRejected(f"{self.name} queue full")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), expires_at - time.monotonic())
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise CallRejected(f"{self.name} deadline exceeded while queued")
+        finally:
+            self.queued -= 1
+
+    def stats(self) -> dict:
+        return {
+            "maxConcurrency": self.max_concurrency,
+            "maxQueue": self.max_queue,
+            "queued": self.queued,
+            "inFlight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,267 @@
+"""Streaming OHLCV candles at several resolutions, kept in columnar buffers.
+
+Trades land in the base (1m) series only. A candle is folded into the next
+resolution up when its bucket closes, i.e. when the first trade of a later
+bucket arrives, so 5m is built from 1m candles, 1h from 5m and 1d from 1h.
+Raw trades are never rescanned. Reads overlay the still-open candles of the
+lower resolutions, so the newest bucket is always current.
+
+Every candle carries the timestamps of its first and last trade. That makes
+merging order-independent: a late trade is merged into its bucket at each
+level that already holds that bucket.
+
+Each series stores one ``array`` per column and keeps at most ``max_rows``
+rows; older rows are dropped in chunks.
+"""
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+import numpy as np
+
+RESOLUTIONS = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+
+# (first_ts, last_ts, open, high, low, close, volume, stx_volume, trades)
+FIRST, LAST, OPEN, HIGH, LOW, CLOSE, VOLUME, STX, TRADES = range(9)
+
+def merge_candles(a: tuple, b: tuple) -> tuple:
+    return (
+        min(a[FIRST], b[FIRST]),
+        max(a[LAST], b[LAST]),
+        a[OPEN] if a[FIRST] <= b[FIRST] else b[OPEN],
+        max(a[HIGH], b[HIGH]),
+        min(a[LOW], b[LOW]),
+        b[CLOSE] if b[LAST] >= a[LAST] else a[CLOSE],
+        a[VOLUME] + b[VOLUME],
+        a[STX] + b[STX],
+        a[TRADES] + b[TRADES],
+    )
+
+class CandleSeries:
+    COLUMNS = ("first", "last", "open", "high", "low", "close", "volume", "stx", "trades")
+
+    def __init__(self, interval: int, max_rows: int):
+        self.interval = interval
+        self.max_rows = max_rows
+        self.trimmed = False
+        self.buckets = array("q")
+        self.cols = [array("q" if name == "trades" else "d") for name in self.COLUMNS]
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def bucket_of(self, ts: float) -> int:
+        return int(ts) // self.interval * self.interval
+
+    def last_bucket(self) -> Optional[int]:
+        return self.buckets[-1] if self.buckets else None
+
+    def row(self, i: int) -> tuple:
+        return tuple(col[i] for col in self.cols)
+
+    def _set(self, i: int, candle: tuple):
+        for col, value in zip(self.cols, candle):
+            col[i] = value
+
+    def append(self, bucket: int, candle: tuple):
+        self.buckets.append(bucket)
+        for col, value in zip(self.cols, candle):
+            col.append(value)
+        if len(self.buckets) > self.max_rows + self.max_rows // 10:
+            drop = len(self.buckets) - self.max_rows
+            del self.buckets[:drop]
+            for col in self.cols:
+                del col[:drop]
+            self.trimmed = True
+
+    def merge(self, bucket: int, candle: tuple):
+        """Merge into ``bucket`` wherever it is (late data); inserts a row if missing."""
+        i = bisect_left(self.buckets, bucket)
+        if i < len(self.buckets) and self.buckets[i] == bucket:
+            self._set(i, merge_candles(self.row(i), candle))
+        elif i == 0 and self.trimmed:
+            return  # older than what this series retains
+        else:
+            self.buckets.insert(i, bucket)
+            for col, value in zip(self.cols, candle):
+                col.insert(i, value)
+
+    def replace(self, bucket: int, candle: Optional[tuple]):
+        i = bisect_left(self.buckets, bucket)
+        found = i < len(self.buckets) and self.buckets[i] == bucket
+        if candle is None:
+            if found:
+                del self.buckets[i]
+                for col in self.cols:
+                    del col[i]
+        elif found:
+            self._set(i, candle)
+        else:
+            self.buckets.insert(i, bucket)
+            for col, value in zip(self.cols, candle):
+                col.insert(i, value)
+
+    def span(self, start: Optional[int], end: Optional[int]) -> range:
+        lo = 0 if start is None else bisect_left(self.buckets, start)
+        hi = len(self.buckets) if end is None else bisect_right(self.buckets, end)
+        return range(lo, hi)
+
+class CandleEngine:
+    """Per-symbol candle series for every resolution in ``RESOLUTIONS``."""
+
+    def __init__(self, resolutions: dict = None, max_rows: int = None):
+        self.resolutions = dict(sorted((resolutions or RESOLUTIONS).items(), key=lambda kv: kv[1]))
+        self.names = list(self.resolutions)
+        self.base_interval = self.resolutions[self.names[0]]
+        self.max_rows = max_rows or int(os.getenv("CANDLE_MAX_ROWS", "100000"))
+        self.series = {}  # symbol -> [CandleSeries per resolution, smallest first]
+        self.trades = 0
+
+    def _levels(self, symbol: str) -> list:
+        levels = self.series.get(symbol)
+        if levels is None:
+            levels = self.series[symbol] = [CandleSeries(i, self.max_rows) for i in self.resolutions.values()]
+        return levels
+
+    def _merge_into(self, levels: list, i: int, candle: tuple):
+        series = levels[i]
+        bucket = series.bucket_of(candle[FIRST])
+        last = series.last_bucket()
+        if last is None or bucket > last:
+            if last is not None and i + 1 < len(levels):
+                # The last candle just closed: fold it into the next resolution
+                self._merge_into(levels, i + 1, series.row(-1))
+            series.append(bucket, candle)
+        elif bucket == last:
+            series._set(-1, merge_candles(series.row(-1), candle))
+        else:
+            # Late data for a closed bucket, which the next resolution already holds
+            series.merge(bucket, candle)
+            if i + 1 < len(levels):
+                self._merge_into(levels, i + 1, candle)
+
+    # --- ingest ---
+    def add_trade(self, symbol: str, timestamp: float, price: float, amount: float, stx: float = 0):
+        self._merge_into(self._levels(symbol), 0, (timestamp, timestamp, price, price, price, price, amount, stx, 1))
+        self.trades += 1
+
+    def add_batch(self, symbol: str, timestamps, prices, amounts, stx=None):
+        """Ingest many trades of one symbol: aggregated to base candles with numpy, then merged."""
+        ts = np.asarray(timestamps, dtype=np.float64)
+        if not len(ts):
+            return
+        px = np.asarray(prices, dtype=np.float64)
+        vol = np.asarray(amounts, dtype=np.float64)
+        sv = np.zeros_like(ts) if stx is None else np.asarray(stx, dtype=np.float64)
+        if np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            ts, px, vol, sv = ts[order], px[order], vol[order], sv[order]
+        buckets = (ts // self.base_interval).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(ts)] - 1
+        rows = zip(
+            ts[starts].tolist(), ts[ends].tolist(), px[starts].tolist(),
+            np.maximum.reduceat(px, starts).tolist(), np.minimum.reduceat(px, starts).tolist(),
+            px[ends].tolist(), np.add.reduceat(vol, starts).tolist(), np.add.reduceat(sv, starts).tolist(),
+            (ends - starts + 1).tolist(),
+        )
+        levels = self._levels(symbol)
+        for candle in rows:
+            self._merge_into(levels, 0, candle)
+        self.trades += len(ts)
+
+    def add_trades(self, trades: list):
+        """Indexer hook: trade docs (``symbol``, ``timestamp``, ``price``, ``amount``, ``stx``)."""
+        by_symbol = {}
+        for t in trades:
+            by_symbol.setdefault(t["symbol"], []).append(t)
+        for symbol, rows in by_symbol.items():
+            self.add_batch(symbol, [t["timestamp"] for t in rows], [t["price"] for t in rows],
+                           [t["amount"] for t in rows], [t["stx"] for t in rows])
+
+    @staticmethod
+    def _doc_candle(doc: dict) -> tuple:
+        first, last = doc.get("firstTs", doc["bucket"]), doc.get("lastTs", doc["bucket"])
+        return (first, last, doc["open"], doc["high"], doc["low"], doc["close"],
+                doc["volume"], doc.get("stxVolume", 0), doc["trades"])
+
+    def load(self, docs):
+        """Replace the contents from stored base-interval candle docs (the indexer's ``candles``), oldest first."""
+        self.series = {}
+        for doc in docs:
+            if doc["interval"] == self.base_interval:
+                self._merge_into(self._levels(doc["symbol"]), 0, self._doc_candle(doc))
+
+    def replace_candles(self, docs, removed_ids):
+        """Indexer hook after a reorg: base candles that were rebuilt or removed.
+
+        The affected buckets of each larger resolution are recomputed from
+        the resolution below it.
+        """
+        touched = {}
+        for doc in docs:
+            if doc["interval"] == self.base_interval:
+                touched.setdefault(doc["symbol"], {})[doc["bucket"]] = self._doc_candle(doc)
+        for doc_id in removed_ids:
+            symbol, interval, bucket = doc_id.rsplit(":", 2)
+            if int(interval) == self.base_interval:
+                touched.setdefault(symbol, {}).setdefault(int(bucket), None)
+        for symbol, candles in touched.items():
+            levels = self._levels(symbol)
+            for bucket, candle in candles.items():
+                levels[0].replace(bucket, candle)
+            buckets = set(candles)
+            for child, parent in zip(levels, levels[1:]):
+                buckets = {parent.bucket_of(b) for b in buckets}
+                if len(child):
+                    # the child's last candle must stay out of the parent (it is not closed)
+                    buckets.add(parent.bucket_of(child.buckets[-1]))
+                closed = len(child) - 1
+                for bucket in buckets:
+                    rows = [i for i in child.span(bucket, bucket + parent.interval - 1) if i < closed]
+                    candle = None
+                    for i in rows:
+                        candle = child.row(i) if candle is None else merge_candles(candle, child.row(i))
+                    parent.replace(bucket, candle)
+
+    # --- reads ---
+    def candles(self, symbol: str, res: str, start: int = None, end: int = None, limit: int = None) -> list:
+        """Candles of ``res`` with bucket in [start, end], oldest first; the newest ``limit`` if given."""
+        levels = self.series.get(symbol)
+        if not levels:
+            return []
+        k = self.names.index(res)
+        series = levels[k]
+        # Open candles of the lower resolutions that are not folded into this one yet
+        pending = {}
+        for lower in levels[:k]:
+            if len(lower):
+                row = lower.row(-1)
+                bucket = series.bucket_of(row[FIRST])
+                pending[bucket] = merge_candles(pending[bucket], row) if bucket in pending else row
+        out = []
+        for i in series.span(start, end):
+            bucket = series.buckets[i]
+            row = series.row(i)
+            if bucket in pending:
+                row = merge_candles(row, pending.pop(bucket))
+            out.append((bucket, row))
+        for bucket, row in sorted(pending.items()):
+            if (start is None or bucket >= start) and (end is None or bucket <= end):
+                out.append((bucket, row))
+        out.sort(key=lambda item: item[0])
+        if limit:
+            out = out[-limit:]
+        return [
+            {"time": bucket, "open": r[OPEN], "high": r[HIGH], "low": r[LOW], "close": r[CLOSE],
+             "volume": r[VOLUME], "stxVolume": r[STX], "trades": r[TRADES]}
+            for bucket, r in out
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self.series),
+            "trades": self.trades,
+            "rows": {name: sum(len(levels[i]) for levels in self.series.values()) for i, name in enumerate(self.names)},
+        }
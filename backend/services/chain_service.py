@@ -0,0 +1,186 @@
+import httpx
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from services.clarity import decode_hex
+from services.metrics import metrics
+
+class StacksNodeClient:
+    """Read-only access to a Stacks node's RPC API.
+
+    Any object with the same two coroutines (``get_block_height`` and
+    ``call_read_only``) can stand in for it, e.g. a local fake node.
+    """
+
+    def __init__(self, node_url: str = None, contract_address: str = None):
+        self.base_url = (node_url or os.getenv("STACKS_NODE_URL", "https://api.testnet.hiro.so")).rstrip("/")
+        self.contract_address = contract_address or os.getenv("CONTRACT_ADDRESS", "")
+        self.client = None
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=float(os.getenv("STACKS_NODE_TIMEOUT", "10")),
+                limits=httpx.Limits(max_connections=int(os.getenv("STACKS_NODE_MAX_CONNECTIONS", "20"))),
+            )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    @metrics.timed("stacks_node")
+    async def get_block_height(self) -> int:
+        await self.start()
+        resp = await self.client.get("/v2/info")
+        resp.raise_for_status()
+        return resp.json()["stacks_tip_height"]
+
+    @metrics.timed("stacks_node")
+    async def call_read_only(self, contract: str, function: str, args: tuple) -> str:
+        """Call a read-only function with hex-serialized args; returns the hex-serialized result."""
+        await self.start()
+        resp = await self.client.post(
+            f"/v2/contracts/call-read/{self.contract_address}/{contract}/{function}",
+            json={"sender": self.contract_address, "arguments": list(args)},
+        )
+        resp.raise_for_status()
+        body = resp.json()
+        if not body.get("okay"):
+            raise RuntimeError(f"Read-only call {contract}.{function} failed: {body.get('cause')}")
+        return body["result"]
+
+# Read-only functions /contract/read may proxy, per contract; every pool contract
+# (LIQUIDITY_POOLS) gets the "liquidity-pool" ones
+PUBLIC_READS = {
+    "bonding-curve": ("token-exists", "get-curve-info", "get-token-supply", "get-token-price", "get-reserve-balance",
+                      "calculate-buy-price", "calculate-sell-price", "get-user-position", "get-trade-count",
+                      "get-curve-parameters", "is-graduated", "is-paused", "get-protocol-fee"),
+    "liquidity-pool": ("get-reserves", "get-lp-balance", "get-total-lp-supply", "quote-swap-stx-for-token",
+                       "quote-swap-token-for-stx"),
+    "marketplace": ("get-token-listing", "is-token-listed", "get-order", "get-trading-stats", "is-featured",
+                    "get-next-order-id", "is-paused", "get-fees-info"),
+    "staking-pool": ("get-stake", "get-pending-rewards", "get-total-rewards", "get-total-staked", "get-reward-rate"),
+    "governance": ("get-proposal", "get-proposal-state", "get-vote", "has-voted", "get-delegate",
+                   "get-governance-params"),
+    "prompt-token": ("get-name", "get-symbol", "get-decimals", "get-balance", "get-total-supply", "get-token-uri",
+                     "get-max-supply", "get-token-metadata"),
+    "xp-system": ("get-xp", "get-user-stats", "get-level", "xp-to-next-level", "get-quest-progress",
+                  "quest-completed", "achievement-unlocked", "get-streak"),
+}
+
+def public_read(contract: str, function: str, pools=()) -> bool:
+    return function in PUBLIC_READS.get("liquidity-pool" if contract in pools else contract, ())
+
+class ReadOnlyCache:
+    """Per-block read-through cache for contract read-only calls.
+
+    Entries are keyed by (contract, function, args) and all of them are
+    dropped as soon as a new block height is observed, so a value is never
+    served for a later block than the one it was read at. Past
+    ``max_entries`` the least recently used entry makes room. The tip height is
+    polled at most every ``tip_ttl`` seconds. Concurrent misses for the same
+    key, and concurrent tip polls, share one node request. With ``shared``
+    (a ``ResponseCache``), misses are looked up there by block height first,
+    so workers sharing its L2 make one node call per block between them.
+    """
+
+    def __init__(self, node, tip_ttl: float = None, max_entries: int = None, shared=None):
+        self.node = node
+        self.shared = shared
+        self.tip_ttl = tip_ttl if tip_ttl is not None else float(os.getenv("CHAIN_TIP_TTL", "2"))
+        self.max_entries = max_entries or int(os.getenv("CHAIN_CACHE_MAX_ENTRIES", "50000"))
+        self.block_height = None
+        self._tip_checked_at = 0.0
+        self._tip_task = None
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.node_calls = 0
+
+    async def tip(self) -> int:
+        if self.block_height is not None and time.monotonic() - self._tip_checked_at < self.tip_ttl:
+            return self.block_height
+        if self._tip_task is None:
+            self._tip_task = asyncio.ensure_future(self._refresh_tip())
+            self._tip_task.add_done_callback(lambda _: setattr(self, "_tip_task", None))
+        return await asyncio.shield(self._tip_task)
+
+    async def _refresh_tip(self) -> int:
+        height = await self.node.get_block_height()
+        self._tip_checked_at = time.monotonic()
+        self.observe_block(height)
+        return height
+
+    def observe_block(self, height: int):
+        """Record a block height seen by any source (poller, indexer, node call)."""
+        if self.block_height is None or height > self.block_height:
+            if self._entries:
+                self.invalidations += 1
+            self._entries = OrderedDict()
+            self.block_height = height
+
+    async def call(self, contract: str, function: str, args: tuple = ()) -> dict:
+        height = await self.tip()
+        key = (contract, function, tuple(args))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return {"result": entry, "blockHeight": height, "cached": True}
+        # Callers at a newer tip must not join a fetch started at an older block
+        inflight_key = (height,) + key
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, height))
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        else:
+            self.coalesced += 1
+        raw = await asyncio.shield(task)
+        return {"result": raw, "blockHeight": height, "cached": False}
+
+    async def _fetch(self, key: tuple, height: int) -> str:
+        if self.shared is not None:
+            # Keyed by height, so the shared entry never needs invalidating
+            contract, function, args = key
+            raw = await self.shared.get(f"chain:{height}:{contract}.{function}:{','.join(args)}",
+                                        lambda: self._call_node(key))
+        else:
+            raw = await self._call_node(key)
+        # Only keep it if no newer block arrived while the call was in flight
+        if self.block_height == height:
+            self._entries[key] = raw
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return raw
+
+    async def _call_node(self, key: tuple) -> str:
+        self.node_calls += 1
+        return await self.node.call_read_only(*key)
+
+    async def read(self, contract: str, function: str, args: tuple = ()):
+        """Like ``call`` but returns the decoded Clarity value."""
+        return decode_hex((await self.call(contract, function, args))["result"])
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "blockHeight": self.block_height,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "nodeCalls": self.node_calls,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hitRatio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
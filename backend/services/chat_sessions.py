@@ -0,0 +1,220 @@
+"""Server-side chat conversations with a bounded prompt.
+
+Each conversation keeps a rolling summary plus the most recent messages.
+The prompt for a turn is the summary and as many of the newest messages as
+fit in ``token_budget`` (estimated tokens, ``CHAT_CHARS_PER_TOKEN``
+characters each). Once the stored messages exceed the budget, the oldest
+ones (always keeping the last ``keep_last``) are folded into the summary in
+the background until half the budget is left, so the model is asked for a
+summary once per half-budget of conversation rather than every turn. The
+summary is capped at ``summary_budget`` tokens; if the summarizer fails, a
+truncated transcript of the folded messages is used instead.
+
+Conversations live in an LRU in memory and are written to Mongo as
+``chat_sessions`` docs every ``flush_interval`` seconds when changed.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pymongo import ReplaceOne
+
+CHARS_PER_TOKEN = int(os.getenv("CHAT_CHARS_PER_TOKEN", "4"))
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _summary_tokens(summary: str) -> int:
+    # Counted with the label GeminiService puts in front of it
+    return estimate_tokens(f"Summary of the earlier conversation: {summary}") if summary else 0
+
+class ConversationNotFound(KeyError):
+    pass
+
+class ChatSession:
+    def __init__(self, conversation_id: str, summary: str = "", messages: list = None, turns: int = 0,
+                 summarized: int = 0, created_at: float = None):
+        self.id = conversation_id
+        self.summary = summary
+        self.messages = []  # {"role", "content", "tokens"}, oldest first
+        self.tokens = 0
+        for m in messages or ():
+            self.append(m["role"], m["content"])
+        self.turns = turns
+        self.summarized = summarized  # messages folded into the summary so far
+        self.created_at = created_at or time.time()
+        self.updated_at = self.created_at
+        self.compacting = None
+
+    def append(self, role: str, content: str):
+        tokens = estimate_tokens(f"{role.capitalize()}: {content}\n")
+        self.messages.append({"role": role, "content": content, "tokens": tokens})
+        self.tokens += tokens
+
+    def doc(self) -> dict:
+        return {
+            "_id": self.id,
+            "summary": self.summary,
+            "messages": [{"role": m["role"], "content": m["content"]} for m in self.messages],
+            "turns": self.turns,
+            "summarized": self.summarized,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+        }
+
+class ChatSessions:
+    def __init__(self, mongo_service=None, summarize=None, token_budget: int = None, summary_budget: int = None,
+                 keep_last: int = None, max_sessions: int = None, flush_interval: float = None,
+                 collection: str = "chat_sessions"):
+        self.mongo = mongo_service
+        self.summarize = summarize  # async (summary, messages, max_tokens) -> str
+        self.token_budget = token_budget or int(os.getenv("CHAT_TOKEN_BUDGET", "2000"))
+        # The summary must leave room for recent messages
+        self.summary_budget = min(summary_budget or int(os.getenv("CHAT_SUMMARY_TOKENS", "300")), self.token_budget // 4)
+        self.keep_last = keep_last if keep_last is not None else int(os.getenv("CHAT_KEEP_LAST", "4"))
+        self.max_sessions = max_sessions or int(os.getenv("CHAT_MAX_SESSIONS", "10000"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("CHAT_FLUSH_INTERVAL", "1"))
+        self.collection = collection
+        self._sessions = OrderedDict()
+        self._dirty = {}  # id -> session, kept until written even if evicted from the LRU
+        self._task = None
+        self.compactions = 0
+        self.fallback_summaries = 0
+        self.loads = 0
+        self.writes = 0
+
+    # --- sessions ---
+    async def open(self, conversation_id: str = None, history: list = None) -> ChatSession:
+        """The stored conversation, or a new one seeded with ``history`` when no id is given."""
+        if conversation_id is None:
+            session = ChatSession(uuid.uuid4().hex, messages=history)
+            self._remember(session)
+            self._dirty[session.id] = session
+            if session.tokens > self.token_budget:
+                self._schedule_compaction(session)
+            return session
+        session = self._sessions.get(conversation_id) or self._dirty.get(conversation_id)
+        if session is None and self.mongo is not None:
+            doc = await self.mongo.find_doc(self.collection, {"_id": conversation_id})
+            if doc is not None:
+                self.loads += 1
+                session = ChatSession(doc["_id"], doc.get("summary", ""), doc.get("messages"), doc.get("turns", 0),
+                                      doc.get("summarized", 0), doc.get("createdAt"))
+        if session is None:
+            raise ConversationNotFound(conversation_id)
+        self._remember(session)
+        return session
+
+    def _remember(self, session: ChatSession):
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def window(self, session: ChatSession, message: str) -> list:
+        """The newest messages that fit in the budget next to the summary and ``message``."""
+        room = self.token_budget - _summary_tokens(session.summary) - estimate_tokens(f"User: {message}")
+        start = len(session.messages)
+        while start > 0 and session.messages[start - 1]["tokens"] <= room:
+            start -= 1
+            room -= session.messages[start]["tokens"]
+        return [{"role": m["role"], "content": m["content"]} for m in session.messages[start:]]
+
+    def prompt_tokens(self, session: ChatSession, window: list, message: str) -> int:
+        lines = [f"{m['role'].capitalize()}: {m['content']}\n" for m in window] + [f"User: {message}"]
+        return _summary_tokens(session.summary) + sum(estimate_tokens(line) for line in lines)
+
+    def record(self, session: ChatSession, user_message: str, reply: str):
+        session.append("user", user_message)
+        session.append("assistant", reply)
+        session.turns += 1
+        session.updated_at = time.time()
+        self._dirty[session.id] = session
+        if session.tokens > self.token_budget:
+            self._schedule_compaction(session)
+
+    # --- compaction ---
+    def _schedule_compaction(self, session: ChatSession):
+        if session.compacting is None:
+            session.compacting = asyncio.ensure_future(self._compact(session))
+
+    async def _compact(self, session: ChatSession):
+        try:
+            target = self.token_budget // 2
+            tokens, count = session.tokens, 0
+            while count < len(session.messages) - self.keep_last and tokens > target:
+                tokens -= session.messages[count]["tokens"]
+                count += 1
+            if count == 0:
+                return
+            folded = [{"role": m["role"], "content": m["content"]} for m in session.messages[:count]]
+            summary = None
+            if self.summarize is not None:
+                try:
+                    summary = await self.summarize(session.summary, folded, self.summary_budget)
+                except Exception as e:
+                    print(f"Chat summary failed for {session.id}: {e}")
+            if not summary:
+                self.fallback_summaries += 1
+                summary = "\n".join([session.summary] + [f"{m['role'].capitalize()}: {m['content']}" for m in folded])
+            # Messages are only ever appended, so the folded ones are still the oldest
+            del session.messages[:count]
+            session.tokens = sum(m["tokens"] for m in session.messages)
+            session.summary = summary.strip()[-self.summary_budget * CHARS_PER_TOKEN:]
+            session.summarized += count
+            self._dirty[session.id] = session
+            self.compactions += 1
+        finally:
+            session.compacting = None
+
+    # --- persistence ---
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Chat session flush failed: {e}")
+
+    async def flush(self) -> int:
+        if not self._dirty or self.mongo is None:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        try:
+            await self.mongo.bulk_write(self.collection, [
+                ReplaceOne({"_id": s.id}, s.doc(), upsert=True) for s in dirty.values()
+            ])
+        except Exception:
+            for conversation_id, session in dirty.items():
+                self._dirty.setdefault(conversation_id, session)
+            raise
+        self.writes += len(dirty)
+        return len(dirty)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        pending = [s.compacting for s in list(self._sessions.values()) + list(self._dirty.values()) if s.compacting]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "pendingWrites": len(self._dirty),
+            "compactions": self.compactions,
+            "fallbackSummaries": self.fallback_summaries,
+            "loads": self.loads,
+            "writes": self.writes,
+        }
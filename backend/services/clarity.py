@@ -0,0 +1,193 @@
+"""Minimal Clarity value codec for read-only calls against a Stacks node.
+
+Values are serialized in the consensus wire format the node's
+``/v2/contracts/call-read`` endpoint expects, and results are decoded into
+plain Python: ints, bools, str, ``None`` for ``none``, dicts for tuples,
+lists, ``"0x.."`` for buffers and ``{"ok": v}`` / ``{"err": v}`` for responses.
+"""
+import hashlib
+
+C32_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_INT, _UINT, _BUFFER, _TRUE, _FALSE, _STD_PRINCIPAL, _CONTRACT_PRINCIPAL = range(7)
+_OK, _ERR, _NONE, _SOME, _LIST, _TUPLE, _ASCII, _UTF8 = range(7, 15)
+
+class ClarityDecodeError(ValueError):
+    pass
+
+# --- c32check addresses ---
+def c32_encode(data: bytes) -> str:
+    n = int.from_bytes(data, "big")
+    out = []
+    while n:
+        n, rem = divmod(n, 32)
+        out.append(C32_ALPHABET[rem])
+    for b in data:
+        if b:
+            break
+        out.append("0")
+    return "".join(reversed(out))
+
+def c32_decode(text: str, size: int) -> bytes:
+    n = 0
+    for ch in text.upper().replace("O", "0").replace("L", "1").replace("I", "1"):
+        n = n * 32 + C32_ALPHABET.index(ch)
+    return n.to_bytes(size, "big")
+
+def _checksum(data: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()[:4]
+
+def c32_address(version: int, hash160: bytes) -> str:
+    return "S" + C32_ALPHABET[version] + c32_encode(hash160 + _checksum(bytes([version]) + hash160))
+
+def parse_c32_address(address: str):
+    if len(address) < 3 or address[0] != "S":
+        raise ValueError(f"Invalid Stacks address: {address}")
+    version = C32_ALPHABET.index(address[1].upper())
+    payload = c32_decode(address[2:], 24)
+    hash160, checksum = payload[:20], payload[20:]
+    if _checksum(bytes([version]) + hash160) != checksum:
+        raise ValueError(f"Invalid Stacks address checksum: {address}")
+    return version, hash160
+
+# --- serialization ---
+def uint_cv(value: int) -> bytes:
+    return bytes([_UINT]) + int(value).to_bytes(16, "big")
+
+def int_cv(value: int) -> bytes:
+    return bytes([_INT]) + int(value).to_bytes(16, "big", signed=True)
+
+def bool_cv(value: bool) -> bytes:
+    return bytes([_TRUE if value else _FALSE])
+
+def string_ascii_cv(value: str) -> bytes:
+    data = value.encode("ascii")
+    return bytes([_ASCII]) + len(data).to_bytes(4, "big") + data
+
+def string_utf8_cv(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return bytes([_UTF8]) + len(data).to_bytes(4, "big") + data
+
+def buffer_cv(value: bytes) -> bytes:
+    return bytes([_BUFFER]) + len(value).to_bytes(4, "big") + value
+
+def principal_cv(value: str) -> bytes:
+    address, _, name = value.partition(".")
+    version, hash160 = parse_c32_address(address)
+    if not name:
+        return bytes([_STD_PRINCIPAL, version]) + hash160
+    data = name.encode("ascii")
+    return bytes([_CONTRACT_PRINCIPAL, version]) + hash160 + bytes([len(data)]) + data
+
+_ENCODERS = {
+    "uint": uint_cv,
+    "int": int_cv,
+    "bool": bool_cv,
+    "string-ascii": string_ascii_cv,
+    "string-utf8": string_utf8_cv,
+    "buffer": lambda v: buffer_cv(bytes.fromhex(v[2:] if v.startswith("0x") else v)),
+    "principal": principal_cv,
+}
+
+def encode_arg(arg) -> str:
+    """Hex-encode one call argument: an already-serialized ``"0x.."`` string or ``{"type": ..., "value": ...}``."""
+    if isinstance(arg, str):
+        if not arg.startswith("0x"):
+            raise ValueError("Raw arguments must be 0x-prefixed serialized Clarity values")
+        return arg.lower()
+    try:
+        encoder = _ENCODERS[arg["type"]]
+    except KeyError:
+        raise ValueError(f"Unsupported Clarity argument: {arg!r}")
+    return "0x" + encoder(arg["value"]).hex()
+
+# --- deserialization ---
+def decode_hex(value: str):
+    data = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    result, offset = _decode(data, 0)
+    if offset != len(data):
+        raise ClarityDecodeError("Trailing bytes after Clarity value")
+    return result
+
+def _decode(data: bytes, i: int):
+    try:
+        kind = data[i]
+    except IndexError:
+        raise ClarityDecodeError("Truncated Clarity value")
+    i += 1
+    if kind == _UINT:
+        return int.from_bytes(data[i:i + 16], "big"), i + 16
+    if kind == _INT:
+        return int.from_bytes(data[i:i + 16], "big", signed=True), i + 16
+    if kind == _TRUE:
+        return True, i
+    if kind == _FALSE:
+        return False, i
+    if kind in (_BUFFER, _ASCII, _UTF8):
+        size = int.from_bytes(data[i:i + 4], "big")
+        raw = data[i + 4:i + 4 + size]
+        if kind == _BUFFER:
+            return "0x" + raw.hex(), i + 4 + size
+        return raw.decode("ascii" if kind == _ASCII else "utf-8"), i + 4 + size
+    if kind == _STD_PRINCIPAL:
+        return c32_address(data[i], data[i + 1:i + 21]), i + 21
+    if kind == _CONTRACT_PRINCIPAL:
+        address = c32_address(data[i], data[i + 1:i + 21])
+        size = data[i + 21]
+        name = data[i + 22:i + 22 + size].decode("ascii")
+        return f"{address}.{name}", i + 22 + size
+    if kind in (_OK, _ERR):
+        value, i = _decode(data, i)
+        return {"ok" if kind == _OK else "err": value}, i
+    if kind == _NONE:
+        return None, i
+    if kind == _SOME:
+        return _decode(data, i)
+    if kind == _LIST:
+        count = int.from_bytes(data[i:i + 4], "big")
+        i += 4
+        items = []
+        for _ in range(count):
+            item, i = _decode(data, i)
+            items.append(item)
+        return items, i
+    if kind == _TUPLE:
+        count = int.from_bytes(data[i:i + 4], "big")
+        i += 4
+        fields = {}
+        for _ in range(count):
+            size = data[i]
+            name = data[i + 1:i + 1 + size].decode("ascii")
+            fields[name], i = _decode(data, i + 1 + size)
+        return fields, i
+    raise ClarityDecodeError(f"Unknown Clarity type id {kind}")
+
+def encode_value(value) -> bytes:
+    """Serialize a decoded Python value back to wire format (used by fake nodes).
+
+    Ints become ``uint``; use the ``*_cv`` helpers for anything ambiguous.
+    """
+    if value is None:
+        return bytes([_NONE])
+    if isinstance(value, bool):
+        return bool_cv(value)
+    if isinstance(value, int):
+        return uint_cv(value)
+    if isinstance(value, str):
+        if value.startswith("0x"):
+            return buffer_cv(bytes.fromhex(value[2:]))
+        if value[:2] in ("SP", "ST", "SM", "SN") and len(value.partition(".")[0]) >= 39:
+            return principal_cv(value)
+        return string_ascii_cv(value)
+    if isinstance(value, list):
+        return bytes([_LIST]) + len(value).to_bytes(4, "big") + b"".join(encode_value(v) for v in value)
+    if isinstance(value, dict):
+        if len(value) == 1 and ("ok" in value or "err" in value):
+            key, inner = next(iter(value.items()))
+            return bytes([_OK if key == "ok" else _ERR]) + encode_value(inner)
+        out = bytes([_TUPLE]) + len(value).to_bytes(4, "big")
+        for name in sorted(value):
+            data = name.encode("ascii")
+            out += bytes([len(data)]) + data + encode_value(value[name])
+        return out
+    raise TypeError(f"Cannot encode {type(value).__name__} as a Clarity value")
@@ -1,13 +1,41 @@
 import os
-import json as _json
-from google import genai
 import asyncio
+import threading
+import json as _json
 import re
+from services.intent_cache import IntentCache
+from services.intent_parser import RuleIntentParser
+from services.call_limiter import CallLimiter
+from services.metrics import metrics
 
 class GeminiService:
-    def __init__(self):
-        self.client = genai.Client()
+    def __init__(self, intent_cache: IntentCache = None, fast_parser: RuleIntentParser = None):
+        # Built on first use: importing google.genai is most of the app's import time
+        self._client = None
+        self._client_lock = threading.Lock()
         self.model = "gemini-1.5-flash"
+        self.intent_cache = intent_cache or IntentCache()
+        self.fast_parser = fast_parser or RuleIntentParser()
+        self.fast_path_hits = 0
+        # Dedicated pool + limiter so a burst of model calls cannot starve the default executor
+        self.limiter = CallLimiter("gemini")
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:  # model calls run on the limiter's threads
+                if self._client is None:
+                    from google import genai
+                    self._client = genai.Client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    async def warm_up(self):
+        """Import the SDK and build the client off the event loop."""
+        await asyncio.to_thread(lambda: self.client)
 
     def _extract_json(self, text):
         # Try to find the first {...} block in the response
@@ -17,6 +45,20 @@ class GeminiService:
         raise ValueError("No JSON object found")
 
     async def extract_intent(self, prompt: str) -> dict:
+        # Structured trade commands are parsed locally; only ambiguous prompts reach the model
+        fast = self.fast_parser.extract(prompt)
+        if fast is not None:
+            self.fast_path_hits += 1
+            return fast
+        cached = self.intent_cache.get(prompt)
+        if cached is not None:
+            return cached
+        result = await self.extract_intent_llm(prompt)
+        if "error" not in result:
+            self.intent_cache.put(prompt, result)
+        return result
+
+    async def extract_intent_llm(self, prompt: str) -> dict:
         system_prompt = (
             "You are an intent extraction agent. Given a user prompt, extract the intent (action) and any entities (parameters). "
             "Respond ONLY with a valid JSON object, no commentary, no markdown, no code block, no explanation. "
@@ -30,29 +72,63 @@ class GeminiService:
                 contents=f"{system_prompt}\n\n{prompt}"
             )
             return response
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, sync_call)
+        with metrics.track("gemini", "intent"):
+            response = await self.limiter.run(sync_call)
         try:
             parsed = self._extract_json(response.text)
             return parsed | {"raw_gemini": response}
         except Exception as e:
             return {"intent": "unknown", "entities": {}, "raw_gemini": str(e), "error": "Failed to parse Gemini response"}
 
-    async def chat(self, history: list, message: str) -> str:
+    def _chat_prompt(self, history: list, message: str, summary: str = None) -> str:
         # history: list of {"role": ..., "content": ...}
+        contents = []
+        if summary:
+            contents.append(f"Summary of the earlier conversation: {summary}")
+        for msg in history:
+            contents.append(f"{msg['role'].capitalize()}: {msg['content']}")
+        contents.append(f"User: {message}")
+        return "\n".join(contents)
+
+    async def chat(self, history: list, message: str, summary: str = None) -> str:
         def sync_call():
-            contents = []
-            for msg in history:
-                contents.append(f"{msg['role'].capitalize()}: {msg['content']}")
-            contents.append(f"User: {message}")
-            prompt = "\n".join(contents)
             response = self.client.models.generate_content(
                 model=self.model,
-                contents=prompt
+                contents=self._chat_prompt(history, message, summary)
             )
             return response
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, sync_call)
+        with metrics.track("gemini", "chat"):
+            response = await self.limiter.run(sync_call)
+        return response.text
+
+    async def chat_stream(self, history: list, message: str, summary: str = None):
+        # Native async streaming: yields text chunks as the model produces them
+        if self._client is None:
+            await self.warm_up()
+        async with self.limiter.slot():
+            with metrics.track("gemini", "chat_stream"):
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=self.model,
+                    contents=self._chat_prompt(history, message, summary)
+                )
+                async for chunk in stream:
+                    if chunk.text:
+                        yield chunk.text
+
+    async def summarize(self, summary: str, messages: list, max_tokens: int) -> str:
+        """Fold ``messages`` into the running conversation ``summary``."""
+        instructions = (
+            f"Update the summary of a conversation with the messages below. Keep it under {max_tokens} tokens. "
+            "Keep token symbols, amounts, addresses and decisions; drop small talk. Reply with the summary only."
+        )
+        transcript = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+        def sync_call():
+            return self.client.models.generate_content(
+                model=self.model,
+                contents=f"{instructions}\n\nCurrent summary: {summary or '(none)'}\n\nMessages:\n{transcript}"
+            )
+        with metrics.track("gemini", "summarize"):
+            response = await self.limiter.run(sync_call)
         return response.text
 
     def send_prompt(self, prompt: str) -> dict:
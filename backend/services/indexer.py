@@ -0,0 +1,508 @@
+"""Incremental indexer for contract ``print`` events.
+
+Consumes blocks from a pluggable source and materializes the trade events of
+bonding-curve.clar (``token-bought``, ``token-sold``, ``token-launched``,
+``token-graduated``), liquidity-pool.clar (``swap``), the order events of
+marketplace.clar (``order-placed``, ``order-cancelled``, ``order-filled``,
+plus its ``trading-fees-updated`` and ``pause-state-changed`` admin events)
+and the stake, vote and delegation events of staking-pool.clar and
+governance.clar into Mongo:
+
+- ``trades`` / ``order_events`` / ``governance_events``: one doc per event, ``_id`` =
+  ``"<tx_id>:<event_index>"``, ``source`` = ``"chain"`` (intended trades
+  logged by /buy-token have no source)
+- ``user_positions``: per (address, symbol), mirroring ``update-user-position``
+- ``candles``: per-symbol OHLCV buckets of ``INDEXER_CANDLE_INTERVAL`` seconds
+- ``user_stats``: per-address trade count, STX volume, tokens created/traded
+- ``market_orders``: per order-id, the contract's ``orders`` map entry
+- ``market_settings``: the latest fee update and pause change, keyed by event name
+
+Each event gets a ``seq`` (block height * 1e6 + position in block). Derived
+docs record the last ``seq`` they include, so replaying blocks after a crash
+never counts an event twice. On a reorg, events from orphaned blocks are
+deleted and the derived docs they touched are rebuilt from the events left.
+"""
+import asyncio
+import json
+import os
+import time
+from pymongo import ReplaceOne, UpdateOne, DeleteMany
+from services.clarity import decode_hex
+
+SEQ_PER_BLOCK = 1_000_000
+TRADE_TYPES = ("buy", "sell")
+ORDER_EVENTS = ("order-placed", "order-cancelled", "order-filled")
+# Only taken from the marketplace contract; other contracts print the same names
+MARKET_SETTINGS_EVENTS = ("trading-fees-updated", "pause-state-changed")
+STAKING_EVENTS = ("stake", "unstake-requested", "unstake-completed", "rewards-claimed")
+GOVERNANCE_EVENTS = STAKING_EVENTS + (
+    "proposal-created", "vote-cast", "proposal-queued", "proposal-executed", "proposal-cancelled",
+    "votes-delegated", "votes-undelegated",
+)
+EVENT_COLLECTIONS = ("trades", "order_events", "governance_events")
+# marketplace.clar ORDER-SIDE-*, ORDER-TYPE-* and ORDER-STATUS-* constants
+ORDER_SIDES = {0: "buy", 1: "sell"}
+ORDER_TYPES = {0: "market", 1: "limit"}
+ORDER_STATUSES = {0: "open", 1: "filled", 2: "cancelled", 3: "partial"}
+
+class IndexerError(Exception):
+    pass
+
+class FileReplaySource:
+    """Blocks from a JSON-lines file, one block per line::
+
+        {"height": 101, "hash": "0x..", "parent_hash": "0x..", "timestamp": 1700000000,
+         "events": [{"tx_id": "0x..", "contract": "SP...bonding-curve", "sender": "SP...",
+                     "value": {"event": "token-bought", ...}}]}
+
+    An event ``value`` may also be the node's serialized form, ``{"hex": "0x.."}``.
+    A reorg is just a later line re-using a height with a different hash.
+    The cursor is the number of lines consumed. With ``follow`` the file is
+    tailed; ``None`` is yielded whenever the end is reached. The file is read
+    in chunks of about ``chunk_bytes`` in a worker thread, off the event loop.
+    """
+
+    def __init__(self, path: str, follow: bool = False, poll_interval: float = None, chunk_bytes: int = 1 << 20):
+        self.path = path
+        self.follow = follow
+        self.poll_interval = poll_interval or float(os.getenv("INDEXER_POLL_INTERVAL", "1"))
+        self.chunk_bytes = chunk_bytes
+
+    async def blocks(self, cursor: int = 0):
+        line_no = 0
+        f = await asyncio.to_thread(open, self.path)
+        try:
+            while True:
+                lines = await asyncio.to_thread(f.readlines, self.chunk_bytes)
+                if not lines:
+                    if not self.follow:
+                        return
+                    yield line_no, None
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                for line in lines:
+                    line_no += 1
+                    if line_no <= cursor or not line.strip():
+                        continue
+                    yield line_no, json.loads(line)
+        finally:
+            f.close()
+
+def _print_value(event: dict) -> dict:
+    value = event.get("value") or {}
+    if "hex" in value:
+        value = decode_hex(value["hex"])
+    return value if isinstance(value, dict) else {}
+
+def parse_events(block: dict, pool_symbols: dict = None, marketplace: str = "marketplace") -> list:
+    """Trade and order-event docs for the events of one block, in block order."""
+    pool_symbols = pool_symbols or {}
+    docs = []
+    for position, event in enumerate(block.get("events", [])):
+        value = _print_value(event)
+        kind = value.get("event")
+        contract = event.get("contract", "").rpartition(".")[2]
+        doc = {
+            "_id": f"{event['tx_id']}:{event.get('event_index', position)}",
+            "source": "chain",
+            "seq": block["height"] * SEQ_PER_BLOCK + position,
+            "block": block["height"],
+            "blockHash": block["hash"],
+            "timestamp": block.get("timestamp", 0),
+            "txId": event["tx_id"],
+            "contract": contract,
+        }
+        if kind == "token-bought":
+            doc.update(type="buy", symbol=value["symbol"], trader=value["buyer"],
+                       amount=value["amount"], stx=value["cost"], fee=value["fee"])
+        elif kind == "token-sold":
+            doc.update(type="sell", symbol=value["symbol"], trader=value["seller"],
+                       amount=value["amount"], stx=value["received"], fee=value["fee"])
+        elif kind == "swap":
+            symbol = pool_symbols.get(contract, contract)
+            if "stx-in" in value:
+                doc.update(type="buy", symbol=symbol, trader=value["trader"],
+                           amount=value["token-out"], stx=value["stx-in"], fee=value["fee"])
+            else:
+                doc.update(type="sell", symbol=symbol, trader=value["trader"],
+                           amount=value["token-in"], stx=value["stx-out"], fee=value["fee"])
+        elif kind == "token-launched":
+            doc.update(type="launch", symbol=value["symbol"], trader=value["creator"],
+                       amount=value.get("max-supply", 0), stx=0, fee=0)
+        elif kind == "token-graduated":
+            doc.update(type="graduate", symbol=value["symbol"], trader=event.get("sender", ""),
+                       amount=value.get("supply", 0), stx=value.get("reserve-balance", 0), fee=0)
+        elif kind == "order-placed":
+            doc.update(type=kind, orderId=value["order-id"], trader=value["trader"], symbol=value["symbol"],
+                       side=ORDER_SIDES.get(value["side"], "sell"), orderType=ORDER_TYPES[value["order-type"]],
+                       price=value["price"], amount=value["amount"])
+        elif kind == "order-cancelled":
+            doc.update(type=kind, orderId=value["order-id"], trader=value["trader"])
+        elif kind == "order-filled":
+            doc.update(type=kind, orderId=value["order-id"], trader=value["filler"], amount=value["fill-amount"],
+                       price=value["fill-price"], fee=value["fee"], status=ORDER_STATUSES[value["new-status"]])
+        elif kind in MARKET_SETTINGS_EVENTS and contract == marketplace:
+            doc.update(type=kind, trader=event.get("sender", ""))
+            if kind == "trading-fees-updated":
+                doc.update(makerFee=value["maker-fee"], takerFee=value["taker-fee"])
+            else:
+                doc["paused"] = value["paused"]
+        elif kind in STAKING_EVENTS:
+            doc.update(type=kind, trader=value["staker"], amount=value.get("amount", 0))
+            if "total" in value:
+                doc["total"] = value["total"]
+        elif kind == "proposal-created":
+            doc.update(type=kind, proposalId=value["proposal-id"], trader=value["proposer"], title=value["title"],
+                       startBlock=value["start-block"], endBlock=value["end-block"])
+        elif kind == "vote-cast":
+            doc.update(type=kind, proposalId=value["proposal-id"], trader=value["voter"], support=value["support"],
+                       votingPower=value["voting-power"])
+        elif kind in ("proposal-queued", "proposal-executed", "proposal-cancelled"):
+            doc.update(type=kind, proposalId=value["proposal-id"], trader=value.get("cancelled-by", ""))
+        elif kind == "votes-delegated":
+            doc.update(type=kind, trader=value["delegator"], delegate=value["delegate"])
+        elif kind == "votes-undelegated":
+            doc.update(type=kind, trader=value["delegator"])
+        else:
+            continue
+        if doc["type"] in TRADE_TYPES:
+            doc["price"] = doc["stx"] / doc["amount"] if doc["amount"] else 0.0
+        docs.append(doc)
+    return docs
+
+# --- derived docs; each apply_* folds one event into a doc (None = new) ---
+def position_key(trade: dict) -> str:
+    return f"{trade['trader']}:{trade['symbol']}"
+
+def apply_position(pos: dict, trade: dict) -> dict:
+    # Same integer arithmetic as update-user-position in bonding-curve.clar
+    pos = pos or {"address": trade["trader"], "symbol": trade["symbol"], "amount": 0,
+                  "totalSpent": 0, "averagePrice": 0, "lastTrade": 0, "trades": 0}
+    amount, spent = pos["amount"], pos["totalSpent"]
+    if trade["type"] == "buy":
+        amount, spent = amount + trade["amount"], spent + trade["stx"]
+    elif amount:
+        sold = min(trade["amount"], amount)
+        spent -= spent * sold // amount
+        amount -= sold
+    pos.update(amount=amount, totalSpent=spent, averagePrice=spent // amount if amount else 0,
+               lastTrade=trade["block"], trades=pos["trades"] + 1)
+    return pos
+
+def candle_key(trade: dict, interval: int) -> str:
+    return f"{trade['symbol']}:{interval}:{trade['timestamp'] // interval * interval}"
+
+def apply_candle(candle: dict, trade: dict, interval: int) -> dict:
+    price = trade["price"]
+    if candle is None:
+        return {"symbol": trade["symbol"], "interval": interval,
+                "bucket": trade["timestamp"] // interval * interval,
+                "open": price, "high": price, "low": price, "close": price,
+                "volume": trade["amount"], "stxVolume": trade["stx"], "trades": 1,
+                "firstTs": trade["timestamp"], "lastTs": trade["timestamp"]}
+    candle.update(high=max(candle["high"], price), low=min(candle["low"], price), close=price,
+                  volume=candle["volume"] + trade["amount"], stxVolume=candle["stxVolume"] + trade["stx"],
+                  trades=candle["trades"] + 1, lastTs=trade["timestamp"])
+    return candle
+
+def apply_user_stats(stats: dict, trade: dict) -> dict:
+    stats = stats or {"address": trade["trader"], "trades": 0, "volume": 0, "tokensCreated": 0, "symbols": []}
+    if trade["type"] == "launch":
+        stats["tokensCreated"] += 1
+    elif trade["type"] in TRADE_TYPES:
+        stats["trades"] += 1
+        stats["volume"] += trade["stx"]
+        if trade["symbol"] not in stats["symbols"]:
+            stats["symbols"].append(trade["symbol"])
+    return stats
+
+def _event_collection(event: dict) -> str:
+    if event["type"] in ORDER_EVENTS or event["type"] in MARKET_SETTINGS_EVENTS:
+        return "order_events"
+    return "governance_events" if event["type"] in GOVERNANCE_EVENTS else "trades"
+
+def apply_order(order: dict, event: dict) -> dict:
+    # Same transitions as place-*-order, cancel-order and fill-order
+    if event["type"] == "order-placed":
+        return {"orderId": event["orderId"], "trader": event["trader"], "symbol": event["symbol"],
+                "side": event["side"], "orderType": event["orderType"], "price": event["price"],
+                "amount": event["amount"], "filled": 0, "status": "open", "createdAt": event["block"]}
+    if order is None:
+        return None  # placed before the feed started
+    if event["type"] == "order-cancelled":
+        order["status"] = "cancelled"
+    else:
+        order["filled"] += event["amount"]
+        order["status"] = event["status"]
+    return order
+
+def apply_market_setting(setting: dict, event: dict) -> dict:
+    # The latest event of each kind wins, like the data-vars set-trading-fees / set-paused write
+    if event["type"] == "trading-fees-updated":
+        return {"makerFee": event["makerFee"], "takerFee": event["takerFee"], "block": event["block"]}
+    return {"paused": event["paused"], "block": event["block"]}
+
+class ContractIndexer:
+    """Indexes blocks from ``source`` into Mongo, resuming from a checkpoint.
+
+    Blocks are buffered and written every ``batch_blocks`` blocks (or when the
+    source is idle): one upsert bulk per event collection and one replace bulk
+    per derived collection. ``on_block(height)`` is called after each write and
+    ``on_orders(docs, removed_ids)`` whenever ``market_orders`` docs change,
+    and ``on_market_settings(docs, removed_ids)`` likewise for ``market_settings``.
+    ``on_trades(trades)`` gets the trades newly counted into ``candles``,
+    ``on_activity(trades)`` every ``trades`` doc newly counted into ``user_stats``
+    (launches included) and
+    ``on_candles(docs, removed_ids)`` the candles rebuilt after a reorg.
+    ``on_governance(events)`` gets each batch of staking/governance events and
+    ``on_governance_rollback(height)`` is called when blocks from ``height``
+    on are orphaned.
+    """
+
+    def __init__(self, mongo_service, source, batch_blocks: int = None, candle_interval: int = None,
+                 reorg_depth: int = None, pool_symbols: dict = None, on_block=None, on_orders=None,
+                 on_trades=None, on_candles=None, on_governance=None, on_governance_rollback=None,
+                 on_market_settings=None, on_activity=None, marketplace: str = None):
+        self.mongo_service = mongo_service
+        self.source = source
+        self.batch_blocks = batch_blocks or int(os.getenv("INDEXER_BATCH_BLOCKS", "50"))
+        self.candle_interval = candle_interval or int(os.getenv("INDEXER_CANDLE_INTERVAL", "60"))
+        self.reorg_depth = reorg_depth or int(os.getenv("INDEXER_REORG_DEPTH", "64"))
+        if pool_symbols is None:
+            # "liquidity-pool:VIBE,other-pool:MOON"
+            pairs = [p.split(":", 1) for p in os.getenv("INDEXER_POOL_SYMBOLS", "").split(",") if ":" in p]
+            pool_symbols = {contract: symbol for contract, symbol in pairs}
+        self.pool_symbols = pool_symbols
+        self.marketplace = marketplace or os.getenv("INDEXER_MARKETPLACE_CONTRACT", "marketplace")
+        self.on_block = on_block
+        self.on_orders = on_orders
+        self.on_market_settings = on_market_settings
+        self.on_trades = on_trades
+        self.on_activity = on_activity
+        self.on_candles = on_candles
+        self.on_governance = on_governance
+        self.on_governance_rollback = on_governance_rollback
+        self.cursor = 0
+        self.recent = {}  # height -> hash for the last reorg_depth blocks
+        self._pending = []
+        self._task = None
+        self.blocks = 0
+        self.events = 0
+        self.reorgs = 0
+        self.rolled_back = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def tip(self):
+        return max(self.recent) if self.recent else None
+
+    # --- lifecycle ---
+    async def start(self):
+        await self.load_checkpoint()
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            await self.flush()
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Indexer error at block {self.tip}: {e}")
+                # Unwritten blocks are dropped and read again from the last checkpoint
+                self._pending = []
+                while True:
+                    await asyncio.sleep(5)
+                    try:
+                        await self.load_checkpoint()
+                        break
+                    except Exception as e:
+                        print(f"Indexer checkpoint reload failed: {e}")
+
+    async def run(self):
+        """Index until the source is exhausted."""
+        async for cursor, block in self.source.blocks(self.cursor):
+            if block is None:
+                if self._pending:
+                    await self.flush()
+                continue
+            await self.ingest(block)
+            self.cursor = cursor
+            if len(self._pending) >= self.batch_blocks:
+                await self.flush()
+        if self._pending:
+            await self.flush()
+
+    # --- checkpoint ---
+    async def load_checkpoint(self):
+        state = await self.mongo_service.find_doc("indexer_state", {"_id": "contracts"})
+        if state:
+            self.cursor = state["cursor"]
+            self.recent = {int(h): block_hash for h, block_hash in state["recent"]}
+        else:
+            # Nothing written yet: start over from the beginning of the source
+            self.cursor, self.recent = 0, {}
+
+    async def _save_checkpoint(self):
+        await self.mongo_service.replace_doc("indexer_state", {"_id": "contracts"}, {
+            "cursor": self.cursor,
+            "height": self.tip,
+            "recent": [[h, block_hash] for h, block_hash in sorted(self.recent.items())],
+        })
+
+    # --- blocks ---
+    async def ingest(self, block: dict):
+        height, tip = block["height"], self.tip
+        if tip is not None and self.recent.get(height) == block["hash"]:
+            return  # already indexed
+        if tip is not None and not (height == tip + 1 and block.get("parent_hash") == self.recent[tip]):
+            if self.recent.get(height - 1) != block.get("parent_hash"):
+                raise IndexerError(f"block {height} does not extend the last {len(self.recent)} indexed blocks")
+            await self.flush()
+            await self.rollback(height)
+        self.recent[height] = block["hash"]
+        for old in [h for h in self.recent if h <= height - self.reorg_depth]:
+            del self.recent[old]
+        self._pending.append(block)
+        self.blocks += 1
+
+    async def flush(self):
+        start = time.perf_counter()
+        events = [e for block in self._pending for e in parse_events(block, self.pool_symbols, self.marketplace)]
+        heights = [block["height"] for block in self._pending]
+        self._pending = []
+        governance = []
+        for collection in EVENT_COLLECTIONS:
+            docs = [e for e in events if _event_collection(e) == collection]
+            await self.mongo_service.bulk_write(collection, [
+                UpdateOne({"_id": e["_id"]}, {"$setOnInsert": e}, upsert=True) for e in docs
+            ])
+            if collection == "governance_events":
+                governance = docs
+        if events:
+            await self._apply(events)
+            self.events += len(events)
+        if governance and self.on_governance:
+            self.on_governance(governance)
+        await self._save_checkpoint()
+        self.flushes += 1
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        if self.on_block and heights:
+            self.on_block(max(heights))
+
+    def _derived(self):
+        # (event collection, derived collection, event types, key, fold, rebuild field)
+        interval = self.candle_interval
+        return (
+            ("trades", "user_positions", TRADE_TYPES, position_key, apply_position, "trader"),
+            ("trades", "candles", TRADE_TYPES, lambda t: candle_key(t, interval),
+             lambda c, t: apply_candle(c, t, interval), "symbol"),
+            ("trades", "user_stats", None, lambda t: t["trader"], apply_user_stats, "trader"),
+            ("order_events", "market_orders", ORDER_EVENTS, lambda e: e["orderId"], apply_order, "orderId"),
+            ("order_events", "market_settings", MARKET_SETTINGS_EVENTS, lambda e: e["type"], apply_market_setting, "type"),
+        )
+
+    async def _apply(self, events: list):
+        for source, collection, types, key_fn, apply_fn, _ in self._derived():
+            relevant = [e for e in events if _event_collection(e) == source and (types is None or e["type"] in types)]
+            if not relevant:
+                continue
+            keys = {key_fn(e) for e in relevant}
+            docs = {d["_id"]: d for d in await self.mongo_service.find_many(collection, {"_id": {"$in": list(keys)}})}
+            applied = []
+            for e in relevant:
+                key = key_fn(e)
+                doc = docs.get(key)
+                if doc is not None and doc.get("lastSeq", -1) >= e["seq"]:
+                    continue  # replayed after a crash; already counted
+                doc = apply_fn(doc, e)
+                if doc is None:
+                    continue
+                doc["_id"], doc["lastSeq"] = key, e["seq"]
+                docs[key] = doc
+                applied.append(e)
+            changed = [docs[k] for k in keys if k in docs]
+            await self.mongo_service.bulk_write(collection, [
+                ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in changed
+            ])
+            if collection == "market_orders" and self.on_orders:
+                self.on_orders(changed, [])
+            if collection == "market_settings" and self.on_market_settings:
+                self.on_market_settings(changed, [])
+            if collection == "candles" and self.on_trades:
+                self.on_trades(applied)
+            if collection == "user_stats" and self.on_activity:
+                self.on_activity(applied)
+
+    async def rollback(self, height: int):
+        """Undo every indexed block at or above ``height``."""
+        orphaned = []
+        for collection in EVENT_COLLECTIONS:
+            query = {"source": "chain", "block": {"$gte": height}}
+            orphaned += await self.mongo_service.find_many(collection, query)
+            await self.mongo_service.delete_many(collection, query)
+        for h in [h for h in self.recent if h >= height]:
+            del self.recent[h]
+        self.reorgs += 1
+        self.rolled_back += len(orphaned)
+        if self.on_governance_rollback and any(_event_collection(e) == "governance_events" for e in orphaned):
+            self.on_governance_rollback(height)
+        if orphaned:
+            await self._rebuild(orphaned)
+        await self._save_checkpoint()
+
+    async def _rebuild(self, orphaned: list):
+        # Recompute every derived doc an orphaned event touched from the events left
+        for source, collection, types, key_fn, apply_fn, field in self._derived():
+            touched = [e for e in orphaned if _event_collection(e) == source and (types is None or e["type"] in types)]
+            if not touched:
+                continue
+            keys = {key_fn(e) for e in touched}
+            remaining = await self.mongo_service.find_many(
+                source, {"source": "chain", field: {"$in": list({e[field] for e in touched})}}, sort=[("seq", 1)])
+            docs = {}
+            for e in remaining:
+                key = key_fn(e)
+                if (types is None or e["type"] in types) and key in keys:
+                    doc = apply_fn(docs.get(key), e)
+                    if doc is not None:
+                        doc["_id"], doc["lastSeq"] = key, e["seq"]
+                        docs[key] = doc
+            ops = [ReplaceOne({"_id": key}, doc, upsert=True) for key, doc in docs.items()]
+            gone = [key for key in keys if key not in docs]
+            if gone:
+                ops.append(DeleteMany({"_id": {"$in": gone}}))
+            await self.mongo_service.bulk_write(collection, ops)
+            if collection == "market_orders" and self.on_orders:
+                self.on_orders(list(docs.values()), gone)
+            if collection == "market_settings" and self.on_market_settings:
+                self.on_market_settings(list(docs.values()), gone)
+            if collection == "candles" and self.on_candles:
+                self.on_candles(list(docs.values()), gone)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "height": self.tip,
+            "cursor": self.cursor,
+            "blocks": self.blocks,
+            "events": self.events,
+            "pendingBlocks": len(self._pending),
+            "reorgs": self.reorgs,
+            "rolledBackEvents": self.rolled_back,
+            "flushes": self.flushes,
+            "lastFlushMs": self.last_flush_ms,
+        }
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from difflib import SequenceMatcher
+import copy
+import os
+import re
+import time
+
+_WS = re.compile(r"\s+")
+_NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+def normalize_prompt(prompt: str) -> str:
+    return _WS.sub(" ", prompt.strip().lower()).rstrip(".!?")
+
+class IntentCache:
+    """LRU + TTL cache for extract_intent results.
+
+    Lookups try the exact normalized prompt first. If ``similarity`` is set
+    (0 < similarity < 1), a miss then falls back to the most similar cached
+    prompt with the same numbers in it, so "buy 100 moon" can match
+    "buy 100 $moon" but never "buy 200 moon".
+    """
+
+    def __init__(self, max_size: int = None, ttl: float = None, similarity: float = None):
+        self.max_size = max_size or int(os.getenv("INTENT_CACHE_SIZE", "1024"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("INTENT_CACHE_TTL", "300"))
+        self.similarity = similarity if similarity is not None else float(os.getenv("INTENT_CACHE_SIMILARITY", "0"))
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._by_numbers = {}          # numbers signature -> set of keys
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, prompt: str):
+        key = normalize_prompt(prompt)
+        now = time.monotonic()
+        entry = self._lookup(key, now)
+        if entry is not None:
+            self.hits += 1
+            return copy.deepcopy(entry)
+        if 0 < self.similarity < 1:
+            near = self._nearest(key, now)
+            if near is not None:
+                self.near_hits += 1
+                return copy.deepcopy(near)
+        self.misses += 1
+        return None
+
+    def put(self, prompt: str, result: dict):
+        # The raw SDK response object is neither serializable nor useful to replay
+        value = {k: v for k, v in result.items() if k != "raw_gemini"}
+        key = normalize_prompt(prompt)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        else:
+            self._by_numbers.setdefault(self._signature(key), set()).add(key)
+        self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        while len(self._entries) > self.max_size:
+            old_key, _ = self._entries.popitem(last=False)
+            self._unindex(old_key)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._by_numbers.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "hits": self.hits,
+            "nearHits": self.near_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+        }
+
+    def _lookup(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < now:
+            del self._entries[key]
+            self._unindex(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _nearest(self, key: str, now: float):
+        best_key, best_ratio = None, self.similarity
+        matcher = SequenceMatcher(None, b=key)
+        for candidate in self._by_numbers.get(self._signature(key), ()):
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best_key, best_ratio = candidate, ratio
+        if best_key is None:
+            return None
+        return self._lookup(best_key, now)
+
+    def _signature(self, key: str) -> tuple:
+        return tuple(_NUMBERS.findall(key))
+
+    def _unindex(self, key: str):
+        keys = self._by_numbers.get(self._signature(key))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_numbers[self._signature(key)]
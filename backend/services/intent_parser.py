@@ -0,0 +1,114 @@
+import os
+import re
+
+# Grammar for the structured trade commands the terminal sends most often:
+#   buy 100 $MOON | buy $MOON for 5 STX | sell all PEPE slippage 2%
+#   launch $DOGE | create a token called ROCKET
+# Anything that does not match end-to-end is left to the LLM.
+_AMOUNT = r"(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>k|m)?"
+_SYMBOL = r"(?P<dollar>\$)?(?P<token>[a-z][a-z0-9]{1,31})"
+_STX = r"(?P<stx>\d+(?:\.\d+)?)\s*(?P<stx_unit>k|m)?\s*stx"
+_SLIPPAGE = r"(?:(?:with\s+|max\s+)?(?:max\s+)?slippage\s*(?:of\s*)?(?P<slip>\d+(?:\.\d+)?)\s*%|(?P<slip2>\d+(?:\.\d+)?)\s*%\s*slippage)"
+_TRAILING = r"(?:\s+tokens?)?"
+
+_TRADE = re.compile(
+    r"(?:please\s+)?(?P<verb>buy|purchase|sell|dump)\s+"
+    r"(?:(?P<all>all|everything)\s+(?:(?:of\s+)?(?:my\s+)?))?"
+    r"(?:" + _AMOUNT + r"\s+)?"
+    + _SYMBOL + _TRAILING +
+    r"(?:\s+(?:for|with|worth\s+of)\s+" + _STX + r")?"
+    r"(?:\s*,?\s+" + _SLIPPAGE + r")?",
+    re.IGNORECASE,
+)
+
+_STX_FIRST = re.compile(
+    r"(?:please\s+)?(?P<verb>buy|purchase)\s+" + _STX + r"\s+(?:of|worth\s+of)\s+" + _SYMBOL + _TRAILING +
+    r"(?:\s*,?\s+" + _SLIPPAGE + r")?",
+    re.IGNORECASE,
+)
+
+_LAUNCH = re.compile(
+    r"(?:please\s+)?(?P<verb>launch|create|deploy|mint)\s+"
+    r"(?:(?:a|an|my|new|the)\s+)*(?:(?:meme|vibe)\s+)?(?P<noun>token|coin)?\s*(?P<named>(?:called|named|symbol)\s+)?"
+    + _SYMBOL + _TRAILING,
+    re.IGNORECASE,
+)
+
+_VERBS = {"buy": "buy", "purchase": "buy", "sell": "sell", "dump": "sell",
+          "launch": "launch", "create": "launch", "deploy": "launch", "mint": "launch"}
+
+# Words the symbol group can swallow that mean the sentence is not a command
+_NOT_SYMBOLS = {"a", "an", "the", "token", "tokens", "coin", "some", "it", "what", "how", "me",
+                "more", "now", "all", "my", "new", "why", "when", "should", "stx", "called", "named"}
+
+_MULTIPLIERS = {None: 1, "k": 1_000, "m": 1_000_000}
+
+def _number(value: str, unit: str = None):
+    n = float(value) * _MULTIPLIERS[unit.lower() if unit else None]
+    return int(n) if n.is_integer() else n
+
+class RuleIntentParser:
+    """Deterministic parser for simple buy/sell/launch commands.
+
+    Returns the same ``{"intent", "entities"}`` shape as
+    ``GeminiService.extract_intent`` plus a ``confidence`` in [0, 1], or
+    ``None`` when the prompt is not a recognised command.
+    """
+
+    def __init__(self, min_confidence: float = None):
+        self.min_confidence = (
+            min_confidence if min_confidence is not None
+            else float(os.getenv("INTENT_FAST_PATH_MIN_CONFIDENCE", "0.9"))
+        )
+
+    def parse(self, prompt: str):
+        text = prompt.strip().rstrip(".!")
+        if not text or len(text) > 120 or "?" in text:
+            return None
+        for pattern in (_STX_FIRST, _TRADE, _LAUNCH):
+            match = pattern.fullmatch(text)
+            if match:
+                return self._build(match)
+        return None
+
+    def extract(self, prompt: str):
+        """Return a parse result only if it is confident enough to skip the LLM."""
+        result = self.parse(prompt)
+        if result is None or result["confidence"] < self.min_confidence:
+            return None
+        return result
+
+    def _build(self, match) -> dict:
+        groups = match.groupdict()
+        token = groups["token"]
+        if token.lower() in _NOT_SYMBOLS:
+            return None
+        intent = _VERBS[groups["verb"].lower()]
+        entities = {"token": token.upper()}
+        if groups.get("amount"):
+            entities["amount"] = _number(groups["amount"], groups.get("unit"))
+            if not entities["amount"]:
+                return None
+        elif groups.get("all"):
+            entities["amount"] = "all"
+        if groups.get("stx"):
+            entities["stxAmount"] = _number(groups["stx"], groups.get("stx_unit"))
+            if not entities["stxAmount"]:
+                return None
+        slippage = groups.get("slip") or groups.get("slip2")
+        if slippage:
+            entities["slippage"] = _number(slippage)
+
+        # An explicit $SYMBOL is unambiguous, and so is an upper-case ticker in a
+        # trade unless the whole message is shouted. A bare word ("buy bitcoin")
+        # may be a name the LLM should resolve; after a launch verb any word
+        # ("CREATE WALLET", "Deploy NFT") is more likely a request about
+        # something else, so only "$X" or "token called X" counts there.
+        ticker = token.isupper() and not match.string.isupper()
+        if groups.get("dollar") or (ticker and intent != "launch"):
+            confidence = 1.0
+        elif groups.get("noun") and groups.get("named") or "amount" in entities or "stxAmount" in entities:
+            confidence = 0.9
+        else:
+            confidence = 0.7
+        return {"intent": intent, "entities": entities, "confidence": confidence, "source": "rules"}
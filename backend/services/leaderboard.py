@@ -0,0 +1,185 @@
+"""In-memory XP leaderboard; the backend half of ``leaderboard-entries`` in
+contracts/xp-system.clar, whose ``rank`` field is left for the backend.
+
+Entries are kept in an order-statistic list: sorted buckets of at most
+``load`` keys plus a Fenwick tree over bucket sizes, so insert, delete and
+rank are O(log n) and a page of k entries is O(log n + k).
+"""
+from bisect import bisect_left, insort
+from typing import Iterable, List, Optional, Tuple
+
+class OrderStatisticList:
+    def __init__(self, load: int = 512):
+        self._load = load
+        self._lists = []
+        self._maxes = []
+        self._tree = []
+        self._len = 0
+
+    @classmethod
+    def from_sorted(cls, keys: list, load: int = 512):
+        osl = cls(load)
+        osl._lists = [keys[i:i + load] for i in range(0, len(keys), load)]
+        osl._maxes = [sub[-1] for sub in osl._lists]
+        osl._len = len(keys)
+        osl._build_tree()
+        return osl
+
+    def __len__(self):
+        return self._len
+
+    def _build_tree(self):
+        tree = [len(sub) for sub in self._lists]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, pos: int, delta: int):
+        tree = self._tree
+        while pos < len(tree):
+            tree[pos] += delta
+            pos |= pos + 1
+
+    def _prefix(self, pos: int) -> int:
+        # number of keys in buckets [0, pos)
+        total = 0
+        while pos > 0:
+            total += self._tree[pos - 1]
+            pos &= pos - 1
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        # (bucket, offset) of the key at global position ``index``
+        pos = 0
+        bit = 1 << (len(self._tree).bit_length())
+        while bit:
+            nxt = pos + bit
+            if nxt <= len(self._tree) and self._tree[nxt - 1] <= index:
+                index -= self._tree[nxt - 1]
+                pos = nxt
+            bit >>= 1
+        return pos, index
+
+    def add(self, key):
+        if not self._maxes:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._build_tree()
+            return
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._lists[pos].append(key)
+            self._maxes[pos] = key
+        else:
+            insort(self._lists[pos], key)
+        self._len += 1
+        if len(self._lists[pos]) > 2 * self._load:
+            sub = self._lists[pos]
+            self._lists[pos:pos + 1] = [sub[:self._load], sub[self._load:]]
+            self._maxes[pos:pos + 1] = [sub[self._load - 1], sub[-1]]
+            self._build_tree()
+        else:
+            self._tree_add(pos, 1)
+
+    def remove(self, key):
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            raise ValueError(f"{key!r} not in list")
+        sub = self._lists[pos]
+        idx = bisect_left(sub, key)
+        if idx == len(sub) or sub[idx] != key:
+            raise ValueError(f"{key!r} not in list")
+        del sub[idx]
+        self._len -= 1
+        if not sub:
+            del self._lists[pos]
+            del self._maxes[pos]
+            self._build_tree()
+        else:
+            self._maxes[pos] = sub[-1]
+            self._tree_add(pos, -1)
+
+    def first(self):
+        return self._lists[0][0] if self._lists else None
+
+    def bisect_left(self, key) -> int:
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return self._len
+        return self._prefix(pos) + bisect_left(self._lists[pos], key)
+
+    def islice(self, start: int, stop: int):
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return
+        pos, idx = self._locate(start)
+        remaining = stop - start
+        while remaining > 0:
+            sub = self._lists[pos]
+            chunk = sub[idx:idx + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            pos, idx = pos + 1, 0
+
+class Leaderboard:
+    """Users ranked by XP, highest first. Users with equal XP share a rank."""
+
+    def __init__(self, load: int = 512):
+        self._load = load
+        self._xp = {}
+        self._entries = OrderStatisticList(load)
+
+    def __len__(self):
+        return len(self._xp)
+
+    def load(self, pairs: Iterable[Tuple[str, int]]):
+        """Replace the contents from (address, xp) pairs, e.g. a scan of ``users``."""
+        self._xp = {address: int(xp or 0) for address, xp in pairs}
+        keys = sorted((-xp, address) for address, xp in self._xp.items())
+        self._entries = OrderStatisticList.from_sorted(keys, self._load)
+
+    def update(self, address: str, xp: int):
+        xp = int(xp or 0)
+        old = self._xp.get(address)
+        if old == xp:
+            return
+        if old is not None:
+            self._entries.remove((-old, address))
+        self._entries.add((-xp, address))
+        self._xp[address] = xp
+
+    def remove(self, address: str):
+        old = self._xp.pop(address, None)
+        if old is not None:
+            self._entries.remove((-old, address))
+
+    def xp(self, address: str) -> Optional[int]:
+        return self._xp.get(address)
+
+    def rank(self, address: str) -> Optional[int]:
+        xp = self._xp.get(address)
+        if xp is None:
+            return None
+        return self._rank_of(xp)
+
+    def _rank_of(self, xp: int) -> int:
+        # 1 + number of users with strictly more XP
+        return self._entries.bisect_left((-xp, "")) + 1
+
+    def top(self, limit: int = 10, offset: int = 0) -> List[Tuple[int, str, int]]:
+        """One page of (rank, address, xp)."""
+        page = []
+        rank = prev_xp = None
+        for position, (neg_xp, address) in enumerate(self._entries.islice(offset, offset + limit), offset):
+            xp = -neg_xp
+            if rank is None:
+                rank = self._rank_of(xp)
+            elif xp != prev_xp:
+                rank = position + 1
+            prev_xp = xp
+            page.append((rank, address, xp))
+        return page
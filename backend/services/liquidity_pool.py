@@ -0,0 +1,85 @@
+"""Off-chain mirror of the swap math in contracts/liquidity-pool.clar.
+
+Same integer semantics as ``bonding_curve``: 128-bit unsigned values,
+truncating division, ``ClarityArithmeticError`` where the contract would
+abort on overflow. A swap the contract would reject (zero input, or zero
+output from insufficient liquidity) quotes an ``amountOut`` of 0.
+"""
+from dataclasses import dataclass, replace
+import os
+
+import numpy as np
+
+from services.bonding_curve import ClarityArithmeticError, UINT_MAX, _uint
+
+_INT64_SAFE = 2 ** 62
+
+@dataclass
+class PoolState:
+    name: str
+    reserve_stx: int
+    reserve_token: int
+    trading_fee: int = 30  # basis points
+
+    @classmethod
+    def from_clarity(cls, name: str, reserves: dict, trading_fee: int = None):
+        """Build from a ``get-reserves`` result; the contract has no getter for ``trading-fee``."""
+        reserves = reserves.get("ok", reserves)
+        fee = trading_fee if trading_fee is not None else int(os.getenv("LIQUIDITY_POOL_FEE_BPS", "30"))
+        return cls(name=name, reserve_stx=int(reserves["stx"]), reserve_token=int(reserves["token"]), trading_fee=fee)
+
+    def reserves(self, side: str) -> tuple:
+        """(reserve_in, reserve_out) for a buy (STX in) or sell (token in)."""
+        return (self.reserve_stx, self.reserve_token) if side == "buy" else (self.reserve_token, self.reserve_stx)
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+    denominator = _uint(reserve_in + amount_in)
+    if denominator == 0:
+        raise ClarityArithmeticError("division by zero")
+    return _uint(amount_in * reserve_out) // denominator
+
+def quote_swap(pool: PoolState, side: str, amount_in: int) -> dict:
+    """Same result as ``quote-swap-stx-for-token`` (buy) / ``quote-swap-token-for-stx`` (sell)."""
+    reserve_in, reserve_out = pool.reserves(side)
+    fee = _uint(amount_in * pool.trading_fee) // 10000
+    if amount_in == 0:
+        return {"amountIn": 0, "fee": 0, "amountOut": 0}
+    out = get_amount_out(amount_in - fee, reserve_in, reserve_out)
+    return {"amountIn": amount_in, "fee": fee, "amountOut": out}
+
+def apply_swap(pool: PoolState, side: str, amount_in: int) -> PoolState:
+    """Pool state after ``swap-stx-for-token`` / ``swap-token-for-stx``; the fee stays out of the reserves."""
+    q = quote_swap(pool, side, amount_in)
+    if q["amountOut"] == 0:
+        raise ValueError("swap would be rejected: zero output")
+    after_fee = q["amountIn"] - q["fee"]
+    if side == "buy":
+        return replace(pool, reserve_stx=pool.reserve_stx + after_fee, reserve_token=pool.reserve_token - q["amountOut"])
+    return replace(pool, reserve_stx=pool.reserve_stx - q["amountOut"], reserve_token=pool.reserve_token + after_fee)
+
+def amounts_out(pool: PoolState, side: str, amounts) -> np.ndarray:
+    """``quote_swap(...)["amountOut"]`` for an array of input sizes; 0 where the contract would abort.
+
+    Uses int64 when every intermediate fits, Python ints otherwise.
+    """
+    reserve_in, reserve_out = pool.reserves(side)
+    amounts = [int(a) for a in amounts]
+    largest = max(amounts, default=0)
+    fits = largest * max(reserve_out, pool.trading_fee) < _INT64_SAFE and reserve_in + largest < _INT64_SAFE
+    a = np.array(amounts, dtype=np.int64 if fits else object)
+    after_fee = a - (a * pool.trading_fee) // 10000
+    numerator = after_fee * reserve_out
+    denominator = reserve_in + after_fee
+    ok = (a > 0) & (denominator > 0)
+    if not fits:
+        ok &= (numerator <= UINT_MAX) & (a * pool.trading_fee <= UINT_MAX)
+    return np.where(ok, numerator // np.where(ok, denominator, 1), 0)
+
+def pool_contracts(spec: str = None) -> dict:
+    """symbol -> pool contract names, from ``LIQUIDITY_POOLS`` ("MOON:liquidity-pool,DOGE:doge-pool")."""
+    spec = spec if spec is not None else os.getenv("LIQUIDITY_POOLS", "")
+    pools = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        symbol, _, contract = item.partition(":")
+        pools.setdefault(symbol, []).append(contract or "liquidity-pool")
+    return pools
@@ -0,0 +1,221 @@
+"""Request and dependency metrics in the Prometheus text format.
+
+``MetricsMiddleware`` times every HTTP request by route template (the
+matched path, e.g. ``/staking/{address}``; ``unmatched`` otherwise).
+``metrics.track(dependency, operation)`` times a call to Gemini, the RAG
+server, Mongo or the Stacks node, counting in-flight calls and errors.
+Collectors registered with ``add_collector`` turn the services' existing
+counters (cache hits, queue depths) into samples when ``/metrics`` is
+scraped, so they cost nothing per request.
+
+A request is traced when ``random() < METRICS_TRACE_SAMPLE`` or it carries
+``x-trace: 1``: every ``track`` inside it is recorded as a span, and the
+last ``METRICS_TRACE_BUFFER`` traces are kept for ``/metrics/traces``.
+
+Everything is plain dicts keyed by label tuples; there is no client library.
+"""
+import contextvars
+import functools
+import os
+import random
+import time
+import uuid
+from bisect import bisect_left
+from collections import deque
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple, buckets: tuple = BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, key: tuple, value: float):
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1  # the last bucket slot is +Inf
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple):
+        self.name, self.help, self.labels = name, help, labels
+        self.series = {}
+
+    def inc(self, key: tuple, by: float = 1):
+        self.series[key] = self.series.get(key, 0) + by
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in sorted(self.series.items())]
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+class _Track:
+    """Times one dependency call; usable as ``with`` or ``async with``."""
+    __slots__ = ("metrics", "key", "start")
+
+    def __init__(self, metrics, key: tuple):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.metrics.dependency_in_flight.inc(self.key)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        m = self.metrics
+        m.dependency_in_flight.inc(self.key, -1)
+        m.dependency_seconds.observe(self.key, elapsed)
+        if exc_type is not None and exc_type is not GeneratorExit:  # a closed stream is not a failure
+            m.dependency_errors.inc(self.key + (exc_type.__name__,))
+        trace = _trace.get()
+        if trace is not None:
+            trace["spans"].append({
+                "dependency": self.key[0], "operation": self.key[1],
+                "startMs": round((self.start - trace["_start"]) * 1000, 3), "durationMs": round(elapsed * 1000, 3),
+                "error": exc_type.__name__ if exc_type is not None else None,
+            })
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+class Metrics:
+    def __init__(self, trace_sample: float = None, trace_buffer: int = None):
+        self.trace_sample = trace_sample if trace_sample is not None else float(os.getenv("METRICS_TRACE_SAMPLE", "0"))
+        self.request_seconds = Histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                                         ("route", "method"))
+        self.requests = Counter("http_requests_total", "HTTP requests by route and status.",
+                                ("route", "method", "status"))
+        self.dependency_seconds = Histogram("dependency_call_duration_seconds", "Latency of calls to dependencies.",
+                                            ("dependency", "operation"))
+        self.dependency_in_flight = Gauge("dependency_calls_in_flight", "Dependency calls in progress.",
+                                          ("dependency", "operation"))
+        self.dependency_errors = Counter("dependency_call_errors_total", "Failed dependency calls by exception type.",
+                                         ("dependency", "operation", "error"))
+        self.traces = deque(maxlen=trace_buffer or int(os.getenv("METRICS_TRACE_BUFFER", "100")))
+        self._active = {}  # id(scope) -> scope, for in-flight requests by route
+        self._collectors = []
+
+    def track(self, dependency: str, operation: str) -> _Track:
+        return _Track(self, (dependency, operation))
+
+    def timed(self, dependency: str, operation: str = None):
+        """Decorator form of ``track`` for coroutine functions."""
+        def decorate(fn):
+            key = (dependency, operation or fn.__name__)
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with _Track(self, key):
+                    return await fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def recent_traces(self, limit: int = None) -> list:
+        traces = list(self.traces)[-limit:] if limit else list(self.traces)
+        return [{k: v for k, v in t.items() if k != "_start"} for t in reversed(traces)]
+
+    def add_collector(self, collect):
+        """``collect()`` returns (name, type, help, labels dict, value) samples at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        in_flight = Gauge("http_requests_in_flight", "HTTP requests in progress by route.", ("route",))
+        for scope in list(self._active.values()):
+            route = scope.get("route")
+            in_flight.inc((getattr(route, "path", "unmatched"),))
+        lines = []
+        for metric in (self.request_seconds, self.requests, in_flight, self.dependency_seconds,
+                       self.dependency_in_flight, self.dependency_errors):
+            lines += metric.render()
+        families = {}
+        for collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, help, labels, value in samples:
+                family = families.setdefault(name, [f"# HELP {name} {help}", f"# TYPE {name} {kind}"])
+                family.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {value}")
+        for family in families.values():
+            lines += family
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no per-request task or body wrapping) recording route latency and status."""
+
+    def __init__(self, app, registry: Metrics = None):
+        self.app = app
+        self.metrics = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        m = self.metrics
+        status = [500]
+        trace = None
+        if (m.trace_sample and random.random() < m.trace_sample) or (b"x-trace", b"1") in scope["headers"]:
+            trace = {"traceId": uuid.uuid4().hex, "method": scope["method"], "path": scope["path"],
+                     "startedAt": time.time(), "spans": [], "_start": time.perf_counter()}
+            token = _trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if trace is not None:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace["traceId"].encode())]
+            await send(message)
+
+        active = id(scope)
+        m._active[active] = scope
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            del m._active[active]
+            route = scope.get("route")
+            key = (getattr(route, "path", "unmatched"), scope["method"])
+            m.request_seconds.observe(key, elapsed)
+            m.requests.inc(key + (status[0],))
+            if trace is not None:
+                _trace.reset(token)
+                trace.update(route=key[0], status=status[0], durationMs=round(elapsed * 1000, 3))
+                m.traces.append(trace)
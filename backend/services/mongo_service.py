@@ -1,16 +1,131 @@
+from pymongo import AsyncMongoClient
+import asyncio
+import os
+from services.metrics import metrics
+
+# (collection, keys) for the lookups the endpoints make; create_index is a no-op when one exists
+INDEXES = (
+    ("users", [("address", 1)]),
+    ("achievements", [("address", 1)]),
+    ("quests", [("address", 1)]),
+    ("activity", [("address", 1)]),
+    ("trades", [("symbol", 1), ("timestamp", -1)]),
+    ("trades", [("trader", 1), ("seq", -1)]),  # a user's indexed trades, newest first
+)
+
 class MongoService:
-    def __init__(self, client):
-        self.client = client
-        self.db = client.get_database()
+    def __init__(self, uri: str = None, db_name: str = None, client=None):
+        self.uri = uri or os.getenv("MONGO_URI", "mongodb://localhost:27017")
+        # Pool settings are tunable per deployment; pymongo defaults are 100/0
+        self.client = client or AsyncMongoClient(
+            self.uri,
+            maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+            minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+            maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000")),
+            waitQueueTimeoutMS=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+        )
+        self.db = self.client[db_name or os.getenv("MONGO_DB", "stackable")]
+
+    async def close(self):
+        await self.client.close()
+
+    async def warm_up(self, connections: int = None):
+        """Open ``connections`` pooled connections and create the indexes."""
+        connections = connections or int(os.getenv("MONGO_WARM_CONNECTIONS", "4"))
+        # Concurrent pings each check out a connection, so the pool opens that many
+        await asyncio.gather(*(self.db.command("ping") for _ in range(connections)))
+        await self.ensure_indexes()
+
+    @metrics.timed("mongo")
+    async def ensure_indexes(self):
+        await asyncio.gather(*(self.db[collection].create_index(keys) for collection, keys in INDEXES))
+
+    # --- Users ---
+    @metrics.timed("mongo")
+    async def get_user(self, address: str) -> dict:
+        return await self.db.users.find_one({"address": address})
+
+    @metrics.timed("mongo")
+    async def find_user(self, query: dict) -> dict:
+        return await self.db.users.find_one(query)
+
+    @metrics.timed("mongo")
+    async def insert_user(self, user: dict):
+        await self.db.users.insert_one(user)
+
+    async def iter_user_xp(self):
+        async for doc in self.db.users.find({}, {"address": 1, "xp": 1, "_id": 0}):
+            yield doc["address"], doc.get("xp", 0)
+
+    @metrics.timed("mongo")
+    async def update_xp(self, address: str, xp: int) -> bool:
+        result = await self.db.users.update_one({"address": address}, {"$set": {"xp": xp}})
+        return result.matched_count > 0
+
+    # --- Achievements / quests / activity ---
+    @metrics.timed("mongo")
+    async def get_achievements(self, address: str) -> list:
+        return await self.db.achievements.find({"address": address}).to_list(None)
+
+    @metrics.timed("mongo")
+    async def insert_achievements(self, achievements: list):
+        await self.db.achievements.insert_many(achievements)
+
+    @metrics.timed("mongo")
+    async def get_quests(self, address: str) -> list:
+        return await self.db.quests.find({"address": address}).to_list(None)
+
+    @metrics.timed("mongo")
+    async def insert_quests(self, quests: list):
+        await self.db.quests.insert_many(quests)
+
+    @metrics.timed("mongo")
+    async def get_activity(self, address: str) -> list:
+        return await self.db.activity.find({"address": address}).to_list(None)
+
+    @metrics.timed("mongo")
+    async def insert_activity(self, activity: list):
+        await self.db.activity.insert_many(activity)
+
+    # --- Tokens / trades ---
+    @metrics.timed("mongo")
+    async def insert_many(self, collection: str, docs: list):
+        await self.db[collection].insert_many(docs, ordered=False)
+
+    # --- Indexed chain data (trades, positions, candles, checkpoints) ---
+    @metrics.timed("mongo")
+    async def find_many(self, collection: str, query: dict, sort: list = None, limit: int = 0) -> list:
+        cursor = self.db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(None)
+
+    @metrics.timed("mongo")
+    async def find_doc(self, collection: str, query: dict) -> dict:
+        return await self.db[collection].find_one(query)
+
+    @metrics.timed("mongo")
+    async def replace_doc(self, collection: str, query: dict, doc: dict):
+        await self.db[collection].replace_one(query, doc, upsert=True)
+
+    @metrics.timed("mongo")
+    async def bulk_write(self, collection: str, ops: list):
+        if ops:
+            return await self.db[collection].bulk_write(ops, ordered=False)
 
-    def get_user(self, user_id: str) -> dict:
-        # TODO: Fetch user from MongoDB
-        return {"user_id": user_id, "stub": True}
+    @metrics.timed("mongo")
+    async def delete_many(self, collection: str, query: dict) -> int:
+        result = await self.db[collection].delete_many(query)
+        return result.deleted_count
 
-    def save_token(self, token_data: dict) -> str:
-        # TODO: Save token to MongoDB
-        return "token_id_stub"
+    @metrics.timed("mongo")
+    async def save_token(self, token_data: dict) -> str:
+        result = await self.db.tokens.insert_one(token_data)
+        return str(result.inserted_id)
 
-    def update_xp(self, user_id: str, xp: int) -> bool:
-        # TODO: Update XP in MongoDB
-        return True 
\ No newline at end of file
+    @metrics.timed("mongo")
+    async def save_trade(self, trade_data: dict) -> str:
+        result = await self.db.trades.insert_one(trade_data)
+        return str(result.inserted_id)
@@ -0,0 +1,213 @@
+"""In-memory mirror of the marketplace.clar order book.
+
+The contract keeps orders in a flat ``orders`` map and ``fill-order`` needs
+the order id up front. Here open orders are grouped per symbol into price
+levels: each side is an ``OrderStatisticList`` of level keys (asks by price,
+bids by -price, so the best level is always first) and each level is a FIFO
+dict of order-id -> remaining amount. Insert and cancel are O(log n) in the
+number of levels and top of book is O(1).
+
+Contract rules mirrored here: only ``open`` orders can be filled or
+cancelled. A partial fill moves an order to ``partial``, after which both
+``fill-order`` and ``cancel-order`` reject it, so it leaves the book. Market
+orders rest at the last traded price like limit orders. Fills execute at the
+resting order's price, and nobody can fill their own order.
+"""
+import os
+from typing import Optional
+from services.leaderboard import OrderStatisticList
+
+class _Side:
+    def __init__(self, sign: int):
+        self.sign = sign  # 1 for asks, -1 for bids
+        self.keys = OrderStatisticList()
+        self.levels = {}  # key -> {order_id: remaining}
+        self.totals = {}
+
+    def add(self, order_id: int, price: int, amount: int):
+        key = self.sign * price
+        level = self.levels.get(key)
+        if level is None:
+            level = self.levels[key] = {}
+            self.totals[key] = 0
+            self.keys.add(key)
+        if level and order_id < next(reversed(level)):
+            # Restored after a reorg: order ids are sequential, so they are the time priority
+            level[order_id] = amount
+            self.levels[key] = dict(sorted(level.items()))
+        else:
+            level[order_id] = amount
+        self.totals[key] += amount
+
+    def remove(self, order_id: int, price: int):
+        key = self.sign * price
+        level = self.levels[key]
+        self.totals[key] -= level.pop(order_id)
+        if not level:
+            del self.levels[key]
+            del self.totals[key]
+            self.keys.remove(key)
+
+    def best(self) -> Optional[int]:
+        key = self.keys.first()
+        return None if key is None else key * self.sign
+
+    def depth(self, levels: int) -> list:
+        return [(key * self.sign, self.totals[key], len(self.levels[key])) for key in self.keys.islice(0, levels)]
+
+    def walk(self):
+        for key in self.keys.islice(0, len(self.keys)):
+            yield key * self.sign, self.levels[key]
+
+class OrderBook:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = _Side(-1)
+        self.asks = _Side(1)
+
+    def side(self, side: str) -> _Side:
+        return self.bids if side == "buy" else self.asks
+
+class OrderBooks:
+    """Open orders of every symbol, fed by marketplace events or ``market_orders`` docs."""
+
+    def __init__(self, taker_fee_bps: int = None):
+        # The contract's initial taker-fee-bps; replaced by indexed trading-fees-updated events
+        self.default_taker_fee_bps = (
+            taker_fee_bps if taker_fee_bps is not None else int(os.getenv("MARKETPLACE_TAKER_FEE_BPS", "30")))
+        self.taker_fee_bps = self.default_taker_fee_bps
+        self.paused = False
+        self.books = {}
+        self.orders = {}  # order_id -> (symbol, side, price, remaining, trader)
+
+    def __len__(self):
+        return len(self.orders)
+
+    def book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def add_order(self, order_id: int, trader: str, symbol: str, side: str, price: int, amount: int):
+        if order_id in self.orders:
+            self.remove_order(order_id)
+        self.orders[order_id] = (symbol, side, price, amount, trader)
+        self.book(symbol).side(side).add(order_id, price, amount)
+
+    def remove_order(self, order_id: int) -> bool:
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return False
+        symbol, side, price, _, _ = order
+        self.books[symbol].side(side).remove(order_id, price)
+        return True
+
+    # --- feeds ---
+    def load(self, docs):
+        """Replace the contents from ``market_orders`` docs (only open ones are kept)."""
+        self.books, self.orders = {}, {}
+        self.sync(docs, [])
+
+    def sync(self, docs, removed_ids):
+        """Indexer hook: ``market_orders`` docs that changed, and ids that no longer exist."""
+        for order_id in removed_ids:
+            self.remove_order(order_id)
+        for doc in docs:
+            if doc["status"] == "open":
+                self.add_order(doc["orderId"], doc["trader"], doc["symbol"], doc["side"],
+                               doc["price"], doc["amount"] - doc.get("filled", 0))
+            else:
+                self.remove_order(doc["orderId"])
+
+    def sync_settings(self, docs, removed_ids):
+        """Indexer hook: ``market_settings`` docs that changed, and keys that no longer exist (reorged away)."""
+        for key in removed_ids:
+            if key == "trading-fees-updated":
+                self.taker_fee_bps = self.default_taker_fee_bps
+            elif key == "pause-state-changed":
+                self.paused = False
+        for doc in docs:
+            if doc["_id"] == "trading-fees-updated":
+                self.taker_fee_bps = doc["takerFee"]
+            elif doc["_id"] == "pause-state-changed":
+                self.paused = doc["paused"]
+
+    def apply_event(self, value: dict):
+        """Apply one decoded marketplace ``print`` tuple."""
+        kind = value.get("event")
+        if kind == "order-placed":
+            side = "buy" if value["side"] == 0 else "sell"
+            self.add_order(value["order-id"], value["trader"], value["symbol"], side, value["price"], value["amount"])
+        elif kind in ("order-cancelled", "order-filled"):
+            self.remove_order(value["order-id"])
+        elif kind == "trading-fees-updated":
+            self.taker_fee_bps = value["taker-fee"]
+        elif kind == "pause-state-changed":
+            self.paused = value["paused"]
+
+    # --- queries ---
+    def snapshot(self, symbol: str, depth: int = 10) -> dict:
+        book = self.books.get(symbol) or OrderBook(symbol)
+        best_bid, best_ask = book.bids.best(), book.asks.best()
+        return {
+            "symbol": symbol,
+            "bestBid": best_bid,
+            "bestAsk": best_ask,
+            "spread": best_ask - best_bid if best_bid is not None and best_ask is not None else None,
+            "bids": [{"price": p, "amount": a, "orders": n} for p, a, n in book.bids.depth(depth)],
+            "asks": [{"price": p, "amount": a, "orders": n} for p, a, n in book.asks.depth(depth)],
+        }
+
+    def match_preview(self, symbol: str, side: str, amount: int, limit_price: int = None,
+                      taker: str = None, max_fills: int = 100) -> dict:
+        """The ``fill-order`` calls a taker on ``side`` would make, best price first.
+
+        Each resting order can be filled once (a partial fill closes it),
+        orders owned by ``taker`` are skipped, and each fill pays the taker
+        fee on amount * price like ``calculate-taker-fee``.
+        """
+        book = self.books.get(symbol) or OrderBook(symbol)
+        resting = book.asks if side == "buy" else book.bids
+        fills, left, cost, fees = [], amount, 0, 0
+        if not self.paused:
+            for price, level in resting.walk():
+                if limit_price is not None and (price > limit_price if side == "buy" else price < limit_price):
+                    break
+                for order_id, remaining in level.items():
+                    if taker is not None and self.orders[order_id][4] == taker:
+                        continue
+                    take = min(remaining, left)
+                    fee = take * price * self.taker_fee_bps // 10000
+                    fills.append({"orderId": order_id, "price": price, "amount": take, "fee": fee,
+                                  "status": "filled" if take >= remaining else "partial"})
+                    left -= take
+                    cost += take * price
+                    fees += fee
+                    if not left or len(fills) >= max_fills:
+                        break
+                if not left or len(fills) >= max_fills:
+                    break
+        filled = amount - left
+        return {
+            "symbol": symbol,
+            "side": side,
+            "requested": amount,
+            "filled": filled,
+            "unfilled": left,
+            "cost": cost,
+            "fees": fees,
+            "averagePrice": cost / filled if filled else 0.0,
+            "worstPrice": fills[-1]["price"] if fills else None,
+            "paused": self.paused,
+            "fills": fills,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "orders": len(self.orders),
+            "symbols": sum(1 for b in self.books.values() if len(b.bids.keys) or len(b.asks.keys)),
+            "levels": sum(len(b.bids.keys) + len(b.asks.keys) for b in self.books.values()),
+            "takerFeeBps": self.taker_fee_bps,
+            "paused": self.paused,
+        }
@@ -0,0 +1,290 @@
+"""Incremental quest and achievement progress, mirroring contracts/xp-system.clar.
+
+Trade / launch events update per-user counters in memory: lifetime totals
+(trades, launches, micro-STX volume, largest trade), open positions for
+hold-time, a daily streak following ``update-streak`` (next day extends,
+a longer gap restarts at 1), and counters for the current UTC day, ISO week
+and calendar month. A counter for a window that has ended is reset by the
+first event of a new window, and reads treat it as 0.
+
+Quests follow ``complete-quest``: progress accumulates within the window,
+and crossing ``total`` completes the quest once for that window and earns
+its XP reward. Achievements follow ``unlock-achievement``: they unlock once
+and stay unlocked. Earned XP is recorded here (``xpEarned``); it is not
+added to the user's XP, which comes from the chain.
+
+Only the top-level fields an event changed are written, as ``$set``
+upserts batched every ``flush_interval`` seconds. Indexer rollbacks are not
+reversed; progress only moves forward.
+"""
+import asyncio
+import datetime
+import os
+import time
+from pymongo import UpdateOne
+
+DAY = 86400
+WEEK = 7 * DAY
+_MONDAY = 4 * DAY  # the epoch was a Thursday
+STX = 1_000_000
+
+# title -> (counter, window, total, unit, xp reward); progress is counter // unit
+QUEST_RULES = {
+    "Daily Trader": ("trades", "day", 5, 1, 50),
+    "Token Creator": ("launches", "week", 3, 1, 200),
+    "Volume King": ("volume", "month", 100, STX, 500),
+    "Social Butterfly": ("shares", "week", 3, 1, 100),
+}
+
+# title -> (field whose change can unlock it, rule); hold time is checked once a day and on reads
+ACHIEVEMENT_RULES = {
+    "First Launch": ("tokensCreated", lambda p, now: p["tokensCreated"] >= 1),
+    "Volume Milestone": ("volume", lambda p, now: p["volume"] > 10_000_000 * STX),
+    "Hot Streak": ("streak", lambda p, now: p["streak"] >= 5),
+    "Vibe Master": ("tokensCreated", lambda p, now: p["tokensCreated"] >= 5),
+    "Diamond Hands": ("lastActiveDay", lambda p, now: hold_days(p, now) >= 30),
+    "Whale Hunter": ("largestTrade", lambda p, now: p["largestTrade"] > 1_000_000 * STX),
+}
+
+_KINDS = ("buy", "sell", "launch", "share")
+_TRADE_FIELDS = ("trades", "volume", "holdings")
+_STREAK_FIELDS = ("streak", "lastActiveDay")
+_ACHIEVEMENTS_BY_FIELD = {}
+for _title, (_field, _rule) in ACHIEVEMENT_RULES.items():
+    _ACHIEVEMENTS_BY_FIELD.setdefault(_field, []).append((_title, _rule))
+_QUESTS_BY_COUNTER = {}
+for _title, (_counter, *_rule) in QUEST_RULES.items():
+    _QUESTS_BY_COUNTER.setdefault(_counter, []).append((_title, *_rule))
+
+def hold_days(progress: dict, now: int) -> int:
+    # Closed positions are removed, so every entry is an open one
+    oldest = min((since for _, since in progress["holdings"].values()), default=None)
+    return (now - oldest) // DAY if oldest is not None else 0
+
+def _month_start(day: int) -> int:
+    d = datetime.datetime.utcfromtimestamp(day * DAY)
+    return int(datetime.datetime(d.year, d.month, 1, tzinfo=datetime.timezone.utc).timestamp())
+
+def _next_month(start: int) -> int:
+    d = datetime.datetime.utcfromtimestamp(start)
+    year, month = (d.year + 1, 1) if d.month == 12 else (d.year, d.month + 1)
+    return int(datetime.datetime(year, month, 1, tzinfo=datetime.timezone.utc).timestamp())
+
+def _timestamp(value) -> int:
+    if isinstance(value, datetime.datetime):
+        return int(value.replace(tzinfo=datetime.timezone.utc).timestamp() if value.tzinfo is None else value.timestamp())
+    return int(value) if value is not None else int(time.time())
+
+class ProgressEngine:
+    def __init__(self, mongo_service=None, flush_interval: float = None, collection: str = "user_progress"):
+        self.mongo = mongo_service
+        self.collection = collection
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("PROGRESS_FLUSH_INTERVAL", "1"))
+        self.users = {}
+        self._dirty = {}  # address -> set of changed top-level fields
+        self._starts = {}  # day -> window starts
+        self._task = None
+        self.events = 0
+        self.writes = 0
+        self.flushes = 0
+
+    # --- state ---
+    @staticmethod
+    def _new(address: str) -> dict:
+        return {
+            "_id": address, "trades": 0, "tokensCreated": 0, "volume": 0, "largestTrade": 0,
+            "streak": 0, "lastActiveDay": None, "holdings": {},
+            "day": {"start": 0}, "week": {"start": 0}, "month": {"start": 0},
+            "quests": {}, "achievements": {}, "xpEarned": 0,
+        }
+
+    def load(self, docs):
+        for doc in docs:
+            progress = self._new(doc["_id"])
+            progress.update(doc)
+            self.users[doc["_id"]] = progress
+
+    def _window_starts(self, day: int) -> dict:
+        starts = self._starts.get(day)
+        if starts is None:
+            ts = day * DAY
+            starts = self._starts[day] = {"day": ts, "week": (ts - _MONDAY) // WEEK * WEEK + _MONDAY,
+                                          "month": _month_start(day)}
+        return starts
+
+    # --- events ---
+    def observe(self, events):
+        """Apply trade docs (``trader``, ``type``, ``amount``, ``stx``, ``symbol``, ``timestamp``)."""
+        for event in events:
+            self.observe_event(event)
+
+    def observe_event(self, event: dict):
+        address = event.get("trader")
+        kind = event.get("type")
+        if not address or kind not in _KINDS:
+            return
+        progress = self.users.get(address)
+        if progress is None:
+            progress = self.users[address] = self._new(address)
+        changed = self._dirty.get(address)
+        if changed is None:
+            changed = self._dirty[address] = set()
+        ts = _timestamp(event.get("timestamp"))
+        day = ts // DAY
+        starts = self._window_starts(day)
+        if kind == "buy" or kind == "sell":
+            stx = int(event.get("stx") or 0)
+            amount = int(event.get("amount") or 0)
+            progress["trades"] += 1
+            progress["volume"] += stx
+            changed.update(_TRADE_FIELDS)
+            check = ["volume"]
+            if stx > progress["largestTrade"]:
+                progress["largestTrade"] = stx
+                changed.add("largestTrade")
+                check.append("largestTrade")
+            holdings = progress["holdings"]
+            symbol = str(event.get("symbol") or "?")
+            held = holdings.get(symbol)
+            if kind == "buy":
+                if held is None:
+                    holdings[symbol] = [amount, ts]
+                else:
+                    held[0] += amount
+            elif held is not None:
+                held[0] -= amount
+                if held[0] <= 0:
+                    del holdings[symbol]
+            self._count(progress, "trades", 1, starts, changed)
+            self._count(progress, "volume", stx, starts, changed)
+        elif kind == "launch":
+            progress["tokensCreated"] += 1
+            changed.add("tokensCreated")
+            check = ["tokensCreated"]
+            self._count(progress, "launches", 1, starts, changed)
+        else:
+            check = []
+            self._count(progress, "shares", 1, starts, changed)
+        last = progress["lastActiveDay"]
+        if last is None or day > last:
+            # update-streak: the next day extends the streak, a longer gap restarts it
+            progress["streak"] = progress["streak"] + 1 if last is not None and day == last + 1 else 1
+            progress["lastActiveDay"] = day
+            changed.update(_STREAK_FIELDS)
+            check += _STREAK_FIELDS
+        self._check_achievements(progress, ts, check, changed)
+        self.events += 1
+
+    def _count(self, progress: dict, counter: str, by: int, starts: dict, changed: set):
+        for title, window, total, unit, reward in _QUESTS_BY_COUNTER[counter]:
+            start = starts[window]
+            bucket = progress[window]
+            if start != bucket["start"]:
+                if start < bucket["start"]:
+                    continue  # late event for a window that has already ended
+                bucket = progress[window] = {"start": start}
+            value = bucket[counter] = bucket.get(counter, 0) + by
+            changed.add(window)
+            if value // unit >= total and progress["quests"].get(title) != start:
+                # Completed once per window, like quest-completions
+                progress["quests"][title] = start
+                progress["xpEarned"] += reward
+                changed.update(("quests", "xpEarned"))
+
+    def _check_achievements(self, progress: dict, now: int, fields, changed: set):
+        unlocked = progress["achievements"]
+        for field in fields:
+            for title, rule in _ACHIEVEMENTS_BY_FIELD.get(field, ()):
+                if title not in unlocked and rule(progress, now):
+                    unlocked[title] = now
+                    changed.add("achievements")
+
+    # --- reads ---
+    def get(self, address: str) -> dict:
+        return self.users.get(address) or self._new(address)
+
+    def streak(self, address: str, now: int = None) -> int:
+        """Current daily streak; 0 once a day has passed without activity."""
+        progress = self.users.get(address)
+        if progress is None or progress["lastActiveDay"] is None:
+            return 0
+        today = (now or int(time.time())) // DAY
+        return progress["streak"] if today - progress["lastActiveDay"] <= 1 else 0
+
+    def quests(self, address: str, now: int = None) -> dict:
+        """title -> {progress, total, completed, endsAt} for the current windows."""
+        now = now or int(time.time())
+        progress = self.get(address)
+        starts = self._window_starts(now // DAY)
+        ends = {"day": starts["day"] + DAY, "week": starts["week"] + WEEK, "month": _next_month(starts["month"])}
+        out = {}
+        for title, (counter, window, total, unit, reward) in QUEST_RULES.items():
+            bucket = progress[window]
+            value = bucket.get(counter, 0) if bucket["start"] == starts[window] else 0
+            out[title] = {"progress": min(value // unit, total), "total": total,
+                          "completed": progress["quests"].get(title) == starts[window], "endsAt": ends[window]}
+        return out
+
+    def achievements(self, address: str, now: int = None) -> dict:
+        """title -> unlocked; time-based unlocks (hold time) are recorded on read."""
+        now = now or int(time.time())
+        progress = self.users.get(address)
+        if progress is None:
+            return {title: False for title in ACHIEVEMENT_RULES}
+        changed = set()
+        self._check_achievements(progress, now, _ACHIEVEMENTS_BY_FIELD, changed)
+        if changed:
+            self._dirty.setdefault(address, set()).update(changed)
+        return {title: title in progress["achievements"] for title in ACHIEVEMENT_RULES}
+
+    # --- persistence ---
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Progress flush failed: {e}")
+
+    async def flush(self) -> int:
+        if not self._dirty or self.mongo is None:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        ops = []
+        for address, fields in dirty.items():
+            if fields:
+                progress = self.users[address]
+                ops.append(UpdateOne({"_id": address}, {"$set": {f: progress[f] for f in fields}}, upsert=True))
+        try:
+            await self.mongo.bulk_write(self.collection, ops)
+        except Exception:
+            # Keep the changes for the next flush
+            for address, fields in dirty.items():
+                self._dirty.setdefault(address, set()).update(fields)
+            raise
+        self.writes += len(ops)
+        self.flushes += 1
+        return len(ops)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.users),
+            "events": self.events,
+            "pendingUsers": len(self._dirty),
+            "writes": self.writes,
+            "flushes": self.flushes,
+        }
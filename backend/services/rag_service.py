@@ -1,21 +1,63 @@
 import httpx
+import asyncio
 import os
+from services.metrics import metrics
 
 class RagService:
     def __init__(self, rag_url: str = None):
         self.base_url = rag_url or os.getenv("RAG_SERVER_URL", "http://localhost:8000")
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("RAG_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("RAG_MAX_KEEPALIVE_CONNECTIONS", "50")),
+            keepalive_expiry=float(os.getenv("RAG_KEEPALIVE_EXPIRY", "30")),
+        )
+        self.timeout = float(os.getenv("RAG_TIMEOUT", "20"))
+        self.client = None
+        # (question, top_k) -> task for a /query already on the wire
+        self._inflight = {}
+        self.coalesced = 0
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+
+    async def warm_up(self):
+        """Open a pooled connection before the first question needs it."""
+        await self.start()
+        await self.client.head(self.base_url)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
 
     async def ask(self, question: str, top_k: int = 1) -> dict:
+        # Identical questions asked concurrently share one upstream request
+        key = (question, top_k)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._query(question, top_k))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: one caller being cancelled must not cancel the shared request
+        result = await asyncio.shield(task)
+        return dict(result)
+
+    @metrics.timed("rag", "query")
+    async def _query(self, question: str, top_k: int) -> dict:
+        if self.client is None:
+            await self.start()
         # Always call /query endpoint, even if base_url does not end with /query
         url = self.base_url.rstrip("/") + "/query"
         data = {"question": question, "top_k": top_k}
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(url, json=data, timeout=20)
-            resp.raise_for_status()
-            result = resp.json()
+        resp = await self.client.post(url, json=data)
+        resp.raise_for_status()
+        result = resp.json()
         # Return the top answer and the full raw response
         if "results" in result and result["results"]:
             answer = result["results"][0]["text"]
         else:
             answer = "No answer found."
-        return {"answer": answer, "raw_rag": result} 
\ No newline at end of file
+        return {"answer": answer, "raw_rag": result}
@@ -0,0 +1,76 @@
+"""Startup warm-up tracking and the readiness gate.
+
+The app starts serving as soon as its services are constructed; the
+dependencies then warm up in parallel in the background. ``Readiness``
+records each component's state and how long it took, and the app is ready
+once every ``required`` component is. From the start of the warm-up until
+then, and again once shutdown begins, ``ReadinessGate`` answers everything
+but the probe and metrics routes with 503 and ``Retry-After``, the same way
+a full Gemini queue does.
+"""
+import json
+import time
+
+class Readiness:
+    def __init__(self, required: tuple, started_at: float = None):
+        self.required = tuple(required)
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.components = {name: {"status": "pending"} for name in self.required}
+        self.ready_after = None  # seconds from started_at
+        self.warming = False  # set by the lifespan; an app driven without one is never gated
+        self.stopping = False
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_after is not None and not self.stopping
+
+    @property
+    def gating(self) -> bool:
+        return (self.warming or self.stopping) and not self.ready
+
+    async def warm(self, name: str, warm_up) -> bool:
+        """Await ``warm_up`` and record the outcome under ``name``; failures are logged, not raised."""
+        state = self.components[name] = {"status": "warming"}
+        start = time.perf_counter()
+        try:
+            await warm_up
+        except Exception as e:
+            state.update(status="failed", error=f"{type(e).__name__}: {e}")
+            print(f"Warm-up of {name} failed: {e}")
+            return False
+        finally:
+            state["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        state["status"] = "ready"
+        if self.ready_after is None and all(self.components[c]["status"] == "ready" for c in self.required):
+            self.ready_after = time.perf_counter() - self.started_at
+            print(f"Ready {self.ready_after * 1000:.0f}ms after import")
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "stopping": self.stopping,
+            "importToReadyMs": round(self.ready_after * 1000, 1) if self.ready_after is not None else None,
+            "required": list(self.required),
+            "components": self.components,
+        }
+
+class ReadinessGate:
+    """Pure ASGI middleware: 503 for requests that arrive before the app is ready."""
+
+    def __init__(self, app, readiness: Readiness, open_paths: tuple = ("/ready", "/metrics"), retry_after: int = 1):
+        self.app = app
+        self.readiness = readiness
+        self.open_paths = open_paths
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.readiness.gating or scope["path"].startswith(self.open_paths):
+            return await self.app(scope, receive, send)
+        body = json.dumps({"detail": "Service is starting" if not self.readiness.stopping
+                           else "Service is shutting down"}).encode()
+        await send({"type": "http.response.start", "status": 503, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(self.retry_after).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,331 @@
+"""Response payloads cached in two tiers, shared by every worker.
+
+L1 is an in-process LRU whose entries live ``CACHE_L1_TTL`` seconds. L2 is
+a Redis-protocol server at ``CACHE_URL`` (``redis://[:password@]host:port/db``)
+shared by all workers, with entries kept ``CACHE_TTL`` seconds; without
+``CACHE_URL`` there is only L1. Payloads are validated once when they are
+built and stored as a one-byte tag plus ``marshal`` bytes (zlib-compressed
+from ``CACHE_COMPRESS_MIN`` bytes), so a hit is decoded straight into the
+response. ``marshal`` is only read back from our own store, and the key
+prefix carries the Python version, whose format it is.
+
+Writes go through: ``put`` and ``invalidate`` update or drop the entry in L2
+and in this worker's L1, and discard any load of that key already in flight
+here. Other workers' L1 copies last at most ``CACHE_L1_TTL`` seconds. Each
+write also bumps ``ver:<key>`` (``INCR``), and every L2 entry is stored with
+the version it was loaded under: a load another worker started before the
+write may still land in L2, but reads, which fetch the entry and its version
+together, treat it as a miss.
+
+Stampede guard: concurrent misses for a key in one worker share one load.
+Across workers, the one that takes ``lock:<key>`` (``SET NX PX``) loads while
+the others poll L2 for up to ``CACHE_LOCK_WAIT`` seconds before loading
+themselves, or as soon as the lock is released without a value. L2 errors
+and timeouts count as misses and never fail a request.
+"""
+import asyncio
+import marshal
+import os
+import sys
+import time
+import urllib.parse
+import zlib
+from collections import OrderedDict
+
+_RAW, _ZLIB = b"\x01", b"\x02"
+COMPRESS_MIN = int(os.getenv("CACHE_COMPRESS_MIN", "1024"))
+LOCK_POLL_MIN, LOCK_POLL_MAX = 0.0005, 0.02
+
+def encode(value) -> bytes:
+    """JSON-like values only: dict, list, str, int, float, bool, None."""
+    data = marshal.dumps(value)
+    if len(data) >= COMPRESS_MIN:
+        return _ZLIB + zlib.compress(data, 1)
+    return _RAW + data
+
+def decode(blob: bytes):
+    tag, data = blob[:1], blob[1:]
+    if tag == _ZLIB:
+        data = zlib.decompress(data)
+    elif tag != _RAW:
+        raise ValueError(f"Unknown cache encoding {tag!r}")
+    return marshal.loads(data)
+
+class RespError(Exception):
+    pass
+
+class RespStore:
+    """Minimal Redis-protocol (RESP2) client for GET / MGET / SET PX [NX] / INCR / DEL, over a small connection pool."""
+
+    def __init__(self, url: str, pool_size: int = None, timeout: float = None):
+        parsed = urllib.parse.urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.pool_size = pool_size or int(os.getenv("CACHE_POOL_SIZE", "8"))
+        self.timeout = timeout or float(os.getenv("CACHE_TIMEOUT", "0.25"))
+        self._idle = []
+        self._slots = asyncio.Semaphore(self.pool_size)
+        self.round_trips = 0
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        conn = (reader, writer)
+        if self.password:
+            await self._roundtrip(conn, [("AUTH", self.password)])
+        if self.db:
+            await self._roundtrip(conn, [("SELECT", self.db)])
+        return conn
+
+    async def _roundtrip(self, conn, commands):
+        reader, writer = conn
+        out = []
+        for args in commands:
+            out.append(b"*%d\r\n" % len(args))
+            for arg in args:
+                arg = arg if isinstance(arg, bytes) else str(arg).encode()
+                out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        writer.write(b"".join(out))
+        await writer.drain()
+        self.round_trips += 1
+        replies, error = [], None
+        for _ in commands:
+            try:
+                replies.append(await _read_reply(reader))
+            except RespError as e:  # read the rest so the connection stays in sync
+                replies.append(None)
+                error = error or e
+        if error:
+            raise error
+        return replies
+
+    async def execute(self, *args):
+        return (await self.pipeline(args))[0]
+
+    async def pipeline(self, *commands) -> list:
+        """Send ``commands`` in one write and read their replies: one round trip."""
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else None
+            try:
+                async with asyncio.timeout(self.timeout):
+                    if conn is None:
+                        conn = await self._connect()
+                    replies = await self._roundtrip(conn, commands)
+            except RespError:
+                if conn is not None:
+                    self._idle.append(conn)  # the connection is still in sync
+                raise
+            except BaseException:
+                # A timed-out or broken connection may have a reply pending; never reuse it
+                if conn is not None:
+                    conn[1].close()
+                raise
+            self._idle.append(conn)
+            return replies
+
+    async def get(self, key: str):
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float, nx: bool = False, delete=()) -> bool:
+        """``delete`` keys are dropped in the same round trip, after the SET."""
+        args = ("SET", key, value, "PX", max(int(ttl * 1000), 1)) + (("NX",) if nx else ())
+        replies = await self.pipeline(args, ("DEL", *delete)) if delete else await self.pipeline(args)
+        return replies[0] == b"OK"
+
+    async def mget(self, *keys) -> list:
+        return await self.execute("MGET", *keys)
+
+    async def incr(self, *keys, ttl: float, delete=()) -> list:
+        """INCR each key and reset its expiry, then drop ``delete``, in one round trip; the new counts."""
+        px = max(int(ttl * 1000), 1)
+        commands = [cmd for key in keys for cmd in (("INCR", key), ("PEXPIRE", key, px))]
+        replies = await self.pipeline(*commands, *((("DEL", *delete),) if delete else ()))
+        return replies[:len(commands):2]
+
+    async def delete(self, *keys) -> int:
+        return await self.execute("DEL", *keys) if keys else 0
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+async def _read_reply(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Cache server closed the connection")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        return None if size < 0 else (await reader.readexactly(size + 2))[:-2]
+    if kind == b"*":
+        size = int(rest)
+        return None if size < 0 else [await _read_reply(reader) for _ in range(size)]
+    raise RespError(f"Unexpected reply {line!r}")
+
+class ResponseCache:
+    def __init__(self, l2=None, ttl: float = None, l1_ttl: float = None, l1_size: int = None,
+                 lock_wait: float = None, prefix: str = None):
+        self.l2 = l2
+        self.ttl = ttl or float(os.getenv("CACHE_TTL", "30"))
+        self.l1_ttl = l1_ttl if l1_ttl is not None else float(os.getenv("CACHE_L1_TTL", "2"))
+        self.l1_size = l1_size or int(os.getenv("CACHE_L1_SIZE", "10000"))
+        self.lock_wait = lock_wait if lock_wait is not None else float(os.getenv("CACHE_LOCK_WAIT", "1"))
+        self.lock_ttl = float(os.getenv("CACHE_LOCK_TTL", "5"))
+        # Outlives the entries; once a version expires, entries tagged with it read as misses
+        self.version_ttl = 2 * self.ttl
+        self.prefix = prefix or f"{os.getenv('CACHE_PREFIX', 'resp')}:py{sys.version_info[0]}{sys.version_info[1]}:"
+        self._l1 = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._versions = {}  # key -> bumped on every put/invalidate, so stale loads are not stored
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.lock_waits = 0
+        self.l2_errors = 0
+        self.invalidations = 0
+
+    async def warm_up(self):
+        if self.l2 is not None:
+            await self.l2.execute("PING")
+
+    async def get(self, key: str, load):
+        """The cached value for ``key``, or ``await load()`` stored in both tiers."""
+        entry = self._l1.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._l1.move_to_end(key)
+            self.l1_hits += 1
+            return entry[1]
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, load))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.get(key) is t and self._inflight.pop(key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, load):
+        version = self._versions.get(key, 0)
+        data, ver = self.prefix + key, "ver:" + self.prefix + key
+        blob, shared = await self._l2_call("mget", data, ver) or (None, None)
+        value = self._decode(key, blob, shared)
+        if value is not None:
+            self.l2_hits += 1
+            self._remember(key, value, version)
+            return value
+        lock = "lock:" + self.prefix + key
+        locked = await self._l2_call("set", lock, b"1", self.lock_ttl, nx=True)
+        if locked is False:
+            # Another worker is loading it; wait for its result rather than hit Mongo too
+            deadline = time.monotonic() + self.lock_wait
+            delay = LOCK_POLL_MIN
+            while time.monotonic() < deadline:
+                # Loads take a few ms: poll soon, then back off so a slow one is not hammered
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LOCK_POLL_MAX)
+                blob, shared, held = await self._l2_call("mget", data, ver, lock) or (None, None, None)
+                value = self._decode(key, blob, shared)
+                if value is not None:
+                    self.lock_waits += 1
+                    self._remember(key, value, version)
+                    return value
+                # Released without a value (its load failed or was overtaken by a write)
+                if held is None:
+                    break
+        self.misses += 1
+        released = not locked
+        try:
+            value = await load()
+            if self._versions.get(key, 0) == version:
+                self._remember(key, value, version)
+                # Store and release together: one round trip, and waiters never see the lock gone first
+                # Tagged with the version read before the load: a write since then makes it a miss
+                entry = encode([int(shared or 0), value])
+                await self._l2_call("set", data, entry, self.ttl, delete=(lock,) if locked else ())
+                released = True
+        finally:
+            if not released:
+                await self._l2_call("delete", lock)
+        return value
+
+    async def put(self, key: str, value):
+        """Write-through: replace ``key`` in both tiers with a value just built by a write."""
+        self._bump(key)
+        self._remember(key, value, self._versions[key])
+        shared = await self._l2_call("incr", "ver:" + self.prefix + key, ttl=self.version_ttl)
+        if shared:
+            await self._l2_call("set", self.prefix + key, encode([shared[0], value]), self.ttl)
+
+    async def invalidate(self, *keys):
+        for key in keys:
+            self._bump(key)
+            self._l1.pop(key, None)
+        self.invalidations += len(keys)
+        await self._l2_call("incr", *("ver:" + self.prefix + key for key in keys), ttl=self.version_ttl,
+                            delete=[self.prefix + key for key in keys])
+
+    def _bump(self, key: str):
+        self._versions[key] = self._versions.get(key, 0) + 1
+        if len(self._versions) > 4 * self.l1_size:
+            # Only loads in flight need their key's version; start over once it gets large
+            self._versions = {k: v for k, v in self._versions.items() if k in self._inflight}
+        # A load already in flight started before this write; later callers must not join it
+        self._inflight.pop(key, None)
+
+    def _remember(self, key: str, value, version: int):
+        if self._versions.get(key, 0) != version:
+            return
+        self._l1[key] = (time.monotonic() + self.l1_ttl, value)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    def _decode(self, key: str, blob, shared):
+        """The value in an L2 entry, or None unless it was loaded under the current version."""
+        if blob is None:
+            return None
+        try:
+            entry_version, value = decode(blob)
+        except Exception as e:
+            print(f"Undecodable cache entry {key}: {e}")
+            return None
+        return value if entry_version == int(shared or 0) else None
+
+    async def _l2_call(self, method: str, *args, **kwargs):
+        if self.l2 is None:
+            return None
+        try:
+            return await getattr(self.l2, method)(*args, **kwargs)
+        except Exception as e:
+            self.l2_errors += 1
+            if self.l2_errors % 100 == 1:
+                print(f"Cache L2 {method} failed: {type(e).__name__}: {e}")
+            return None
+
+    async def close(self):
+        if self.l2 is not None:
+            await self.l2.close()
+
+    def stats(self) -> dict:
+        lookups = self.l1_hits + self.l2_hits + self.lock_waits + self.misses + self.coalesced
+        return {
+            "shared": self.l2 is not None,
+            "l1Entries": len(self._l1),
+            "l1Hits": self.l1_hits,
+            "l2Hits": self.l2_hits,
+            "lockWaits": self.lock_waits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "l2Errors": self.l2_errors,
+            "l2RoundTrips": self.l2.round_trips if self.l2 is not None else 0,
+            "hitRatio": (lookups - self.misses) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,260 @@
+"""Split a trade between the bonding curve and liquidity pools.
+
+A buy spends ``amount`` micro-STX and a sell spends ``amount`` tokens; each
+venue maps an input size to an exact output using the contract math in
+``bonding_curve`` / ``liquidity_pool``. The bonding curve prices a whole buy
+at the current supply, so its output is linear in the input, while a pool's
+output is concave. ``RouteOptimizer`` hands out the input in chunks to the
+venue with the best marginal output, then moves ever smaller amounts
+between venues while that increases the total. It never returns less than
+the best single venue.
+"""
+from itertools import permutations
+from typing import Optional
+
+import numpy as np
+
+from services.bonding_curve import (
+    CurveState, ClarityArithmeticError, QuoteEngine, calculate_buy_cost, calculate_fee, calculate_sell_return,
+)
+from services.liquidity_pool import PoolState, quote_swap, amounts_out
+
+class CurveVenue:
+    kind = "curve"
+
+    def __init__(self, curve: CurveState, side: str):
+        self.curve = curve
+        self.side = side
+        self.name = "bonding-curve"
+        self.usable = not curve.graduated
+        # A buy is priced at the current supply whatever its size
+        self.unit_price = calculate_buy_cost(curve.supply, 1, curve.curve_type, curve.base_price, curve.slope)
+        self.max_buy = None if curve.max_supply is None else max(curve.max_supply - curve.supply, 0)
+
+    def _buy_total(self, tokens: int) -> int:
+        cost = tokens * self.unit_price
+        return cost + calculate_fee(cost, self.curve.fee_percentage)
+
+    def trade(self, amount_in: int) -> dict:
+        """The contract call for spending at most ``amount_in``: its real input, output and fee."""
+        c = self.curve
+        if not self.usable or amount_in <= 0:
+            return {"amountIn": 0, "amountOut": 0, "fee": 0}
+        try:
+            if self.side == "buy":
+                tokens = self.buy_tokens(amount_in)
+                if tokens == 0:
+                    return {"amountIn": 0, "amountOut": 0, "fee": 0}
+                cost = tokens * self.unit_price
+                return {"amountIn": self._buy_total(tokens), "amountOut": tokens,
+                        "fee": calculate_fee(cost, c.fee_percentage)}
+            if amount_in > c.supply:
+                return {"amountIn": 0, "amountOut": 0, "fee": 0}
+            ret = calculate_sell_return(c.supply, amount_in, c.curve_type, c.base_price, c.slope)
+            if ret > c.reserve_balance:
+                return {"amountIn": 0, "amountOut": 0, "fee": 0}
+            fee = calculate_fee(ret, c.fee_percentage)
+            return {"amountIn": amount_in, "amountOut": ret - fee, "fee": fee}
+        except ClarityArithmeticError:
+            return {"amountIn": 0, "amountOut": 0, "fee": 0}
+
+    def buy_tokens(self, stx: int) -> int:
+        """Most tokens whose ``calculate-buy-price`` total fits in ``stx``."""
+        if self.unit_price == 0:
+            return self.max_buy or 0
+        tokens = stx * 10000 // (self.unit_price * (10000 + self.curve.fee_percentage))
+        if self._buy_total(tokens + 1) <= stx:
+            tokens += 1  # the fee's truncation can leave room for one more
+        return tokens if self.max_buy is None else min(tokens, self.max_buy)
+
+    def out(self, amount_in: int) -> int:
+        return self.trade(amount_in)["amountOut"]
+
+    def outs(self, amounts) -> np.ndarray:
+        amounts = np.array([int(a) for a in amounts], dtype=object)
+        if not self.usable:
+            return np.zeros(len(amounts), dtype=object)
+        c = self.curve
+        if self.side == "buy":
+            if self.unit_price == 0:
+                return np.where(amounts > 0, self.max_buy or 0, 0)
+            tokens = amounts * 10000 // (self.unit_price * (10000 + c.fee_percentage))
+            cost = (tokens + 1) * self.unit_price
+            tokens = np.where(cost + cost * c.fee_percentage // 10000 <= amounts, tokens + 1, tokens)
+            return tokens if self.max_buy is None else np.minimum(tokens, self.max_buy)
+        q = QuoteEngine({c.symbol: c}).quote([c.symbol] * len(amounts), amounts, "sell")
+        ok = q["valid"] & (amounts > 0) & (q["return"] <= c.reserve_balance)
+        return np.where(ok, q["net"], 0)
+
+    def spot(self) -> float:
+        return float(self.unit_price)
+
+    def contract_call(self, trade: dict, symbol: str, max_slippage: int) -> dict:
+        if self.side == "buy":
+            return {"contract": "bonding-curve", "function": "buy-token",
+                    "args": {"symbol": symbol, "amount": trade["amountOut"], "max-slippage": max_slippage}}
+        return {"contract": "bonding-curve", "function": "sell-token",
+                "args": {"symbol": symbol, "amount": trade["amountIn"],
+                         "min-received": trade["amountOut"] * (10000 - max_slippage) // 10000}}
+
+class PoolVenue:
+    kind = "pool"
+
+    def __init__(self, pool: PoolState, side: str):
+        self.pool = pool
+        self.side = side
+        self.name = pool.name
+        self.usable = pool.reserve_stx > 0 and pool.reserve_token > 0
+
+    def trade(self, amount_in: int) -> dict:
+        if not self.usable or amount_in <= 0:
+            return {"amountIn": 0, "amountOut": 0, "fee": 0}
+        try:
+            q = quote_swap(self.pool, self.side, amount_in)
+        except ClarityArithmeticError:
+            return {"amountIn": 0, "amountOut": 0, "fee": 0}
+        if q["amountOut"] == 0 or q["amountOut"] >= self.pool.reserves(self.side)[1]:
+            return {"amountIn": 0, "amountOut": 0, "fee": 0}
+        return q
+
+    def out(self, amount_in: int) -> int:
+        return self.trade(amount_in)["amountOut"]
+
+    def outs(self, amounts) -> np.ndarray:
+        return amounts_out(self.pool, self.side, amounts) if self.usable else np.zeros(len(amounts), dtype=object)
+
+    def spot(self) -> float:
+        reserve_in, reserve_out = self.pool.reserves(self.side)
+        return reserve_in / reserve_out if self.side == "buy" else reserve_out / reserve_in
+
+    def contract_call(self, trade: dict, symbol: str, max_slippage: int) -> dict:
+        min_out = trade["amountOut"] * (10000 - max_slippage) // 10000
+        if self.side == "buy":
+            return {"contract": self.name, "function": "swap-stx-for-token",
+                    "args": {"stx-in": trade["amountIn"], "min-token-out": min_out}}
+        return {"contract": self.name, "function": "swap-token-for-stx",
+                "args": {"token-in": trade["amountIn"], "min-stx-out": min_out}}
+
+class RouteOptimizer:
+    def __init__(self, venues: list, steps: int = 64):
+        self.venues = [v for v in venues if v.usable]
+        self.steps = steps
+
+    def split(self, amount: int) -> list:
+        """Input per venue (same order as ``venues``) maximizing the total output."""
+        k = len(self.venues)
+        if k == 0 or amount <= 0:
+            return [0] * k
+        if k == 1:
+            return [amount]
+        # Greedy: each chunk goes where it adds the most
+        chunk = max(amount // self.steps, 1)
+        alloc = [0] * k
+        outs = [0] * k
+        left = amount
+        while left:
+            step = min(chunk, left)
+            gains = [v.out(alloc[i] + step) - outs[i] for i, v in enumerate(self.venues)]
+            best = max(range(k), key=gains.__getitem__)
+            alloc[best] += step
+            outs[best] += gains[best]
+            left -= step
+        # Refine: move amounts between venues, halving the step, while it helps
+        total = sum(outs)
+        step = chunk
+        while step >= 1:
+            improved = True
+            while improved:
+                improved = False
+                for i, j in permutations(range(k), 2):
+                    if alloc[i] < step:
+                        continue
+                    gain = (self.venues[i].out(alloc[i] - step) + self.venues[j].out(alloc[j] + step)
+                            - outs[i] - outs[j])
+                    if gain > 0:
+                        alloc[i] -= step
+                        alloc[j] += step
+                        outs[i] = self.venues[i].out(alloc[i])
+                        outs[j] = self.venues[j].out(alloc[j])
+                        total += gain
+                        improved = True
+            step //= 2
+        # A curve buy only spends whole tokens' worth; hand what it leaves over to the others
+        for i, v in enumerate(self.venues):
+            dust = alloc[i] - v.trade(alloc[i])["amountIn"] if alloc[i] else 0
+            if dust > 0:
+                alloc[i] -= dust
+                gains = [w.out(alloc[j] + dust) - outs[j] if j != i else -1 for j, w in enumerate(self.venues)]
+                best = max(range(k), key=gains.__getitem__)
+                if gains[best] > 0:
+                    alloc[best] += dust
+                    outs[best] += gains[best]
+                    total += gains[best]
+                else:
+                    alloc[i] += dust
+        # Never worse than sending everything to one venue
+        for i, v in enumerate(self.venues):
+            if v.out(amount) > total:
+                alloc, total = [0] * k, v.out(amount)
+                alloc[i] = amount
+        return alloc
+
+    def route(self, amount: int, symbol: str, max_slippage: int = 50) -> dict:
+        alloc = self.split(amount)
+        legs, spent, received = [], 0, 0
+        for venue, a in zip(self.venues, alloc):
+            trade = venue.trade(a)
+            if trade["amountOut"] == 0:
+                continue
+            spent += trade["amountIn"]
+            received += trade["amountOut"]
+            legs.append({"venue": venue.name, "kind": venue.kind, **trade,
+                         "contractCall": venue.contract_call(trade, symbol, max_slippage)})
+        single = max((v.out(amount) for v in self.venues), default=0)
+        spot = self.spot_price()
+        average = self._price(spent, received)
+        return {
+            "amountIn": spent,
+            "amountOut": received,
+            "unspent": amount - spent,
+            "averagePrice": average,
+            "spotPrice": spot,
+            "priceImpactBps": self._impact(average, spot),
+            "bestSingleVenueOut": single,
+            "legs": legs,
+        }
+
+    def spot_price(self) -> Optional[float]:
+        """Best marginal STX-per-token price across venues, before fees."""
+        prices = [v.spot() for v in self.venues]
+        if not prices:
+            return None
+        side = self.venues[0].side
+        return min(prices) if side == "buy" else max(prices)
+
+    def _price(self, spent, received):
+        side = self.venues[0].side if self.venues else "buy"
+        if side == "buy":
+            return spent / received if received else None
+        return received / spent if spent else None
+
+    def _impact(self, average, spot):
+        if average is None or not spot:
+            return None
+        side = self.venues[0].side
+        return (average / spot - 1) * 10000 if side == "buy" else (1 - average / spot) * 10000
+
+    def impact_curve(self, sizes) -> dict:
+        """Per-venue outputs for many sizes at once, and the best single venue for each."""
+        sizes = [int(s) for s in sizes]
+        per_venue = {v.name: v.outs(sizes) for v in self.venues}
+        best = np.max(np.array(list(per_venue.values()), dtype=object), axis=0) if per_venue else np.zeros(len(sizes))
+        spot = self.spot_price()
+        points = []
+        for i, size in enumerate(sizes):
+            out = int(best[i])
+            average = self._price(size, out)
+            points.append({"size": size, "amountOut": out, "averagePrice": average,
+                           "priceImpactBps": self._impact(average, spot),
+                           "venues": {name: int(outs[i]) for name, outs in per_venue.items()}})
+        return {"spotPrice": spot, "points": points}
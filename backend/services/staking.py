@@ -0,0 +1,339 @@
+"""Local model of staking-pool.clar stakes and governance.clar votes and delegations.
+
+Built from the indexer's ``governance_events`` so that pending rewards and
+voting power for every holder come from one numpy pass instead of one
+read-only call per holder and block. Current state is kept as columns (one
+row per address); stake amounts and delegations are also logged with their
+block, which gives their value as of any past block (the snapshots
+``voting-power-snapshots`` is meant to hold). Events of the last
+``reorg_depth`` blocks record the values they overwrote, so a reorg is undone
+without replaying history.
+
+Mirrored contract rules:
+
+- ``calculate-rewards``: amount * (height - last-claim) * reward-rate / 10000,
+  truncated. ``stake`` resets last-claim without paying what was pending,
+  ``claim-rewards`` pays it out, and rewards keep accruing during the unstake
+  cooldown. ``reward-rate`` has no event; it is refreshed from
+  ``get-reward-rate`` by the caller.
+- ``get-proposal-state``: after end-block a proposal is succeeded when the
+  recorded votes reach the quorum (``calculate-quorum``) and for > against,
+  otherwise defeated, whatever its stored state.
+
+``get-voting-power`` is still a placeholder in the contract, so recorded
+tallies use the power each ``vote-cast`` event carries. The projected tally
+weighs each voter by staked amount as of the proposal's start block plus the
+stake of addresses delegating to them (one hop, like the ``delegations``
+map); an address that delegated has no power of its own.
+"""
+import os
+from collections import deque
+
+import numpy as np
+
+from services.indexer import SEQ_PER_BLOCK
+
+_INT64_SAFE = 2 ** 62
+NO_DELEGATE = -1
+SUPPORT = {0: "againstVotes", 1: "forVotes", 2: "abstainVotes"}
+
+COLUMNS = {"amount": 0, "staked_at": 0, "last_claim": 0, "unstake_at": -1, "claimed": 0, "delegate": NO_DELEGATE}
+
+class StakingModel:
+    def __init__(self, reward_rate: int = None, cooldown: int = None, quorum: int = None, reorg_depth: int = None):
+        self.reward_rate = reward_rate if reward_rate is not None else int(os.getenv("STAKING_REWARD_RATE", "100"))
+        self.cooldown = cooldown if cooldown is not None else int(os.getenv("STAKING_COOLDOWN_BLOCKS", "144"))
+        self.quorum = quorum if quorum is not None else int(os.getenv("GOVERNANCE_QUORUM", "1000"))
+        self.reorg_depth = reorg_depth or int(os.getenv("INDEXER_REORG_DEPTH", "64"))
+        self.events = 0
+        self.last_seq = -1
+        self.height = 0
+        self.rows = {}  # address -> row
+        self.addresses = []
+        # Plain lists take the per-event writes; numpy copies are made when read
+        self.columns = {name: [] for name in COLUMNS}
+        self._arrays = None
+        self._undo = deque()  # (seq, block, overwritten values) for the last reorg_depth blocks
+        # (blocks, rows, values), appended in block order
+        self._stake_log = ([], [], [])
+        self._delegate_log = ([], [], [])
+        self._log_arrays = {}
+        self._power_cache = {}
+        self.proposals = {}
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def _row(self, address: str) -> int:
+        row = self.rows.get(address)
+        if row is None:
+            row = self.rows[address] = len(self.addresses)
+            self.addresses.append(address)
+            for name, fill in COLUMNS.items():
+                self.columns[name].append(fill)
+        return row
+
+    def arrays(self) -> dict:
+        """The columns as numpy arrays (``claimed`` as Python ints), rebuilt after changes."""
+        if self._arrays is None:
+            self._arrays = {name: np.array(values, dtype=object if name == "claimed" else np.int64)
+                            for name, values in self.columns.items()}
+        return self._arrays
+
+    # --- events ---
+    def load(self, docs):
+        """Apply ``governance_events`` docs in ``seq`` order; already-applied ones are skipped."""
+        self.apply(docs)
+
+    def apply(self, events):
+        # Only blocks a reorg can still orphan need their overwritten values
+        undo_from = max((e["block"] for e in events[-1:]), default=0) - self.reorg_depth
+        for e in events:
+            if e["seq"] <= self.last_seq:
+                continue
+            if e["block"] > undo_from:
+                undo = []
+                self._apply_event(e, undo)
+                self._undo.append((e["seq"], e["block"], undo))
+            else:
+                self._apply_event(e, None)
+            self.events += 1
+            self.last_seq = e["seq"]
+            self.height = max(self.height, e["block"])
+        while self._undo and self._undo[0][1] <= self.height - self.reorg_depth:
+            self._undo.popleft()
+        self._arrays = None
+        self._power_cache = {}
+
+    def rollback(self, height: int):
+        """Undo events from blocks at or above ``height`` (orphaned by a reorg), newest first."""
+        while self._undo and self._undo[-1][1] >= height:
+            _, _, undo = self._undo.pop()
+            self.events -= 1
+            for name, key, old in reversed(undo):
+                if name == "proposal":
+                    if old is None:
+                        del self.proposals[key]
+                    else:
+                        self.proposals[key].update(old)
+                elif name == "vote":
+                    proposal_id, voter = key
+                    support, power, _ = self.proposals[proposal_id]["votes"].pop(voter)
+                    self.proposals[proposal_id][SUPPORT[support]] -= power
+                else:
+                    self.columns[name][key] = old
+        for log in (self._stake_log, self._delegate_log):
+            end = len(log[0])
+            while end and log[0][end - 1] >= height:
+                end -= 1
+            for column in log:
+                del column[end:]
+        self.last_seq = min(self.last_seq, height * SEQ_PER_BLOCK - 1)
+        self.height = min(self.height, height - 1)
+        self._arrays = None
+        # The logs may grow back to the same length with other events
+        self._log_arrays = {}
+        self._power_cache = {}
+
+    def _set(self, undo: list, name: str, row: int, value):
+        column = self.columns[name]
+        if undo is not None:
+            undo.append((name, row, column[row]))
+        column[row] = value
+
+    def _log(self, log: tuple, block: int, row: int, value: int):
+        for column, v in zip(log, (block, row, value)):
+            column.append(v)
+
+    def _apply_event(self, e: dict, undo: list):
+        kind, block = e["type"], e["block"]
+        columns = self.columns
+        if kind == "stake":
+            r = self._row(e["trader"])
+            if columns["amount"][r] == 0:
+                self._set(undo, "staked_at", r, block)
+            self._set(undo, "amount", r, e.get("total", columns["amount"][r] + e["amount"]))
+            self._set(undo, "last_claim", r, block)
+            self._set(undo, "unstake_at", r, -1)
+            self._log(self._stake_log, block, r, columns["amount"][r])
+        elif kind == "unstake-requested":
+            self._set(undo, "unstake_at", self._row(e["trader"]), block)
+        elif kind == "unstake-completed":
+            r = self._row(e["trader"])
+            for name in ("amount", "staked_at", "last_claim", "unstake_at"):
+                self._set(undo, name, r, COLUMNS[name])
+            self._log(self._stake_log, block, r, 0)
+        elif kind == "rewards-claimed":
+            r = self._row(e["trader"])
+            self._set(undo, "last_claim", r, block)
+            self._set(undo, "claimed", r, columns["claimed"][r] + e["amount"])
+        elif kind == "votes-delegated":
+            r = self._row(e["trader"])
+            self._set(undo, "delegate", r, self._row(e["delegate"]))
+            self._log(self._delegate_log, block, r, columns["delegate"][r])
+        elif kind == "votes-undelegated":
+            r = self._row(e["trader"])
+            self._set(undo, "delegate", r, NO_DELEGATE)
+            self._log(self._delegate_log, block, r, NO_DELEGATE)
+        elif kind == "proposal-created":
+            self.proposals[e["proposalId"]] = {
+                "proposalId": e["proposalId"], "proposer": e["trader"], "title": e.get("title", ""),
+                "startBlock": e["startBlock"], "endBlock": e["endBlock"], "state": "pending",
+                "forVotes": 0, "againstVotes": 0, "abstainVotes": 0, "votes": {},
+            }
+            if undo is not None:
+                undo.append(("proposal", e["proposalId"], None))
+        elif kind == "vote-cast":
+            proposal = self.proposals.get(e["proposalId"])
+            if proposal is not None and e["trader"] not in proposal["votes"]:
+                proposal["votes"][e["trader"]] = (e["support"], e["votingPower"], block)
+                proposal[SUPPORT[e["support"]]] += e["votingPower"]
+                if undo is not None:
+                    undo.append(("vote", (e["proposalId"], e["trader"]), None))
+        elif kind in ("proposal-queued", "proposal-executed", "proposal-cancelled"):
+            proposal = self.proposals.get(e["proposalId"])
+            if proposal is not None:
+                if undo is not None:
+                    undo.append(("proposal", e["proposalId"], {"state": proposal["state"]}))
+                proposal["state"] = kind.rpartition("-")[2]
+
+    # --- vectorized reads ---
+    def _as_of(self, log: tuple, column: str, block: int) -> np.ndarray:
+        """Column values as of the end of ``block``."""
+        if block >= self.height:
+            return self.arrays()[column]
+        arrays = self._log_arrays.get(column)
+        if arrays is None or len(arrays[0]) != len(log[0]):
+            arrays = self._log_arrays[column] = tuple(np.array(values, dtype=np.int64) for values in log)
+        blocks, rows, values = arrays
+        end = np.searchsorted(blocks, block, side="right")
+        out = np.full(len(self.addresses), COLUMNS[column], dtype=np.int64)
+        if end:
+            # Last logged value per row within the prefix
+            unique, first = np.unique(rows[:end][::-1], return_index=True)
+            out[unique] = values[:end][end - 1 - first]
+        return out
+
+    def stakes_at(self, block: int) -> np.ndarray:
+        return self._as_of(self._stake_log, "amount", block)
+
+    def voting_power(self, block: int) -> np.ndarray:
+        """Delegated voting power of every address as of ``block``."""
+        block = min(block, self.height)
+        power = self._power_cache.get(block)
+        if power is None:
+            stake = self.stakes_at(block)
+            delegate = self._as_of(self._delegate_log, "delegate", block)
+            delegated = delegate != NO_DELEGATE
+            power = np.where(delegated, 0, stake)
+            np.add.at(power, delegate[delegated], stake[delegated])
+            if len(self._power_cache) >= 64:
+                self._power_cache = {}
+            self._power_cache[block] = power
+        return power
+
+    def pending_rewards(self, heights) -> np.ndarray:
+        """``get-pending-rewards`` for every address (columns) at each of ``heights`` (rows)."""
+        arrays = self.arrays()
+        heights = np.asarray([int(h) for h in heights], dtype=np.int64).reshape(-1, 1)
+        amount = arrays["amount"]
+        elapsed = np.maximum(heights - arrays["last_claim"], 0)
+        largest = int(amount.max(initial=0)) * int(elapsed.max(initial=0)) * max(self.reward_rate, 1)
+        if largest >= _INT64_SAFE:
+            amount, elapsed = amount.astype(object), elapsed.astype(object)
+        return np.where(amount > 0, amount * elapsed * self.reward_rate // 10000, 0)
+
+    # --- API payloads ---
+    def position(self, address: str, at: int, heights=()) -> dict:
+        arrays = self.arrays()
+        r = self.rows.get(address)
+        total = int(arrays["amount"].sum())
+        heights = [at] + [h for h in heights if h != at]
+        if r is None:
+            rewards = [0] * len(heights)
+            staked = claimed = delegators = power = 0
+            delegate = unstake_at = None
+        else:
+            rewards = [int(x) for x in self.pending_rewards(heights)[:, r]]
+            staked, claimed = self.columns["amount"][r], self.columns["claimed"][r]
+            d = self.columns["delegate"][r]
+            delegate = self.addresses[d] if d != NO_DELEGATE else None
+            delegators = int(np.count_nonzero(arrays["delegate"] == r))
+            power = int(self.voting_power(at)[r])
+            unstake_at = self.columns["unstake_at"][r] if self.columns["unstake_at"][r] >= 0 else None
+        return {
+            "address": address,
+            "blockHeight": at,
+            "staked": staked,
+            "stakedAt": self.columns["staked_at"][r] if staked else None,
+            "lastClaim": self.columns["last_claim"][r] if staked else None,
+            "unstakeRequestedAt": unstake_at,
+            "unstakableAt": unstake_at + self.cooldown if unstake_at is not None else None,
+            "pendingRewards": rewards[0],
+            "claimedRewards": claimed,
+            "rewardRate": self.reward_rate,
+            "totalStaked": total,
+            "shareOfPool": staked / total if total else 0.0,
+            "delegate": delegate,
+            "delegators": delegators,
+            "votingPower": power,
+            "projections": [{"blockHeight": h, "pendingRewards": x} for h, x in zip(heights[1:], rewards[1:])],
+        }
+
+    def rewards_projection(self, heights) -> list:
+        """Total pending rewards across all stakers at each height."""
+        pending = self.pending_rewards(heights)
+        return [{"blockHeight": int(h), "pendingRewards": int(row.sum()), "stakers": int(np.count_nonzero(row))}
+                for h, row in zip(heights, pending)]
+
+    def proposal_state(self, proposal: dict, at: int) -> str:
+        if at > proposal["endBlock"]:
+            total = proposal["forVotes"] + proposal["againstVotes"] + proposal["abstainVotes"]
+            return "succeeded" if total >= self.quorum and proposal["forVotes"] > proposal["againstVotes"] else "defeated"
+        return proposal["state"]
+
+    def _counts(self, for_votes: int, against: int, abstain: int) -> dict:
+        total = for_votes + against + abstain
+        return {"forVotes": for_votes, "againstVotes": against, "abstainVotes": abstain, "total": total,
+                "quorumMet": total >= self.quorum}
+
+    def tally(self, proposal_id: int, at: int) -> dict:
+        proposal = self.proposals.get(proposal_id)
+        if proposal is None:
+            return None
+        power = self.voting_power(proposal["startBlock"])
+        projected = [0, 0, 0]
+        voted = np.zeros(len(power), dtype=bool)
+        for voter, (support, _, _) in proposal["votes"].items():
+            r = self.rows.get(voter)
+            if r is not None:
+                projected[support] += int(power[r])
+                voted[r] = True
+        return {
+            "proposalId": proposal_id,
+            "title": proposal["title"],
+            "proposer": proposal["proposer"],
+            "startBlock": proposal["startBlock"],
+            "endBlock": proposal["endBlock"],
+            "blockHeight": at,
+            "state": self.proposal_state(proposal, at),
+            "storedState": proposal["state"],
+            "voters": len(proposal["votes"]),
+            "quorum": self.quorum,
+            "recorded": self._counts(proposal["forVotes"], proposal["againstVotes"], proposal["abstainVotes"]),
+            "projected": self._counts(projected[1], projected[0], projected[2]),
+            "outstandingPower": int(power[~voted].sum()),
+        }
+
+    def stats(self) -> dict:
+        arrays = self.arrays()
+        return {
+            "addresses": len(self.addresses),
+            "stakers": int(np.count_nonzero(arrays["amount"])),
+            "totalStaked": int(arrays["amount"].sum()),
+            "delegations": int(np.count_nonzero(arrays["delegate"] != NO_DELEGATE)),
+            "proposals": len(self.proposals),
+            "events": self.events,
+            "height": self.height,
+            "rewardRate": self.reward_rate,
+        }
@@ -0,0 +1,252 @@
+"""In-memory snapshot of every listed token for the marketplace and token pages.
+
+Built from ``tokens`` in Mongo plus each token's ``get-curve-info`` (supply,
+base price, reserve, graduated) read through the per-block ``ReadOnlyCache``.
+24h volume comes from the candle engine when one is given. ``basePrice`` is
+what the contract's ``get-token-price`` returns; ``nextTokenCost`` is the
+cost of buying one token now (``calculate-buy-price`` for 1, before fee).
+
+Every ``interval`` seconds only what may have changed is updated: tokens
+listed since the last refresh, tokens the indexer saw trade
+(``mark_changed``), tokens not launched on-chain yet, and the 24h volumes
+when the hour rolls over. Without an indexer every curve is re-read once
+the block height moves instead. Everything is rebuilt every
+``full_interval`` seconds, which also drops delisted tokens. Sort orders
+are computed once per change and pages are slices.
+
+The snapshot has an ``etag`` that only changes when its content does, so
+pollers sending ``If-None-Match`` can be answered without touching it.
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import time
+from typing import Iterable, Optional
+
+from services.bonding_curve import CurveState, ClarityArithmeticError, CURVE_NAMES, quote_buy
+from services.clarity import encode_arg
+
+# Launches are written behind, possibly by another worker, so new ones are looked for a bit further back
+LISTING_LOOKBACK = datetime.timedelta(seconds=60)
+
+SORT_FIELDS = {"volume": "stxVolume24h", "price": "nextTokenCost", "supply": "supply",
+               "reserve": "reserveBalance", "symbol": "symbol"}
+
+class TokenSnapshot:
+    def __init__(self, mongo_service, chain, candles=None, interval: float = None, concurrency: int = None,
+                 indexed: bool = False, full_interval: float = None):
+        self.mongo = mongo_service
+        self.chain = chain
+        self.candles = candles
+        self.indexed = indexed  # an indexer reports traded tokens through mark_changed
+        self.interval = interval if interval is not None else float(os.getenv("TOKEN_SNAPSHOT_INTERVAL", "5"))
+        self.full_interval = (full_interval if full_interval is not None
+                              else float(os.getenv("TOKEN_SNAPSHOT_FULL_INTERVAL", "300")))
+        self.concurrency = concurrency or int(os.getenv("TOKEN_SNAPSHOT_CONCURRENCY", "16"))
+        self.rows = []
+        self.etag = None
+        self.block_height = None
+        self.updated_at = None
+        self._orders = {}
+        self._curves = {}  # symbol -> last good get-curve-info, reused if a read fails
+        self._docs = {}  # symbol -> tokens doc (the first listing)
+        self._rows = {}  # symbol -> row
+        self._dirty = set()
+        self._full_at = None
+        self._last_created = None
+        self._read_height = None
+        self._hour = None
+        self._task = None
+        self.refreshes = 0
+        self.full_refreshes = 0
+        self.last_updated = 0
+        self.changes = 0
+        self.chain_errors = 0
+        self.last_refresh_ms = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Token snapshot refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _curve_info(self, symbol: str, sem: asyncio.Semaphore) -> Optional[dict]:
+        async with sem:
+            try:
+                info = await self.chain.read("bonding-curve", "get-curve-info",
+                                             (encode_arg({"type": "string-ascii", "value": symbol}),))
+            except Exception:
+                self.chain_errors += 1
+                return self._curves.get(symbol)
+        if info is None:
+            self._curves.pop(symbol, None)
+        else:
+            self._curves[symbol] = info
+        return info
+
+    def mark_changed(self, symbols: Iterable[str]):
+        """Indexer hook: these tokens traded, so their curve and volume are re-read on the next refresh."""
+        self._dirty.update(symbols)
+
+    async def refresh(self) -> bool:
+        """Update from Mongo and chain state; returns True if the content changed."""
+        start = time.perf_counter()
+        now = int(time.time())
+        dirty, self._dirty = self._dirty, set()
+        full = self._full_at is None or start - self._full_at >= self.full_interval
+        query = {}
+        if not full and self._last_created is not None:
+            query = {"createdAt": {"$gte": self._last_created - LISTING_LOOKBACK}}
+        listed = {}
+        for doc in await self.mongo.find_many("tokens", query, sort=[("createdAt", 1)]):
+            listed.setdefault(doc.get("symbol"), doc)
+        listed.pop(None, None)
+        created = [d["createdAt"] for d in listed.values() if isinstance(d.get("createdAt"), datetime.datetime)]
+        if created:
+            self._last_created = max(created + ([self._last_created] if self._last_created else []))
+
+        try:
+            height = await self.chain.tip()
+        except Exception:
+            self.chain_errors += 1
+            height = self._read_height
+        if full:
+            self._docs = listed
+            reread = set(listed)
+        else:
+            new = {symbol: doc for symbol, doc in listed.items() if symbol not in self._docs}
+            self._docs.update(new)
+            reread = set(new) | (dirty & self._docs.keys())
+            # Not launched on-chain yet: keep looking
+            reread |= {symbol for symbol in self._docs if symbol not in self._curves}
+            if not self.indexed and height != self._read_height:
+                reread = set(self._docs)
+        sem = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._curve_info(s, sem) for s in reread))
+        self._read_height = height
+
+        # The 24h window moves on the hour; otherwise only traded tokens' volume changes
+        hour = now // 3600
+        update = set(self._docs) if full or hour != self._hour else reread | (dirty & self._docs.keys())
+        self._hour = hour
+        rows = {} if full else self._rows
+        changed = full and self._docs.keys() != self._rows.keys()
+        for symbol in update:
+            row = self._row(self._docs[symbol], self._curves.get(symbol), now)
+            if row != self._rows.get(symbol):
+                changed = True
+            rows[symbol] = row
+        self._rows = rows
+        if full:
+            self._full_at = start
+            self.full_refreshes += 1
+        self.refreshes += 1
+        self.last_updated = len(update)
+        self.block_height = getattr(self.chain, "block_height", None)
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+        return self._publish(list(rows.values())) if changed or self.etag is None else False
+
+    def _volume(self, symbol: str, now: int) -> tuple:
+        if self.candles is None:
+            return 0, 0, 0
+        hour = now // 3600 * 3600
+        volume = stx = trades = 0
+        for c in self.candles.candles(symbol, "1h", hour - 23 * 3600, hour):
+            volume += c["volume"]
+            stx += c["stxVolume"]
+            trades += c["trades"]
+        return volume, stx, trades
+
+    def _row(self, doc: dict, info: Optional[dict], now: int) -> dict:
+        symbol = doc["symbol"]
+        created = doc.get("createdAt")
+        row = {
+            "symbol": symbol,
+            "creator": doc.get("creator"),
+            "createdAt": created.isoformat() if isinstance(created, datetime.datetime) else created,
+            "graduationThreshold": doc.get("graduationThreshold"),
+            "maxSupply": doc.get("maxSupply"),
+            "status": doc.get("status", "pending_launch"),
+            "curveType": None, "basePrice": None, "nextTokenCost": None, "supply": None,
+            "reserveBalance": None, "graduated": None,
+        }
+        if info is not None:
+            curve = CurveState.from_clarity(symbol, info)
+            try:
+                next_cost = quote_buy(curve, 1)["cost"]
+            except ClarityArithmeticError:
+                next_cost = None
+            row.update(
+                curveType=CURVE_NAMES[curve.curve_type] if curve.curve_type < len(CURVE_NAMES) else str(curve.curve_type),
+                basePrice=curve.base_price, nextTokenCost=next_cost, supply=curve.supply,
+                reserveBalance=curve.reserve_balance, graduated=curve.graduated,
+                status="graduated" if curve.graduated else "trading",
+            )
+        row["volume24h"], row["stxVolume24h"], row["trades24h"] = self._volume(symbol, now)
+        return row
+
+    def _publish(self, rows: list) -> bool:
+        rows.sort(key=lambda r: r["symbol"])
+        etag = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        if etag == self.etag:
+            return False
+        orders = {}
+        for sort, field in SORT_FIELDS.items():
+            known = sorted((r for r in rows if r[field] is not None), key=lambda r: r[field])
+            missing = [r for r in rows if r[field] is None]
+            # Tokens without a value (not launched yet) go last in both directions
+            orders[sort, "asc"] = known + missing
+            orders[sort, "desc"] = known[::-1] + missing
+        self.rows, self._orders, self.etag = rows, orders, etag
+        self.updated_at = datetime.datetime.utcnow().isoformat()
+        self.changes += 1
+        return True
+
+    @property
+    def ready(self) -> bool:
+        return self.etag is not None
+
+    def page_etag(self, sort: str, order: str, offset: int, limit: int) -> str:
+        return f'"{self.etag}-{sort}-{order}-{offset}-{limit}"'
+
+    def page(self, sort: str = "volume", order: str = "desc", offset: int = 0, limit: int = 50) -> dict:
+        return {
+            "blockHeight": self.block_height,
+            "updatedAt": self.updated_at,
+            "total": len(self.rows),
+            "offset": offset,
+            "limit": limit,
+            "sort": sort,
+            "order": order,
+            "tokens": self._orders.get((sort, order), [])[offset:offset + limit],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self.rows),
+            "etag": self.etag,
+            "blockHeight": self.block_height,
+            "refreshes": self.refreshes,
+            "fullRefreshes": self.full_refreshes,
+            "lastUpdatedTokens": self.last_updated,
+            "changes": self.changes,
+            "chainErrors": self.chain_errors,
+            "lastRefreshMs": round(self.last_refresh_ms, 2),
+        }
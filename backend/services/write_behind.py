@@ -0,0 +1,130 @@
+import asyncio
+import os
+import time
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+class WriteBehindQueue:
+    """Buffers inserts in memory and writes them with insert_many in the background.
+
+    ``enqueue`` returns as soon as the document is buffered. A batch is flushed
+    when ``batch_size`` documents are pending or every ``flush_interval``
+    seconds, whichever comes first. At most ``max_pending`` documents are held;
+    beyond that ``enqueue`` waits for the flusher (backpressure). ``close``
+    flushes everything still buffered. A failed insert is retried with only
+    the documents that did not go in.
+    """
+
+    def __init__(self, mongo_service, batch_size: int = None, flush_interval: float = None,
+                 max_pending: int = None, max_retries: int = 3):
+        self.mongo_service = mongo_service
+        self.batch_size = batch_size or int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+        self.flush_interval = flush_interval or float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.2"))
+        self.max_pending = max_pending or int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+        self.max_retries = max_retries
+        self._queue = None
+        self._batch_ready = None
+        self._task = None
+        self._closing = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.backpressure_waits = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._flush_ms_total = 0.0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._batch_ready = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._closing = True
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+
+    async def enqueue(self, collection: str, doc: dict):
+        if self._task is None:
+            # Not running (startup not done or already shut down): write through
+            await self.mongo_service.insert_many(collection, [doc])
+            return
+        if self._queue.full():
+            self.backpressure_waits += 1
+        await self._queue.put((collection, doc))
+        self.enqueued += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            while not self._queue.empty():
+                await self._flush(self._take_batch())
+            if self._closing:
+                return
+
+    def _take_batch(self) -> list:
+        batch = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch: list):
+        by_collection = {}
+        for collection, doc in batch:
+            by_collection.setdefault(collection, []).append(doc)
+        start = time.perf_counter()
+        for collection, docs in by_collection.items():
+            await self._write(collection, docs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.batches += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._flush_ms_total += elapsed_ms
+
+    async def _write(self, collection: str, docs: list):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.mongo_service.insert_many(collection, docs)
+                self.written += len(docs)
+                return
+            except BulkWriteError as e:
+                # Unordered, so every doc without a write error went in. insert_many gave each
+                # doc its _id on the first attempt: a duplicate key means an earlier attempt wrote it.
+                failed = {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY}
+                self.written += len(docs) - len(failed)
+                docs = [doc for i, doc in enumerate(docs) if i in failed]
+                if not docs:
+                    return
+                error = e
+            except Exception as e:
+                error = e
+            if attempt < self.max_retries:
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        self.failed += len(docs)
+        print(f"Write-behind dropped {len(docs)} {collection} docs: {error}")
+
+    def stats(self) -> dict:
+        return {
+            "queueDepth": self._queue.qsize() if self._queue else 0,
+            "maxPending": self.max_pending,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "backpressureWaits": self.backpressure_waits,
+            "lastFlushMs": self.last_flush_ms,
+            "maxFlushMs": self.max_flush_ms,
+            "avgFlushMs": self._flush_ms_total / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,96 @@
+"""The off-chain quotes must match contracts/bonding-curve.clar.
+
+Expected values are worked out by hand from the contract's
+calculate-buy-cost / calculate-sell-return / calculate-fee, with the
+default 30 bps fee unless stated.
+"""
+import pytest
+
+from services.bonding_curve import (
+    ClarityArithmeticError, CurveState, QuoteEngine,
+    calculate_buy_cost, calculate_fee, calculate_sell_return, log2, pow_uint, quote_buy, quote_sell,
+)
+
+LINEAR, EXPONENTIAL, LOGARITHMIC, SIGMOID = range(4)
+
+# (supply, amount, curve-type, base-price, slope, fee-percentage) -> calculate-buy-price
+BUY = [
+    ((0, 100, LINEAR, 1000, 10, 30), {"cost": 100_000, "fee": 300, "total": 100_300}),
+    ((500, 100, LINEAR, 1000, 10, 30), {"cost": 600_000, "fee": 1_800, "total": 601_800}),
+    ((500, 100, EXPONENTIAL, 1000, 10, 30), {"cost": 250_100_000, "fee": 750_300, "total": 250_850_300}),
+    # log2(501) = 8, and 8 * 10 / 100 truncates to 0
+    ((500, 100, LOGARITHMIC, 1000, 10, 30), {"cost": 100_000, "fee": 300, "total": 100_300}),
+    # log2 caps at 10: 1000 + 10 * 250 / 100 = 1025
+    ((5000, 7, LOGARITHMIC, 1000, 250, 30), {"cost": 7_175, "fee": 21, "total": 7_196}),
+    # Sigmoid is priced with the linear formula
+    ((500, 100, SIGMOID, 1000, 10, 30), {"cost": 600_000, "fee": 1_800, "total": 601_800}),
+    ((0, 1, LINEAR, 1, 0, 0), {"cost": 1, "fee": 0, "total": 1}),
+    # Beyond int64: 1024 * (1000 + 2**62 * 4) = 2**74 + 1_024_000
+    ((2 ** 62, 1024, LINEAR, 1000, 4, 30),
+     {"cost": 18_889_465_931_478_581_878_784, "fee": 56_668_397_794_435_745_636,
+      "total": 18_946_134_329_273_017_624_420}),
+]
+
+# (supply, amount, ...) -> calculate-sell-price, priced at supply - amount
+SELL = [
+    ((600, 100, LINEAR, 1000, 10, 30), {"return": 600_000, "fee": 1_800, "net": 598_200}),
+    ((600, 100, EXPONENTIAL, 1000, 10, 30), {"return": 250_100_000, "fee": 750_300, "net": 249_349_700}),
+    ((100, 100, LOGARITHMIC, 1000, 10, 30), {"return": 100_000, "fee": 300, "net": 99_700}),
+    ((600, 100, SIGMOID, 1000, 10, 30), {"return": 600_000, "fee": 1_800, "net": 598_200}),
+]
+
+# Calls the contract aborts with a runtime error
+BUY_ABORTS = [
+    (2 ** 64, 1, EXPONENTIAL, 1000, 1, 30),   # supply squared overflows uint
+    (0, 2 ** 127, LINEAR, 4, 0, 30),          # amount * price overflows uint
+]
+SELL_ABORTS = [
+    (10, 11, LINEAR, 1000, 10, 30),           # selling more than the supply underflows
+]
+
+
+def curve(supply, base_price, curve_type, slope, fee_percentage, symbol="T"):
+    return CurveState(symbol=symbol, supply=supply, base_price=base_price, curve_type=curve_type,
+                      slope=slope, fee_percentage=fee_percentage)
+
+
+def test_helpers_match_contract():
+    assert [log2(n) for n in (0, 1, 2, 3, 4, 7, 8, 1023, 1024, 10 ** 30)] == [0, 0, 1, 1, 2, 2, 3, 9, 10, 10]
+    assert [pow_uint(7, e) for e in range(4)] == [1, 7, 49, 343]
+    assert calculate_fee(12345, 30) == 37
+
+
+@pytest.mark.parametrize("args,expected", BUY)
+def test_quote_buy(args, expected):
+    supply, amount, curve_type, base_price, slope, fee = args
+    assert calculate_buy_cost(supply, amount, curve_type, base_price, slope) == expected["cost"]
+    assert quote_buy(curve(supply, base_price, curve_type, slope, fee), amount) == expected
+
+
+@pytest.mark.parametrize("args,expected", SELL)
+def test_quote_sell(args, expected):
+    supply, amount, curve_type, base_price, slope, fee = args
+    assert calculate_sell_return(supply, amount, curve_type, base_price, slope) == expected["return"]
+    assert quote_sell(curve(supply, base_price, curve_type, slope, fee), amount) == expected
+
+
+@pytest.mark.parametrize("side,args", [("buy", a) for a in BUY_ABORTS] + [("sell", a) for a in SELL_ABORTS])
+def test_scalar_aborts(side, args):
+    supply, amount, curve_type, base_price, slope, fee = args
+    with pytest.raises(ClarityArithmeticError):
+        (quote_buy if side == "buy" else quote_sell)(curve(supply, base_price, curve_type, slope, fee), amount)
+
+
+@pytest.mark.parametrize("side,vectors,aborts", [("buy", BUY, BUY_ABORTS), ("sell", SELL, SELL_ABORTS)])
+def test_engine_matches_vectors(side, vectors, aborts):
+    cases = [(args, expected) for args, expected in vectors] + [(args, None) for args in aborts]
+    curves = {}
+    for i, ((supply, _, curve_type, base_price, slope, fee), _) in enumerate(cases):
+        curves[f"T{i}"] = curve(supply, base_price, curve_type, slope, fee, symbol=f"T{i}")
+    out = QuoteEngine(curves).quote(list(curves), [args[1] for args, _ in cases], side)
+    for i, (args, expected) in enumerate(cases):
+        if expected is None:
+            assert not out["valid"][i], args
+            continue
+        assert out["valid"][i], args
+        assert {key: int(out[key][i]) for key in expected} == expected, args
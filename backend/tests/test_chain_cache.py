@@ -0,0 +1,76 @@
+"""Per-block read-only cache and the /contract/read allowlist."""
+import asyncio
+import os
+
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+import httpx
+import pytest
+
+import main
+from benchmarks.fake_node import FakeStacksNode
+from services.chain_service import ReadOnlyCache, public_read
+from services.clarity import encode_arg
+
+
+def arg(symbol):
+    return encode_arg({"type": "string-ascii", "value": symbol})
+
+
+def test_full_cache_evicts_least_recently_used():
+    async def run():
+        node = FakeStacksNode(latency=0)
+        cache = ReadOnlyCache(node, tip_ttl=60, max_entries=2)
+        for symbol in ("MOON", "DOGE"):
+            await cache.call("bonding-curve", "get-token-supply", (arg(symbol),))
+        await cache.call("bonding-curve", "get-token-supply", (arg("MOON"),))
+        await cache.call("bonding-curve", "get-token-supply", (arg("PEPE"),))  # evicts DOGE
+        assert cache.evictions == 1 and node.calls == 3
+        assert (await cache.call("bonding-curve", "get-token-supply", (arg("MOON"),)))["cached"]
+        assert (await cache.call("bonding-curve", "get-token-supply", (arg("PEPE"),)))["cached"]
+        assert not (await cache.call("bonding-curve", "get-token-supply", (arg("DOGE"),)))["cached"]
+    asyncio.run(run())
+
+
+def test_new_block_drops_entries_and_misses_coalesce():
+    async def run():
+        node = FakeStacksNode(latency=0.01)
+        cache = ReadOnlyCache(node, tip_ttl=60)
+        results = await asyncio.gather(*(cache.call("bonding-curve", "get-curve-info", (arg("MOON"),))
+                                         for _ in range(10)))
+        assert node.calls == 1 and cache.coalesced == 9
+        assert {r["result"] for r in results} == {results[0]["result"]}
+
+        node.curves["MOON"]["supply"] += 1
+        node.mine()
+        cache.observe_block(node.block_height)
+        fresh = await cache.call("bonding-curve", "get-curve-info", (arg("MOON"),))
+        assert not fresh["cached"] and fresh["blockHeight"] == node.block_height
+        assert fresh["result"] != results[0]["result"] and node.calls == 2
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("contract, function, allowed", [
+    ("bonding-curve", "get-token-supply", True),
+    ("liquidity-pool", "get-reserves", True),
+    ("doge-pool", "get-reserves", True),
+    ("doge-pool", "get-token-supply", False),
+    ("bonding-curve", "is-admin", False),
+    ("bonding-curve", "buy-tokens", False),
+    ("some-other-contract", "get-token-supply", False),
+])
+def test_public_reads(contract, function, allowed):
+    assert public_read(contract, function, pools={"liquidity-pool", "doge-pool"}) is allowed
+
+
+def test_contract_read_rejects_functions_outside_the_allowlist(monkeypatch):
+    async def run():
+        node = FakeStacksNode(latency=0)
+        monkeypatch.setattr(main, "chain_cache", ReadOnlyCache(node, tip_ttl=60))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as http:
+            body = {"contract": "bonding-curve", "args": [{"type": "string-ascii", "value": "MOON"}]}
+            ok = await http.post("/contract/read", json={**body, "function": "get-token-supply"})
+            denied = await http.post("/contract/read", json={**body, "function": "get-fee-recipient"})
+        assert ok.status_code == 200 and ok.json()["value"] == {"ok": 1000}
+        assert denied.status_code == 403 and node.calls == 1
+    asyncio.run(run())
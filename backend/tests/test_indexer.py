@@ -0,0 +1,56 @@
+"""Indexer reorgs: orphaned events are dropped and the derived docs rebuilt."""
+import asyncio
+import json
+
+from benchmarks.fake_mongo import FakeMongoClient
+from services.indexer import ContractIndexer, FileReplaySource
+from services.mongo_service import MongoService
+
+B, C = "SP" + "B" * 38, "SP" + "C" * 38
+CURVE = "SP000.bonding-curve"
+NOW = 1_773_000_000
+
+
+def block(height, values, fork="", parent_fork=""):
+    return {"height": height, "hash": f"0x{height:x}{fork}", "parent_hash": f"0x{height - 1:x}{parent_fork}",
+            "timestamp": NOW + height, "events": [{"tx_id": f"0x{height:x}{fork}{i:04x}", "contract": CURVE, "value": v}
+                                                  for i, v in enumerate(values)]}
+
+
+def bought(trader, amount, cost):
+    return {"event": "token-bought", "symbol": "MOON", "buyer": trader, "amount": amount, "cost": cost, "fee": 0}
+
+
+def sold(trader, amount, received):
+    return {"event": "token-sold", "symbol": "MOON", "seller": trader, "amount": amount, "received": received, "fee": 0}
+
+
+def test_reorg_rebuilds_positions_stats_and_candles(tmp_path):
+    path = tmp_path / "blocks.jsonl"
+    with open(path, "w") as f:
+        for b in (block(1, [bought(B, 100, 10_000)]),
+                  block(2, [sold(B, 40, 5_000)]),
+                  block(3, [bought(C, 10, 2_000)]),
+                  # Blocks 2 and 3 are replaced by a fork off block 1
+                  block(2, [bought(B, 50, 6_000)], fork="b"),
+                  block(3, [], fork="b", parent_fork="b")):
+            f.write(json.dumps(b) + "\n")
+    mongo = MongoService(client=FakeMongoClient(latency=0))
+    rebuilt = []
+    indexer = ContractIndexer(mongo, FileReplaySource(str(path)), batch_blocks=1, candle_interval=60,
+                              on_candles=lambda docs, removed: rebuilt.append((docs, removed)))
+    asyncio.run(indexer.run())
+
+    async def read(collection):
+        return {d["_id"]: d for d in await mongo.find_many(collection, {})}
+    trades, positions, stats, candles = (asyncio.run(read(c)) for c in ("trades", "user_positions", "user_stats", "candles"))
+
+    assert indexer.reorgs == 1 and indexer.rolled_back == 2 and indexer.tip == 3
+    assert sorted(t["blockHash"] for t in trades.values()) == ["0x1", "0x2b"]
+    position = positions[f"{B}:MOON"]
+    assert (position["amount"], position["totalSpent"], position["trades"]) == (150, 16_000, 2)
+    assert f"{C}:MOON" not in positions and C not in stats
+    assert (stats[B]["trades"], stats[B]["volume"]) == (2, 16_000)
+    [candle] = candles.values()
+    assert (candle["trades"], candle["volume"], candle["stxVolume"]) == (2, 150, 16_000)
+    assert rebuilt and rebuilt[0][1] == []
@@ -0,0 +1,44 @@
+"""Rule-based intent fast path: what may skip the LLM, and what must not."""
+import pytest
+
+from services.intent_parser import RuleIntentParser
+
+parser = RuleIntentParser(min_confidence=0.9)
+
+
+@pytest.mark.parametrize("prompt, intent, entities", [
+    ("buy 100 $MOON", "buy", {"token": "MOON", "amount": 100}),
+    ("buy MOON", "buy", {"token": "MOON"}),
+    ("buy $MOON for 5 STX", "buy", {"token": "MOON", "stxAmount": 5}),
+    ("buy 2.5k stx of $PEPE", "buy", {"token": "PEPE", "stxAmount": 2500}),
+    ("sell all PEPE slippage 2%", "sell", {"token": "PEPE", "amount": "all", "slippage": 2}),
+    ("BUY 100 MOON", "buy", {"token": "MOON", "amount": 100}),
+    ("launch $DOGE", "launch", {"token": "DOGE"}),
+    ("create a token called ROCKET", "launch", {"token": "ROCKET"}),
+    ("deploy a new meme coin named vibes", "launch", {"token": "VIBES"}),
+])
+def test_fast_path_commands(prompt, intent, entities):
+    result = parser.extract(prompt)
+    assert result is not None, prompt
+    assert (result["intent"], result["entities"]) == (intent, entities)
+
+
+@pytest.mark.parametrize("prompt", [
+    # Launch verbs followed by a bare word, even an upper-case one
+    "CREATE WALLET",
+    "Deploy NFT",
+    "create wallet",
+    "launch MOON",
+    "mint NFT",
+    # A shouted message makes every word upper-case
+    "BUY MOON",
+    "SELL PEPE",
+    # Bare lower-case names, zero amounts and questions
+    "buy bitcoin",
+    "buy 0 $MOON",
+    "buy $MOON for 0 STX",
+    "should I buy $MOON?",
+    "buy some tokens",
+])
+def test_left_to_the_llm(prompt):
+    assert parser.extract(prompt) is None, parser.parse(prompt)
@@ -0,0 +1,116 @@
+"""Order book mirror: replaying marketplace.clar events, fill previews and admin settings."""
+import asyncio
+import json
+
+from benchmarks.fake_mongo import FakeMongoClient
+from services.indexer import ContractIndexer, FileReplaySource
+from services.mongo_service import MongoService
+from services.orderbook import OrderBooks
+
+A, B, C = "SP" + "A" * 38, "SP" + "B" * 38, "SP" + "C" * 38
+MARKETPLACE = "SP000.marketplace"
+
+
+def placed(order_id, trader, side, price, amount):
+    return {"event": "order-placed", "order-id": order_id, "trader": trader, "symbol": "MOON",
+            "side": 0 if side == "buy" else 1, "order-type": 1, "price": price, "amount": amount}
+
+
+def block(height, values, contract=MARKETPLACE, fork=""):
+    return {"height": height, "hash": f"0x{height:x}{fork}", "parent_hash": f"0x{height - 1:x}", "timestamp": height,
+            "events": [{"tx_id": f"0x{height:x}{fork}{i:04x}", "contract": contract, "value": v}
+                       for i, v in enumerate(values)]}
+
+
+def write_blocks(path, blocks, mode="w"):
+    with open(path, mode) as f:
+        for b in blocks:
+            f.write(json.dumps(b) + "\n")
+
+
+BLOCKS = [
+    block(1, [placed(0, A, "sell", 100, 10), placed(1, B, "sell", 100, 5),
+              placed(2, A, "sell", 105, 20), placed(3, C, "buy", 90, 7)]),
+    block(2, [{"event": "order-cancelled", "order-id": 1, "trader": B},
+              # A partial fill closes the order (status PARTIAL)
+              {"event": "order-filled", "order-id": 0, "filler": C, "fill-amount": 4, "fill-price": 100,
+               "fee": 1, "new-status": 3}]),
+]
+EXPECTED_ORDERS = {2: ("MOON", "sell", 105, 20, A), 3: ("MOON", "buy", 90, 7, C)}
+
+
+def test_replay_events_and_indexer_feed_agree(tmp_path):
+    books = OrderBooks()
+    for b in BLOCKS:
+        for event in b["events"]:
+            books.apply_event(event["value"])
+    assert books.orders == EXPECTED_ORDERS
+
+    path = tmp_path / "blocks.jsonl"
+    write_blocks(path, BLOCKS)
+    mirrored = OrderBooks()
+    indexer = ContractIndexer(MongoService(client=FakeMongoClient(latency=0)), FileReplaySource(str(path)),
+                              batch_blocks=1, on_orders=mirrored.sync)
+    asyncio.run(indexer.run())
+    assert mirrored.orders == EXPECTED_ORDERS
+    snapshot = mirrored.snapshot("MOON")
+    assert (snapshot["bestBid"], snapshot["bestAsk"], snapshot["spread"]) == (90, 105, 15)
+    assert snapshot["asks"] == [{"price": 105, "amount": 20, "orders": 1}]
+
+
+def preview_book():
+    books = OrderBooks(taker_fee_bps=30)
+    for order in ((1, A, "MOON", "sell", 100, 10), (2, B, "MOON", "sell", 100, 5),
+                  (3, A, "MOON", "sell", 101, 8), (4, B, "MOON", "sell", 103, 50)):
+        books.add_order(*order)
+    return books
+
+
+def test_fill_preview_best_price_first_with_fees():
+    preview = preview_book().match_preview("MOON", "buy", 20, taker=C)
+    assert [(f["orderId"], f["amount"], f["price"], f["fee"], f["status"]) for f in preview["fills"]] == [
+        (1, 10, 100, 3, "filled"),    # 1000 * 30 / 10000
+        (2, 5, 100, 1, "filled"),     # 500 * 30 / 10000 truncates
+        (3, 5, 101, 1, "partial"),
+    ]
+    assert (preview["filled"], preview["unfilled"], preview["cost"], preview["fees"]) == (20, 0, 2005, 5)
+    assert (preview["averagePrice"], preview["worstPrice"]) == (100.25, 101)
+
+
+def test_fill_preview_skips_own_orders_and_respects_limit():
+    books = preview_book()
+    own = books.match_preview("MOON", "buy", 20, taker=A)
+    assert [(f["orderId"], f["amount"], f["fee"]) for f in own["fills"]] == [(2, 5, 1), (4, 15, 4)]
+    limited = books.match_preview("MOON", "buy", 20, limit_price=100, taker=C)
+    assert [f["orderId"] for f in limited["fills"]] == [1, 2]
+    assert (limited["filled"], limited["unfilled"]) == (15, 5)
+
+
+def test_admin_events_refresh_fee_and_pause(tmp_path):
+    path = tmp_path / "blocks.jsonl"
+    write_blocks(path, [
+        block(1, [{"event": "trading-fees-updated", "maker-fee": 10, "taker-fee": 50}]),
+        # Same event name from another contract: not the marketplace's switch
+        block(2, [{"event": "pause-state-changed", "paused": True}], contract="SP000.bonding-curve"),
+    ])
+    mongo = MongoService(client=FakeMongoClient(latency=0))
+    books = OrderBooks(taker_fee_bps=30)
+    indexer = ContractIndexer(mongo, FileReplaySource(str(path)), batch_blocks=1, on_market_settings=books.sync_settings)
+    asyncio.run(indexer.run())
+    assert (books.taker_fee_bps, books.paused) == (50, False)
+
+    write_blocks(path, [block(3, [{"event": "pause-state-changed", "paused": True}])], mode="a")
+    asyncio.run(indexer.run())
+    assert books.paused
+    books.add_order(1, A, "MOON", "sell", 100, 10)
+    assert books.match_preview("MOON", "buy", 5, taker=C)["fills"] == []
+
+    # Block 3 is reorged away: the pause goes with it
+    write_blocks(path, [block(3, [], fork="b")], mode="a")
+    asyncio.run(indexer.run())
+    assert (books.taker_fee_bps, books.paused) == (50, False)
+
+    # A restart picks the settings up from market_settings
+    restarted = OrderBooks(taker_fee_bps=30)
+    restarted.sync_settings(asyncio.run(mongo.find_many("market_settings", {})), [])
+    assert (restarted.taker_fee_bps, restarted.paused) == (50, False)
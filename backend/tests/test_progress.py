@@ -0,0 +1,91 @@
+"""Quest and achievement progress from indexed bonding-curve events."""
+import asyncio
+import json
+
+from benchmarks.fake_mongo import FakeMongoClient
+from services.indexer import ContractIndexer, FileReplaySource
+from services.mongo_service import MongoService
+from services.progress import DAY, STX, ProgressEngine
+
+A, B = "SP" + "A" * 38, "SP" + "B" * 38
+CURVE = "SP000.bonding-curve"
+NOW = 1_773_000_000  # a Sunday evening, UTC
+
+
+def block(height, values, timestamp=NOW):
+    return {"height": height, "hash": f"0x{height:x}", "parent_hash": f"0x{height - 1:x}", "timestamp": timestamp,
+            "events": [{"tx_id": f"0x{height:x}{i:04x}", "contract": CURVE, "value": v} for i, v in enumerate(values)]}
+
+
+def launched(symbol, creator):
+    return {"event": "token-launched", "symbol": symbol, "creator": creator, "max-supply": 10 ** 9}
+
+
+def test_indexed_launch_drives_quests_and_achievements(tmp_path):
+    path = tmp_path / "blocks.jsonl"
+    with open(path, "w") as f:
+        for b in (block(1, [launched("MOON", A)]),
+                  block(2, [launched("DOGE", A),
+                            {"event": "token-bought", "symbol": "MOON", "buyer": B, "amount": 50, "cost": 5_000, "fee": 50}])):
+            f.write(json.dumps(b) + "\n")
+    engine = ProgressEngine()
+    seen = []
+    indexer = ContractIndexer(MongoService(client=FakeMongoClient(latency=0)), FileReplaySource(str(path)),
+                              batch_blocks=1, on_activity=lambda trades: (seen.extend(trades), engine.observe(trades)))
+    asyncio.run(indexer.run())
+
+    assert [t["type"] for t in seen] == ["launch", "launch", "buy"]
+    assert engine.quests(A, now=NOW)["Token Creator"]["progress"] == 2
+    assert engine.achievements(A, now=NOW)["First Launch"]
+    assert engine.quests(B, now=NOW)["Daily Trader"]["progress"] == 1
+    assert not engine.achievements(B, now=NOW)["First Launch"]
+
+    # Replaying the same blocks does not count them twice
+    asyncio.run(ContractIndexer(indexer.mongo_service, FileReplaySource(str(path)), batch_blocks=1,
+                                on_activity=engine.observe).run())
+    assert engine.get(A)["tokensCreated"] == 2
+
+
+def trade(ts, kind="buy", stx=1_000_000, trader=A):
+    return {"trader": trader, "type": kind, "amount": 10, "stx": stx, "symbol": "MOON", "timestamp": ts}
+
+
+def test_quest_windows_reset_at_day_week_and_month_boundaries():
+    engine = ProgressEngine()
+    engine.observe([trade(NOW + i) for i in range(5)] + [trade(NOW, "launch"), trade(NOW, "launch")])
+    sunday = engine.quests(A, now=NOW)
+    assert sunday["Daily Trader"] == {"progress": 5, "total": 5, "completed": True, "endsAt": NOW + 4 * 3600}
+    assert sunday["Token Creator"]["progress"] == 2
+    assert engine.get(A)["xpEarned"] == 50
+
+    # Monday is a new day and a new ISO week
+    monday = NOW + DAY
+    assert engine.quests(A, now=monday)["Daily Trader"] == {"progress": 0, "total": 5, "completed": False,
+                                                            "endsAt": monday + 4 * 3600}
+    engine.observe([trade(monday), trade(monday, "launch")])
+    assert engine.quests(A, now=monday)["Daily Trader"]["progress"] == 1
+    assert engine.quests(A, now=monday)["Token Creator"]["progress"] == 1
+
+    # A late Sunday event is not counted for the day that has moved on, only for lifetime totals and the month
+    engine.observe([trade(NOW + 10)])
+    assert engine.quests(A, now=monday)["Daily Trader"]["progress"] == 1
+    assert engine.get(A)["trades"] == 7
+
+    # Volume King runs per calendar month: 31 March -> 1 April
+    march_31, april_1 = 1_774_958_400, 1_775_001_600
+    engine.observe([trade(march_31, stx=60 * STX)])
+    assert engine.quests(A, now=march_31)["Volume King"]["progress"] == 67  # 7 STX earlier in March
+    engine.observe([trade(april_1, stx=40 * STX)])
+    assert engine.quests(A, now=april_1)["Volume King"] == {"progress": 40, "total": 100, "completed": False,
+                                                            "endsAt": 1_777_593_600}
+
+
+def test_streak_extends_on_consecutive_days_and_restarts_after_a_gap():
+    engine = ProgressEngine()
+    for day in range(3):
+        engine.observe([trade(NOW + day * DAY)])
+    assert engine.streak(A, now=NOW + 2 * DAY) == 3
+    assert engine.streak(A, now=NOW + 3 * DAY) == 3  # still alive until a whole day is missed
+    assert engine.streak(A, now=NOW + 4 * DAY) == 0
+    engine.observe([trade(NOW + 4 * DAY)])
+    assert engine.streak(A, now=NOW + 4 * DAY) == 1
@@ -0,0 +1,103 @@
+"""Response cache: writes through both tiers, across workers sharing one L2."""
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.stub_resp import StubRespServer
+from services.response_cache import RespStore, ResponseCache
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = StubRespServer(latency=0).start()
+    yield server
+    server.stop()
+
+
+def workers(stub, n=2):
+    # No L1, so every read goes to the shared tier
+    prefix = f"test{time.time()}:"
+    return [ResponseCache(RespStore(stub.url), l1_ttl=0, lock_wait=0.2, prefix=prefix) for _ in range(n)]
+
+
+def loader(value, started=None, release=None):
+    async def load():
+        if started:
+            started.set()
+        if release:
+            await release.wait()
+        return value
+    return load
+
+
+async def must_not_load():
+    raise AssertionError("served from L2 expected")
+
+
+@pytest.mark.parametrize("write", ["put", "invalidate"])
+def test_load_started_before_another_workers_write_is_not_served(stub, write):
+    async def run():
+        a, b = workers(stub)
+        started, release = asyncio.Event(), asyncio.Event()
+        slow = asyncio.ensure_future(a.get("profile:X", loader("old", started, release)))
+        await started.wait()
+        if write == "put":
+            await b.put("profile:X", "new")
+        else:
+            await b.invalidate("profile:X")
+        release.set()
+        assert await slow == "old"  # the caller that asked before the write still gets its answer
+        await asyncio.sleep(0.01)
+        # A's store landed after the write; both workers treat it as a miss and load the current value
+        for cache in (b, a):
+            assert await cache.get("profile:X", loader("fresh")) == "fresh"
+        for cache in (a, b):
+            await cache.close()
+    asyncio.run(run())
+
+
+def test_put_is_served_to_other_workers(stub):
+    async def run():
+        a, b = workers(stub)
+        assert await a.get("profile:Y", loader("v1")) == "v1"
+        assert await b.get("profile:Y", must_not_load) == "v1"
+        await a.put("profile:Y", "v2")
+        assert await b.get("profile:Y", must_not_load) == "v2"
+        await b.invalidate("profile:Y")
+        assert await a.get("profile:Y", loader("v3")) == "v3"
+        assert await b.get("profile:Y", must_not_load) == "v3"
+        for cache in (a, b):
+            await cache.close()
+    asyncio.run(run())
+
+
+def test_write_in_same_worker_drops_load_in_flight():
+    async def run():
+        cache = ResponseCache(None, l1_ttl=60)
+        started, release = asyncio.Event(), asyncio.Event()
+        slow = asyncio.ensure_future(cache.get("profile:Z", loader("old", started, release)))
+        await started.wait()
+        await cache.invalidate("profile:Z")
+        # Callers after the write do not join the stale load
+        assert await cache.get("profile:Z", loader("new")) == "new"
+        release.set()
+        assert await slow == "old"
+        assert await cache.get("profile:Z", must_not_load) == "new"
+    asyncio.run(run())
+
+
+def test_concurrent_misses_across_workers_load_once(stub):
+    async def run():
+        caches = workers(stub, 4)
+        loads = []
+
+        async def load():
+            loads.append(1)
+            await asyncio.sleep(0.02)
+            return "hot"
+        results = await asyncio.gather(*(c.get("profile:HOT", load) for c in caches for _ in range(5)))
+        assert results == ["hot"] * 20 and len(loads) == 1
+        for cache in caches:
+            await cache.close()
+    asyncio.run(run())
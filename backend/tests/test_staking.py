@@ -0,0 +1,52 @@
+"""Staking model: values as of past blocks, and reorgs undone in place."""
+from services.indexer import SEQ_PER_BLOCK
+from services.staking import StakingModel
+
+A, B, C = "SP" + "A" * 38, "SP" + "B" * 38, "SP" + "C" * 38
+
+
+def event(block, kind, trader, position=0, **fields):
+    return dict(fields, seq=block * SEQ_PER_BLOCK + position, block=block, type=kind, trader=trader)
+
+
+def stake(block, trader, total, position=0):
+    return event(block, "stake", trader, position, amount=0, total=total)
+
+
+def stakes(model, block):
+    return dict(zip(model.addresses, model.stakes_at(block).tolist()))
+
+
+def test_same_length_reorg_refreshes_values_as_of_past_blocks():
+    model = StakingModel(reorg_depth=64)
+    model.apply([stake(10, A, 100), stake(20, A, 150), stake(30, B, 40)])
+    assert stakes(model, 25) == {A: 150, B: 0}
+
+    # Blocks 20+ are replaced by as many stake events with other amounts
+    model.rollback(20)
+    assert stakes(model, 25) == {A: 100, B: 0}
+    model.apply([stake(20, A, 1000), stake(30, B, 70)])
+    assert stakes(model, 25) == {A: 1000, B: 0}
+    assert stakes(model, 30) == {A: 1000, B: 70}
+
+
+def test_same_length_reorg_refreshes_delegated_voting_power():
+    model = StakingModel(reorg_depth=64)
+    model.apply([stake(10, A, 100), stake(10, B, 50, 1), stake(10, C, 5, 2),
+                 event(20, "votes-delegated", A, delegate=B), stake(30, C, 6)])
+    assert dict(zip(model.addresses, model.voting_power(25).tolist())) == {A: 0, B: 150, C: 5}
+
+    model.rollback(20)
+    model.apply([event(20, "votes-delegated", A, delegate=C), stake(30, C, 6)])
+    assert dict(zip(model.addresses, model.voting_power(25).tolist())) == {A: 0, B: 50, C: 105}
+
+
+def test_rollback_restores_overwritten_columns():
+    model = StakingModel(reorg_depth=64)
+    model.apply([stake(10, A, 100), event(12, "rewards-claimed", A, amount=7),
+                 event(15, "unstake-requested", A), event(20, "unstake-completed", A)])
+    assert model.arrays()["amount"].tolist() == [0]
+    model.rollback(15)
+    columns = {name: values.tolist() for name, values in model.arrays().items()}
+    assert (columns["amount"], columns["last_claim"], columns["unstake_at"], columns["claimed"]) == ([100], [12], [-1], [7])
+    assert model.height == 14 and model.events == 2
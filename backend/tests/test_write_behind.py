@@ -0,0 +1,72 @@
+"""Write-behind retries after a partial insert_many."""
+import asyncio
+import itertools
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from services.write_behind import DUPLICATE_KEY, WriteBehindQueue
+
+_ids = itertools.count(1)
+
+
+class FlakyMongo:
+    """Unordered insert_many that fails the docs in ``fail`` (by text) on their first attempt.
+
+    With ``lose_reply`` the first call writes everything but raises as if the reply was lost.
+    """
+
+    def __init__(self, fail=(), lose_reply=False, always_fail=()):
+        self.docs = {}
+        self.fail = set(fail)
+        self.always_fail = set(always_fail)
+        self.lose_reply = lose_reply
+        self.calls = []
+
+    async def insert_many(self, collection, docs):
+        self.calls.append([d["text"] for d in docs])
+        errors = []
+        for i, doc in enumerate(docs):
+            doc.setdefault("_id", next(_ids))  # like pymongo, on the caller's dict
+            if doc["_id"] in self.docs:
+                errors.append({"index": i, "code": DUPLICATE_KEY})
+            elif doc["text"] in self.always_fail or doc["text"] in self.fail:
+                self.fail.discard(doc["text"])
+                errors.append({"index": i, "code": 91})
+            else:
+                self.docs[doc["_id"]] = dict(doc)
+        if self.lose_reply:
+            self.lose_reply = False
+            raise AutoReconnect("connection closed")
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+async def write(mongo, texts, **kwargs):
+    queue = WriteBehindQueue(mongo, batch_size=100, flush_interval=0.01, **kwargs)
+    await queue.start()
+    for text in texts:
+        await queue.enqueue("chat_messages", {"text": text})
+    await queue.close()
+    return queue
+
+
+def test_partial_failure_retries_only_the_missing_docs():
+    mongo = FlakyMongo(fail={"b", "d"})
+    queue = asyncio.run(write(mongo, "abcde"))
+    assert mongo.calls == [list("abcde"), ["b", "d"]]
+    assert sorted(d["text"] for d in mongo.docs.values()) == list("abcde")
+    assert (queue.written, queue.failed) == (5, 0)
+
+
+def test_lost_reply_counts_the_already_written_docs_once():
+    mongo = FlakyMongo(lose_reply=True)
+    queue = asyncio.run(write(mongo, "abc"))
+    assert mongo.calls == [list("abc"), list("abc")]
+    assert len(mongo.docs) == 3 and (queue.written, queue.failed) == (3, 0)
+
+
+def test_docs_still_failing_after_max_retries_are_dropped():
+    mongo = FlakyMongo(always_fail={"b"})
+    queue = asyncio.run(write(mongo, "abc", max_retries=1))
+    assert mongo.calls == [list("abc"), ["b"]]
+    assert (queue.written, queue.failed) == (2, 1)